@@ -2,7 +2,12 @@ from __future__ import annotations
 
 import os
 import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from typing import Iterable
 
 import jwt
 from fastapi import Depends, HTTPException, status
@@ -50,16 +55,99 @@ def assert_secure_runtime() -> None:
 
 def create_token(subject: str) -> str:
     expires = datetime.now(timezone.utc) + timedelta(minutes=JWT_TTL_MINUTES)
-    payload = {"sub": subject, "exp": expires}
+    payload = {"sub": subject, "exp": expires, "jti": secrets.token_urlsafe(12)}
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALG)
 
 
-def require_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
-    try:
-        payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALG])
-        return str(payload["sub"])
-    except jwt.PyJWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-        )
+@dataclass(frozen=True)
+class VerifiedToken:
+    subject: str
+    expires_at: float
+    jti: str | None = None
+
+
+class TokenCache:
+    """Bounded LRU of verified tokens; entries are dropped once the token expires.
+
+    Only tokens that passed signature verification are stored, keyed by the
+    raw token, so a hit is equivalent to a successful ``jwt.decode``.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, VerifiedToken] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str, now: float) -> VerifiedToken | None:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry.expires_at <= now:
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return entry
+
+    def put(self, token: str, entry: VerifiedToken) -> None:
+        with self._lock:
+            self._entries[token] = entry
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RevocationList:
+    """Revoked ``jti`` values with their token expiry, replaced wholesale on each DB sync."""
+
+    def __init__(self) -> None:
+        self._revoked: dict[str, float] = {}
+
+    def __contains__(self, jti: object) -> bool:
+        return jti in self._revoked
+
+    def add(self, jti: str, expires_at: float) -> None:
+        self._revoked = {**self._revoked, jti: expires_at}
+
+    def replace(self, entries: Iterable[tuple[str, float]], now: float) -> None:
+        self._revoked = {jti: expires_at for jti, expires_at in entries if expires_at > now}
+
+
+token_cache = TokenCache(max(int(os.getenv("OPERATOR_TOKEN_CACHE_SIZE", "4096")), 1))
+revoked_tokens = RevocationList()
+
+
+def _unauthorized() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+    )
+
+
+def verify_token(token: str) -> VerifiedToken:
+    now = time.time()
+    entry = token_cache.get(token, now)
+    if entry is None:
+        try:
+            payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG], options={"require": ["exp", "sub"]})
+        except jwt.PyJWTError:
+            raise _unauthorized()
+        jti = payload.get("jti")
+        entry = VerifiedToken(str(payload["sub"]), float(payload["exp"]), str(jti) if jti else None)
+        token_cache.put(token, entry)
+    if entry.jti is not None and entry.jti in revoked_tokens:
+        raise _unauthorized()
+    return entry
+
+
+async def require_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> VerifiedToken:
+    # async: a cache hit is a dict lookup, not worth a threadpool hop.
+    return verify_token(credentials.credentials)
+
+
+async def require_user(token: VerifiedToken = Depends(require_token)) -> str:
+    return token.subject
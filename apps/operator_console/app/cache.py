@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Generic, TypeVar
+
+V = TypeVar("V")
+
+
+class TenantCache(Generic[V]):
+    """Per-tenant values kept for ``ttl`` seconds or until invalidated.
+
+    Writers call ``invalidate(tenant_id)`` after committing, so a poller sees
+    its own changes on the next read while idle tenants cost one query per TTL.
+    """
+
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple[float, V]] = {}
+
+    def get(self, tenant_id: str) -> V | None:
+        with self._lock:
+            entry = self._entries.get(tenant_id)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if self._clock() >= expires_at:
+                del self._entries[tenant_id]
+                return None
+            return value
+
+    def set(self, tenant_id: str, value: V) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[tenant_id] = (self._clock() + self.ttl, value)
+
+    def invalidate(self, tenant_id: str | None = None) -> None:
+        with self._lock:
+            if tenant_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(tenant_id, None)
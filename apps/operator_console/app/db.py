@@ -2,11 +2,10 @@ from __future__ import annotations
 
 import os
 from pathlib import Path
-from typing import Generator
+from typing import Any, Generator
 
-from sqlalchemy import create_engine, inspect, text
-from sqlalchemy.engine.reflection import Inspector
-from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import DeclarativeBase, Session, close_all_sessions, sessionmaker
 
 
 def _db_url() -> str:
@@ -21,39 +20,71 @@ def _db_url() -> str:
     return f"sqlite:///{data_dir / 'console.db'}"
 
 
+def _int_env(name: str, default: int, low: int, high: int) -> int:
+    try:
+        value = int(os.getenv(name, str(default)))
+    except ValueError:
+        value = default
+    return min(max(value, low), high)
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    return url in {"sqlite://", "sqlite:///:memory:"} or "mode=memory" in url
+
+
+def _engine_kwargs(url: str) -> dict[str, Any]:
+    """Pool and driver settings from OPERATOR_DB_* env vars.
+
+    Pool sizing applies to Postgres and file SQLite (both QueuePool); the
+    statement/lock timeouts are per backend so a stuck query or a held
+    SQLite write lock fails fast instead of piling up requests.
+    """
+    kwargs: dict[str, Any] = {
+        "pool_pre_ping": os.getenv("OPERATOR_DB_POOL_PRE_PING", "true").lower() not in {"0", "false", "no"},
+    }
+    if not _is_sqlite_memory(url):
+        kwargs.update(
+            pool_size=_int_env("OPERATOR_DB_POOL_SIZE", 10, 1, 200),
+            max_overflow=_int_env("OPERATOR_DB_MAX_OVERFLOW", 20, 0, 500),
+            pool_timeout=_int_env("OPERATOR_DB_POOL_TIMEOUT", 10, 1, 300),
+            pool_recycle=_int_env("OPERATOR_DB_POOL_RECYCLE", 1800, -1, 86400),
+        )
+    if url.startswith("sqlite"):
+        busy_ms = _int_env("OPERATOR_SQLITE_BUSY_TIMEOUT_MS", 5000, 0, 600000)
+        kwargs["connect_args"] = {"check_same_thread": False, "timeout": busy_ms / 1000}
+    elif url.startswith("postgresql"):
+        statement_ms = _int_env("OPERATOR_DB_STATEMENT_TIMEOUT_MS", 15000, 0, 3600000)
+        idle_ms = _int_env("OPERATOR_DB_IDLE_TX_TIMEOUT_MS", 60000, 0, 3600000)
+        kwargs["connect_args"] = {
+            "connect_timeout": _int_env("OPERATOR_DB_CONNECT_TIMEOUT", 5, 1, 120),
+            "options": f"-c statement_timeout={statement_ms} -c idle_in_transaction_session_timeout={idle_ms}",
+            "application_name": "operator_console",
+        }
+    return kwargs
+
+
 DATABASE_URL = _db_url()
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = create_engine(DATABASE_URL, **_engine_kwargs(DATABASE_URL))
 
+if DATABASE_URL.startswith("sqlite"):
 
-class Base(DeclarativeBase):
-    pass
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_connection: Any, _: Any) -> None:
+        # WAL lets readers proceed during a write; busy_timeout waits for the
+        # write lock instead of raising "database is locked" immediately.
+        cursor = dbapi_connection.cursor()
+        if not _is_sqlite_memory(DATABASE_URL):
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={_int_env('OPERATOR_SQLITE_BUSY_TIMEOUT_MS', 5000, 0, 600000)}")
+        cursor.close()
 
 
-def _column_exists(inspector: Inspector, table_name: str, column_name: str) -> bool:
-    columns = inspector.get_columns(table_name)
-    return any(col["name"] == column_name for col in columns)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
-def bootstrap_schema() -> None:
-    Base.metadata.create_all(bind=engine)
-    inspector = inspect(engine)
-    statements: list[str] = []
-    if inspector.has_table("clients") and not _column_exists(inspector, "clients", "tenant_id"):
-        statements.append("ALTER TABLE clients ADD COLUMN tenant_id VARCHAR(80) NOT NULL DEFAULT 'default'")
-    if inspector.has_table("automations") and not _column_exists(inspector, "automations", "tenant_id"):
-        statements.append("ALTER TABLE automations ADD COLUMN tenant_id VARCHAR(80) NOT NULL DEFAULT 'default'")
-    if inspector.has_table("executions") and not _column_exists(inspector, "executions", "tenant_id"):
-        statements.append("ALTER TABLE executions ADD COLUMN tenant_id VARCHAR(80) NOT NULL DEFAULT 'default'")
-    if statements:
-        with engine.begin() as conn:
-            for stmt in statements:
-                conn.execute(text(stmt))
-    with engine.begin() as conn:
-        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS uq_clients_tenant_name ON clients (tenant_id, name)"))
+class Base(DeclarativeBase):
+    pass
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -64,6 +95,22 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def warm_up_pool() -> int:
+    """Open up to OPERATOR_DB_POOL_WARMUP connections (default: pool size) before traffic arrives."""
+    size = getattr(engine.pool, "size", None)
+    target = _int_env("OPERATOR_DB_POOL_WARMUP", size() if callable(size) else 1, 0, 200)
+    connections = []
+    try:
+        for _ in range(target):
+            conn = engine.connect()
+            connections.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in connections:
+            conn.close()
+    return len(connections)
+
+
 def close_engine() -> None:
-    SessionLocal.close_all()
+    close_all_sessions()
     engine.dispose()
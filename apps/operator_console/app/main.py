@@ -1,44 +1,66 @@
+import asyncio
+import base64
 import json
+import logging
 import os
 import re
 import time
 from contextlib import asynccontextmanager
+from dataclasses import dataclass, replace
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import AsyncIterator, Awaitable, Callable, cast
+from typing import Any, AsyncIterator, Awaitable, Callable, Collection, cast
 from urllib.parse import urlparse
 
+import httpx
 import requests
-from requests.adapters import HTTPAdapter
 import prometheus_client
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy import func, text
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import func, insert, literal, select, text, tuple_
 from sqlalchemy.orm import Session
 from starlette.middleware.base import RequestResponseEndpoint
 
-from .auth import assert_secure_runtime, create_token, require_user, verify_admin
-from .db import bootstrap_schema, close_engine, get_db
-from .models import Automation, Client, Execution
+from .cache import TenantCache
+from .auth import (
+    VerifiedToken,
+    assert_secure_runtime,
+    create_token,
+    require_token,
+    require_user,
+    revoked_tokens,
+    verify_admin,
+)
+from .db import SessionLocal, close_engine, engine, get_db, warm_up_pool
+from .migrations import assert_schema_current, migrate
+from .metrics import observe_request, observe_run, sample_threadpool
+from .metrics import runtime as metrics_runtime
+from .models import Automation, Client, Execution, RevokedToken
+from .run_queue import QueueFull, RunQueue
 from .schemas import (
     AutomationCreate,
     AutomationOut,
     ClientCreate,
     ClientOut,
     ExecutionOut,
+    ExecutionPage,
+    ExecutionSummaryOut,
     LoginRequest,
+    RunBatchRequest,
     RunRequest,
     SummaryOut,
     TokenResponse,
 )
 
-bootstrap_schema()
 assert_secure_runtime()
+metrics_runtime.engine = engine
+logger = logging.getLogger(__name__)
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 STATIC_DIR = BASE_DIR / "static"
@@ -60,17 +82,101 @@ def _http_pool_size() -> int:
     return min(max(value, 5), 200)
 
 
+def _auto_migrate() -> bool:
+    default = "true" if os.getenv("OPERATOR_ENV", "dev").lower() in {"dev", "development", "test"} else "false"
+    return os.getenv("OPERATOR_AUTO_MIGRATE", default).lower() in {"1", "true", "yes"}
+
+
+def _prepare_schema() -> None:
+    # Deployments run the migrations command once before starting workers;
+    # single-process dev setups may migrate in place.
+    if _auto_migrate():
+        migrate()
+    assert_schema_current()
+
+
+def _revocation_sync_seconds() -> int:
+    try:
+        value = int(os.getenv("OPERATOR_REVOCATION_SYNC_SECONDS", "15"))
+    except ValueError:
+        value = 15
+    return min(max(value, 1), 3600)
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _sync_revocations() -> None:
+    """Reload the in-memory denylist from revoked_tokens, pruning expired rows."""
+    now = datetime.now(timezone.utc)
+    with SessionLocal() as db:
+        db.query(RevokedToken).filter(RevokedToken.expires_at < now).delete(synchronize_session=False)
+        db.commit()
+        rows = db.query(RevokedToken.jti, RevokedToken.expires_at).all()
+    revoked_tokens.replace(((jti, _as_utc(expires_at).timestamp()) for jti, expires_at in rows), now.timestamp())
+
+
+async def _revocation_sync_loop() -> None:
+    # Revocations made on another worker reach this one within one interval.
+    while True:
+        await asyncio.sleep(_revocation_sync_seconds())
+        try:
+            await run_in_threadpool(_sync_revocations)
+        except Exception:
+            logger.exception("token revocation sync failed")
+
+
+def _stale_run_sweep_seconds() -> int:
+    try:
+        value = int(os.getenv("OPERATOR_STALE_RUN_SWEEP_SECONDS", "300"))
+    except ValueError:
+        value = 300
+    return min(max(value, 10), 86400)
+
+
+async def _stale_run_sweep_loop(run_queue: RunQueue) -> None:
+    # Runs left pending by a worker that died without shutting down are failed
+    # while this one is up, not only at the next restart.
+    while True:
+        await asyncio.sleep(_stale_run_sweep_seconds())
+        try:
+            await run_in_threadpool(_fail_stale_runs, run_queue.active_ids())
+        except Exception:
+            logger.exception("stale run sweep failed")
+
+
 @asynccontextmanager
-async def lifespan(_: FastAPI) -> AsyncIterator[None]:
-    session = requests.Session()
-    adapter = HTTPAdapter(pool_connections=_http_pool_size(), pool_maxsize=_http_pool_size())
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
-    _.state.http_session = session
+async def lifespan(app_: FastAPI) -> AsyncIterator[None]:
+    await run_in_threadpool(_prepare_schema)
+    await run_in_threadpool(_sync_revocations)
+    revocation_sync = asyncio.create_task(_revocation_sync_loop())
+    # Shared async client: in-flight runs wait on the event loop, not on
+    # threadpool workers. Redirects are not followed so the host allowlist holds.
+    client = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=_http_pool_size(), max_keepalive_connections=_http_pool_size()),
+        timeout=_run_timeout_seconds(),
+    )
+    app_.state.http_client = client
+    await run_in_threadpool(warm_up_pool)
+    await run_in_threadpool(_fail_stale_runs)
+    run_queue = RunQueue(
+        execute=lambda target: _call_endpoint(app_, target),
+        mark_running=_mark_running,
+        complete=_complete_execution,
+        fail=_fail_execution,
+    )
+    app_.state.run_queue = run_queue
+    metrics_runtime.run_queue = run_queue
+    stale_sweep = asyncio.create_task(_stale_run_sweep_loop(run_queue))
     try:
         yield
     finally:
-        session.close()
+        revocation_sync.cancel()
+        stale_sweep.cancel()
+        await run_queue.stop()
+        metrics_runtime.run_queue = None
+        await client.aclose()
         close_engine()
 
 
@@ -114,9 +220,24 @@ async def add_security_headers(request: Request, call_next: RequestResponseEndpo
     response.headers["Permissions-Policy"] = "camera=(), microphone=(), geolocation=()"
     return response
 
+# Request latency by route template (not raw path, which would carry ids)
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next: RequestResponseEndpoint) -> Response:
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        observe_request(request.method, route, status_code, time.perf_counter() - start)
+
+
 # Metrics Endpoint
 @app.get("/metrics")
-def metrics() -> Response:
+async def metrics() -> Response:
+    sample_threadpool()
     return Response(prometheus_client.generate_latest(), media_type=prometheus_client.CONTENT_TYPE_LATEST)
 TENANT_PATTERN = re.compile(r"^[a-zA-Z0-9][a-zA-Z0-9_-]{1,79}$")
 ALLOWED_HTTP_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE"}
@@ -155,7 +276,7 @@ def _validate_run_endpoint(run_endpoint: str) -> tuple[str, str]:
 _assert_runtime_network_policy()
 
 
-def require_tenant(x_operator_tenant: str | None = Header(default=None, alias="X-Operator-Tenant")) -> str:
+async def require_tenant(x_operator_tenant: str | None = Header(default=None, alias="X-Operator-Tenant")) -> str:
     default_tenant = os.getenv("OPERATOR_DEFAULT_TENANT") or "default"
     tenant = (x_operator_tenant or default_tenant).strip()
     if not TENANT_PATTERN.match(tenant):
@@ -182,31 +303,65 @@ def login(request: Request, payload: LoginRequest) -> TokenResponse:
     return TokenResponse(access_token=create_token(payload.username))
 
 
+@app.post("/api/auth/logout", status_code=204)
+def logout(token: VerifiedToken = Depends(require_token)) -> Response:
+    """Revoke the presented token on every worker (others pick it up on their next sync)."""
+    if token.jti is None:
+        raise HTTPException(status_code=400, detail="Token has no jti and cannot be revoked")
+    with SessionLocal() as db:
+        db.merge(
+            RevokedToken(
+                jti=token.jti,
+                subject=token.subject,
+                expires_at=datetime.fromtimestamp(token.expires_at, tz=timezone.utc),
+            )
+        )
+        db.commit()
+    revoked_tokens.add(token.jti, token.expires_at)
+    return Response(status_code=204)
+
+
+def _summary_ttl_seconds() -> float:
+    try:
+        value = float(os.getenv("OPERATOR_SUMMARY_TTL_SECONDS", "5"))
+    except ValueError:
+        value = 5.0
+    return min(max(value, 0.0), 300.0)
+
+
+summary_cache: TenantCache[SummaryOut] = TenantCache(ttl=_summary_ttl_seconds())
+
+
 @app.get("/api/summary", response_model=SummaryOut)
 def summary(
     _: str = Depends(require_user),
     tenant_id: str = Depends(require_tenant),
     db: Session = Depends(get_db),
 ) -> SummaryOut:
+    cached = summary_cache.get(tenant_id)
+    if cached is not None:
+        return cached
+    # One round-trip: execution counts via FILTER over the
+    # (tenant_id, created_at, status) index, the other tables as scalar subqueries.
     since = datetime.now(timezone.utc) - timedelta(hours=24)
-    executions_24h = (
-        db.query(func.count(Execution.id))
-        .filter(Execution.tenant_id == tenant_id, Execution.created_at >= since)
-        .scalar()
-        or 0
-    )
-    success_24h = (
-        db.query(func.count(Execution.id))
-        .filter(Execution.tenant_id == tenant_id, Execution.created_at >= since, Execution.status == "success")
-        .scalar()
-        or 0
-    )
-    return SummaryOut(
-        clients=db.query(func.count(Client.id)).filter(Client.tenant_id == tenant_id).scalar() or 0,
-        automations=db.query(func.count(Automation.id)).filter(Automation.tenant_id == tenant_id).scalar() or 0,
-        executions_24h=executions_24h,
-        success_24h=success_24h,
+    clients = select(func.count(Client.id)).where(Client.tenant_id == tenant_id).scalar_subquery()
+    automations = select(func.count(Automation.id)).where(Automation.tenant_id == tenant_id).scalar_subquery()
+    row = db.execute(
+        select(
+            clients,
+            automations,
+            func.count(Execution.id),
+            func.count(Execution.id).filter(Execution.status == "success"),
+        ).where(Execution.tenant_id == tenant_id, Execution.created_at >= since)
+    ).one()
+    result = SummaryOut(
+        clients=row[0] or 0,
+        automations=row[1] or 0,
+        executions_24h=row[2] or 0,
+        success_24h=row[3] or 0,
     )
+    summary_cache.set(tenant_id, result)
+    return result
 
 
 @app.get("/api/clients", response_model=list[ClientOut])
@@ -231,6 +386,7 @@ def create_client(
     entity = Client(tenant_id=tenant_id, **payload.model_dump())
     db.add(entity)
     db.commit()
+    summary_cache.invalidate(tenant_id)
     db.refresh(entity)
     return entity
 
@@ -282,6 +438,7 @@ def create_automation(
     entity = Automation(tenant_id=tenant_id, **payload_data)
     db.add(entity)
     db.commit()
+    summary_cache.invalidate(tenant_id)
     db.refresh(entity)
     return entity
 
@@ -319,73 +476,512 @@ def _headers(target_host: str) -> dict[str, str]:
     return headers
 
 
+@dataclass(frozen=True)
+class RunTarget:
+    tenant_id: str
+    automation_id: int
+    client_id: int
+    method: str
+    url: str
+    target_host: str
+    body: dict[str, object]
+
+
+@dataclass(frozen=True)
+class RunResult:
+    status: str
+    response_code: int | None
+    response_body: str
+    duration_ms: int
+
+
+def _load_run_target(automation_id: int, tenant_id: str, overrides: dict[str, object] | None) -> RunTarget:
+    """Read everything the call needs in a short session, closed before the call."""
+    with SessionLocal() as db:
+        automation = (
+            db.query(Automation).filter(Automation.id == automation_id, Automation.tenant_id == tenant_id).first()
+        )
+        if not automation:
+            raise HTTPException(status_code=404, detail="Automation not found")
+        _, target_host = _validate_run_endpoint(automation.run_endpoint)
+
+        body: dict[str, object]
+        try:
+            body = json.loads(automation.payload_template or "{}")
+        except json.JSONDecodeError as exc:
+            raise HTTPException(status_code=400, detail=f"Invalid payload_template JSON: {exc}") from exc
+        if overrides:
+            body.update(overrides)
+        return RunTarget(
+            tenant_id=tenant_id,
+            automation_id=automation.id,
+            client_id=automation.client_id,
+            method=automation.http_method.upper(),
+            url=automation.run_endpoint,
+            target_host=target_host,
+            body=body,
+        )
+
+
+async def _call_endpoint(app: FastAPI, target: RunTarget) -> RunResult:
+    """Outbound call without a DB session or threadpool worker held.
+
+    Uses the lifespan's AsyncClient; without one (lifespan not started) the
+    blocking ``requests`` call runs in the threadpool instead.
+    """
+    start = time.perf_counter()
+    code = None
+    status = "error"
+    response_body = ""
+    try:
+        client: httpx.AsyncClient | None = getattr(app.state, "http_client", None)
+        if client is not None:
+            response = await client.request(
+                target.method,
+                target.url,
+                headers=_headers(target.target_host),
+                json=target.body,
+                timeout=_run_timeout_seconds(),
+            )
+            ok = response.is_success
+            code, response_body = response.status_code, response.text[:5000]
+        else:
+            fallback = await run_in_threadpool(
+                requests.request,
+                target.method,
+                target.url,
+                headers=_headers(target.target_host),
+                json=target.body,
+                timeout=_run_timeout_seconds(),
+            )
+            ok = fallback.ok
+            code, response_body = fallback.status_code, fallback.text[:5000]
+        status = "success" if ok else "error"
+    except Exception as exc:
+        response_body = str(exc)
+    elapsed = time.perf_counter() - start
+    observe_run(target.tenant_id, target.automation_id, status, elapsed)
+    return RunResult(status, code, response_body, int(elapsed * 1000))
+
+
+def _record_execution(target: RunTarget, result: RunResult) -> ExecutionOut:
+    with SessionLocal() as db:
+        execution = Execution(
+            tenant_id=target.tenant_id,
+            client_id=target.client_id,
+            automation_id=target.automation_id,
+            status=result.status,
+            response_code=result.response_code,
+            response_body=result.response_body,
+            duration_ms=result.duration_ms,
+        )
+        db.add(execution)
+        db.query(Automation).filter(Automation.id == target.automation_id).update(
+            {Automation.last_run_at: datetime.now(timezone.utc)}, synchronize_session=False
+        )
+        db.commit()
+        db.refresh(execution)
+    summary_cache.invalidate(target.tenant_id)
+    return ExecutionOut.model_validate(execution)
+
+
+PENDING_STATUSES = ("queued", "running")
+
+
+def _create_queued_execution(target: RunTarget) -> ExecutionOut:
+    with SessionLocal() as db:
+        execution = Execution(
+            tenant_id=target.tenant_id,
+            client_id=target.client_id,
+            automation_id=target.automation_id,
+            status="queued",
+            response_body="",
+        )
+        db.add(execution)
+        db.commit()
+        db.refresh(execution)
+    summary_cache.invalidate(target.tenant_id)
+    return ExecutionOut.model_validate(execution)
+
+
+def _mark_running(execution_id: int) -> None:
+    with SessionLocal() as db:
+        db.query(Execution).filter(Execution.id == execution_id).update(
+            {Execution.status: "running"}, synchronize_session=False
+        )
+        db.commit()
+
+
+def _complete_execution(execution_id: int, target: RunTarget, result: RunResult) -> None:
+    with SessionLocal() as db:
+        db.query(Execution).filter(Execution.id == execution_id).update(
+            {
+                Execution.status: result.status,
+                Execution.response_code: result.response_code,
+                Execution.response_body: result.response_body,
+                Execution.duration_ms: result.duration_ms,
+            },
+            synchronize_session=False,
+        )
+        db.query(Automation).filter(Automation.id == target.automation_id).update(
+            {Automation.last_run_at: datetime.now(timezone.utc)}, synchronize_session=False
+        )
+        db.commit()
+    summary_cache.invalidate(target.tenant_id)
+
+
+def _fail_execution(execution_id: int, message: str) -> None:
+    """Close a queued run that raised or was cancelled; finished rows are left alone."""
+    with SessionLocal() as db:
+        db.query(Execution).filter(
+            Execution.id == execution_id, Execution.status.in_(PENDING_STATUSES)
+        ).update(
+            {Execution.status: "error", Execution.response_body: message},
+            synchronize_session=False,
+        )
+        db.commit()
+    summary_cache.invalidate()
+
+
+def _fail_stale_runs(active: Collection[int] = ()) -> None:
+    """Runs still pending well past the run timeout were lost with their process.
+
+    ``active`` are runs this process still holds (possibly waiting for a slot).
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=_run_timeout_seconds() + 60)
+    with SessionLocal() as db:
+        stale = db.query(Execution).filter(
+            Execution.status.in_(PENDING_STATUSES), Execution.created_at < cutoff
+        )
+        if active:
+            stale = stale.filter(Execution.id.notin_(list(active)))
+        stale.update(
+            {Execution.status: "error", Execution.response_body: "interrupted: console restarted"},
+            synchronize_session=False,
+        )
+        db.commit()
+    summary_cache.invalidate()
+
+
+def _get_execution(execution_id: int, tenant_id: str) -> ExecutionOut:
+    with SessionLocal() as db:
+        execution = (
+            db.query(Execution).filter(Execution.id == execution_id, Execution.tenant_id == tenant_id).first()
+        )
+        if not execution:
+            raise HTTPException(status_code=404, detail="Execution not found")
+        return ExecutionOut.model_validate(execution)
+
+
 @app.post("/api/automations/{automation_id}/run", response_model=ExecutionOut)
-def run_automation(
+async def run_automation(
     automation_id: int,
     payload: RunRequest,
     request: Request,
     _: str = Depends(require_user),
     tenant_id: str = Depends(require_tenant),
-    db: Session = Depends(get_db),
-) -> Execution:
-    automation = db.query(Automation).filter(Automation.id == automation_id, Automation.tenant_id == tenant_id).first()
-    if not automation:
-        raise HTTPException(status_code=404, detail="Automation not found")
-    _, target_host = _validate_run_endpoint(automation.run_endpoint)
+) -> ExecutionOut:
+    target = await run_in_threadpool(_load_run_target, automation_id, tenant_id, payload.payload)
+    result = await _call_endpoint(request.app, target)
+    return await run_in_threadpool(_record_execution, target, result)
 
-    body: dict[str, object]
-    try:
-        body = json.loads(automation.payload_template or "{}")
-    except json.JSONDecodeError as exc:
-        raise HTTPException(status_code=400, detail=f"Invalid payload_template JSON: {exc}") from exc
-    if payload.payload:
-        body.update(payload.payload)
 
-    start = time.perf_counter()
-    code = None
-    status = "error"
-    response_body = ""
+@app.post("/api/automations/{automation_id}/runs", response_model=ExecutionOut)
+async def create_run(
+    automation_id: int,
+    payload: RunRequest,
+    request: Request,
+    response: Response,
+    run_async: bool = Query(default=False, alias="async"),
+    _: str = Depends(require_user),
+    tenant_id: str = Depends(require_tenant),
+) -> ExecutionOut:
+    """With ``?async=true`` the run is queued and 202 returns its Execution immediately."""
+    target = await run_in_threadpool(_load_run_target, automation_id, tenant_id, payload.payload)
+    if not run_async:
+        result = await _call_endpoint(request.app, target)
+        return await run_in_threadpool(_record_execution, target, result)
+
+    run_queue: RunQueue | None = getattr(request.app.state, "run_queue", None)
+    if run_queue is None:
+        raise HTTPException(status_code=503, detail="Run queue is not available")
+    if run_queue.pending >= run_queue.max_pending:
+        raise HTTPException(status_code=503, detail="Run queue is full")
+    execution = await run_in_threadpool(_create_queued_execution, target)
     try:
-        http_session = getattr(request.app.state, "http_session", requests)
-        response = http_session.request(
-            automation.http_method.upper(),
-            automation.run_endpoint,
-            headers=_headers(target_host),
-            json=body,
-            timeout=_run_timeout_seconds(),
+        run_queue.submit(execution.id, tenant_id, target)
+    except QueueFull as exc:
+        await run_in_threadpool(
+            _complete_execution, execution.id, target, RunResult("error", None, "rejected: run queue is full", 0)
         )
-        code = response.status_code
-        response_body = response.text[:5000]
-        status = "success" if response.ok else "error"
-    except Exception as exc:
-        response_body = str(exc)
-    elapsed = int((time.perf_counter() - start) * 1000)
-
-    execution = Execution(
-        tenant_id=tenant_id,
-        client_id=automation.client_id,
-        automation_id=automation.id,
-        status=status,
-        response_code=code,
-        response_body=response_body,
-        duration_ms=elapsed,
-    )
-    automation.last_run_at = datetime.now(timezone.utc)
-    db.add(execution)
-    db.commit()
-    db.refresh(execution)
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    response.status_code = 202
     return execution
 
 
-@app.get("/api/executions", response_model=list[ExecutionOut])
+def _batch_limit(name: str, default: int, high: int) -> int:
+    try:
+        value = int(os.getenv(name, str(default)))
+    except ValueError:
+        value = default
+    return min(max(value, 1), high)
+
+
+async def _read_batch(request: Request) -> tuple[list[dict[str, Any]], int | None]:
+    """Payload overrides from a JSON body or an uploaded JSONL file (field ``file``)."""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Missing JSONL file")
+        payloads: list[dict[str, Any]] = []
+        for number, line in enumerate((await upload.read()).decode("utf-8").splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise HTTPException(status_code=400, detail=f"Invalid JSON on line {number}: {exc}") from exc
+            if not isinstance(item, dict):
+                raise HTTPException(status_code=400, detail=f"Line {number} is not a JSON object")
+            payloads.append(item)
+        concurrency = form.get("concurrency")
+        return payloads, int(concurrency) if isinstance(concurrency, str) and concurrency.isdigit() else None
+    try:
+        batch = RunBatchRequest.model_validate_json(await request.body())
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    return batch.payloads, batch.concurrency
+
+
+def _record_batch(target: RunTarget, results: list[RunResult]) -> None:
+    """One multi-row INSERT per chunk instead of a commit per run."""
+    with SessionLocal() as db:
+        db.execute(
+            insert(Execution),
+            [
+                {
+                    "tenant_id": target.tenant_id,
+                    "client_id": target.client_id,
+                    "automation_id": target.automation_id,
+                    "status": result.status,
+                    "response_code": result.response_code,
+                    "response_body": result.response_body,
+                    "duration_ms": result.duration_ms,
+                }
+                for result in results
+            ],
+        )
+        db.query(Automation).filter(Automation.id == target.automation_id).update(
+            {Automation.last_run_at: datetime.now(timezone.utc)}, synchronize_session=False
+        )
+        db.commit()
+    summary_cache.invalidate(target.tenant_id)
+
+
+@app.post("/api/automations/{automation_id}/run-batch")
+async def run_automation_batch(
+    automation_id: int,
+    request: Request,
+    _: str = Depends(require_user),
+    tenant_id: str = Depends(require_tenant),
+) -> StreamingResponse:
+    """Run one automation for many payload overrides, streaming NDJSON progress.
+
+    Calls share the lifespan AsyncClient with at most ``concurrency`` in
+    flight, and each also takes a RunQueue tenant and global slot so batches
+    and queued runs share the same limits; results are inserted in chunks as
+    they complete. Each line is one
+    finished item (``index``, ``status``, ``response_code``, ``duration_ms``);
+    the last line carries the totals.
+    """
+    payloads, requested = await _read_batch(request)
+    max_items = _batch_limit("OPERATOR_BATCH_MAX_ITEMS", 1000, 100000)
+    if not payloads:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(payloads) > max_items:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {max_items} items")
+    base = await run_in_threadpool(_load_run_target, automation_id, tenant_id, None)
+    concurrency = min(requested or len(payloads), _batch_limit("OPERATOR_BATCH_CONCURRENCY", 16, 200))
+    chunk_size = _batch_limit("OPERATOR_BATCH_INSERT_CHUNK", 200, 5000)
+
+    run_queue: RunQueue | None = getattr(request.app.state, "run_queue", None)
+
+    async def stream() -> AsyncIterator[str]:
+        slots = asyncio.Semaphore(concurrency)
+
+        async def call(overrides: dict[str, Any]) -> RunResult:
+            return await _call_endpoint(request.app, replace(base, body={**base.body, **overrides}))
+
+        async def run_one(index: int, overrides: dict[str, Any]) -> tuple[int, RunResult]:
+            async with slots:
+                if run_queue is None:
+                    return index, await call(overrides)
+                async with run_queue.slot(tenant_id):
+                    return index, await call(overrides)
+
+        tasks = [asyncio.create_task(run_one(index, item)) for index, item in enumerate(payloads)]
+        pending: list[RunResult] = []
+        counts = {"success": 0, "error": 0}
+        try:
+            for finished in asyncio.as_completed(tasks):
+                index, result = await finished
+                counts[result.status] = counts.get(result.status, 0) + 1
+                pending.append(result)
+                if len(pending) >= chunk_size:
+                    await run_in_threadpool(_record_batch, base, pending)
+                    pending = []
+                yield json.dumps(
+                    {
+                        "index": index,
+                        "status": result.status,
+                        "response_code": result.response_code,
+                        "duration_ms": result.duration_ms,
+                    }
+                ) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+            if pending:
+                await run_in_threadpool(_record_batch, base, pending)
+        yield json.dumps({"done": True, "total": len(payloads), **counts}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+async def _wait_for_execution(request: Request, execution_id: int, tenant_id: str, timeout: float) -> ExecutionOut:
+    """Block until the execution leaves queued/running or ``timeout`` elapses.
+
+    Runs admitted by this process are awaited directly; others (another
+    replica, or already finished) fall back to polling the row once a second.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    run_queue: RunQueue | None = getattr(request.app.state, "run_queue", None)
+    while True:
+        execution = await run_in_threadpool(_get_execution, execution_id, tenant_id)
+        remaining = deadline - loop.time()
+        if execution.status not in PENDING_STATUSES or remaining <= 0:
+            return execution
+        if run_queue is not None and execution_id in run_queue:
+            await run_queue.wait(execution_id, remaining)
+        else:
+            await asyncio.sleep(min(remaining, 1.0))
+
+
+@app.get("/api/executions/{execution_id}/wait", response_model=ExecutionOut)
+async def wait_execution(
+    execution_id: int,
+    request: Request,
+    timeout: float = 25.0,
+    _: str = Depends(require_user),
+    tenant_id: str = Depends(require_tenant),
+) -> ExecutionOut:
+    """Long-poll: returns as soon as the run completes, or its current state after ``timeout``."""
+    return await _wait_for_execution(request, execution_id, tenant_id, min(max(timeout, 0.0), 60.0))
+
+
+@app.get("/api/executions/{execution_id}/events")
+async def execution_events(
+    execution_id: int,
+    request: Request,
+    _: str = Depends(require_user),
+    tenant_id: str = Depends(require_tenant),
+) -> StreamingResponse:
+    """Server-sent events: one ``status`` event per state change, closing when the run completes."""
+    current = await run_in_threadpool(_get_execution, execution_id, tenant_id)
+
+    async def stream() -> AsyncIterator[str]:
+        execution = current
+        last_status = None
+        deadline = asyncio.get_running_loop().time() + _run_timeout_seconds() + 60
+        while True:
+            if execution.status != last_status:
+                last_status = execution.status
+                yield f"event: status\ndata: {execution.model_dump_json()}\n\n"
+            if execution.status not in PENDING_STATUSES or asyncio.get_running_loop().time() >= deadline:
+                return
+            if await request.is_disconnected():
+                return
+            execution = await _wait_for_execution(request, execution_id, tenant_id, 15.0)
+            if execution.status == last_status:
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+def _encode_cursor(created_at: datetime, execution_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{execution_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, execution_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(execution_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+EXECUTION_LIST_COLUMNS = (
+    Execution.id,
+    Execution.client_id,
+    Execution.automation_id,
+    Execution.status,
+    Execution.response_code,
+    Execution.duration_ms,
+    Execution.created_at,
+)
+
+
+@app.get("/api/executions", response_model=ExecutionPage)
 def list_executions(
     client_id: int | None = None,
-    limit: int = 100,
+    automation_id: int | None = None,
+    status: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    cursor: str | None = None,
+    limit: int = 50,
     _: str = Depends(require_user),
     tenant_id: str = Depends(require_tenant),
     db: Session = Depends(get_db),
-) -> list[Execution]:
-    query = db.query(Execution).filter(Execution.tenant_id == tenant_id)
+) -> ExecutionPage:
+    """Newest first, paged by an opaque ``(created_at, id)`` cursor.
+
+    Rows are projected without ``response_body``; fetch one execution via
+    ``GET /api/executions/{id}`` for the full record.
+    """
+    limit = min(max(limit, 1), 200)
+    query = select(*EXECUTION_LIST_COLUMNS).where(Execution.tenant_id == tenant_id)
     if client_id is not None:
-        query = query.filter(Execution.client_id == client_id)
-    return query.order_by(Execution.created_at.desc()).limit(min(max(limit, 1), 500)).all()
+        query = query.where(Execution.client_id == client_id)
+    if automation_id is not None:
+        query = query.where(Execution.automation_id == automation_id)
+    if status is not None:
+        query = query.where(Execution.status == status)
+    if since is not None:
+        query = query.where(Execution.created_at >= since)
+    if until is not None:
+        query = query.where(Execution.created_at < until)
+    if cursor is not None:
+        cursor_created_at, cursor_id = _decode_cursor(cursor)
+        query = query.where(
+            tuple_(Execution.created_at, Execution.id) < tuple_(literal(cursor_created_at), literal(cursor_id))
+        )
+    rows = db.execute(query.order_by(Execution.created_at.desc(), Execution.id.desc()).limit(limit + 1)).all()
+
+    items = [ExecutionSummaryOut.model_validate(row._mapping) for row in rows[:limit]]
+    next_cursor = _encode_cursor(items[-1].created_at, items[-1].id) if len(rows) > limit else None
+    return ExecutionPage(items=items, next_cursor=next_cursor)
+
+
+@app.get("/api/executions/{execution_id}", response_model=ExecutionOut)
+def get_execution(
+    execution_id: int,
+    _: str = Depends(require_user),
+    tenant_id: str = Depends(require_tenant),
+) -> ExecutionOut:
+    return _get_execution(execution_id, tenant_id)
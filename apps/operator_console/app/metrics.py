@@ -0,0 +1,119 @@
+"""Prometheus metrics for the operator console.
+
+Metric objects live here, outside ``main``, so they are registered once per
+process even when the app module is re-imported. Pool and run-queue values
+are read at scrape time from whatever the app last bound.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Iterator
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy.engine import Engine
+
+OTHER = "other"
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RUN_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "operator_http_request_duration_seconds",
+    "Operator console request latency by route template.",
+    ("method", "route", "status"),
+    buckets=HTTP_BUCKETS,
+)
+RUN_SECONDS = Histogram(
+    "operator_run_duration_seconds",
+    "Outbound automation call latency.",
+    ("tenant", "automation", "outcome"),
+    buckets=RUN_BUCKETS,
+)
+RUNS_TOTAL = Counter(
+    "operator_runs",
+    "Outbound automation calls by outcome.",
+    ("tenant", "automation", "outcome"),
+)
+THREADPOOL_BUSY = Gauge("operator_threadpool_busy", "Threadpool workers in use (sync endpoints, DB calls).")
+THREADPOOL_LIMIT = Gauge("operator_threadpool_limit", "Threadpool worker limit.")
+
+
+class LabelBudget:
+    """Caps distinct label tuples; anything past ``max_series`` reports as ``other``."""
+
+    def __init__(self, max_series: int) -> None:
+        self.max_series = max_series
+        self._seen: set[tuple[str, ...]] = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, *labels: str) -> tuple[str, ...]:
+        with self._lock:
+            if labels in self._seen:
+                return labels
+            if len(self._seen) < self.max_series:
+                self._seen.add(labels)
+                return labels
+        return (OTHER,) * len(labels)
+
+
+def _max_series() -> int:
+    try:
+        value = int(os.getenv("OPERATOR_METRICS_MAX_SERIES", "200"))
+    except ValueError:
+        value = 200
+    return min(max(value, 1), 10000)
+
+
+run_labels = LabelBudget(_max_series())
+
+
+def observe_run(tenant_id: str, automation_id: int, outcome: str, seconds: float) -> None:
+    tenant, automation = run_labels(tenant_id, str(automation_id))
+    RUN_SECONDS.labels(tenant, automation, outcome).observe(seconds)
+    RUNS_TOTAL.labels(tenant, automation, outcome).inc()
+
+
+def observe_request(method: str, route: str, status_code: int, seconds: float) -> None:
+    HTTP_REQUEST_SECONDS.labels(method, route, f"{status_code // 100}xx").observe(seconds)
+
+
+def sample_threadpool() -> None:
+    """Must run on the event loop: the anyio limiter is per event loop."""
+    from anyio import to_thread
+
+    limiter = to_thread.current_default_thread_limiter()
+    THREADPOOL_BUSY.set(limiter.borrowed_tokens)
+    THREADPOOL_LIMIT.set(limiter.total_tokens)
+
+
+class _RuntimeCollector(Collector):
+    """DB pool and run-queue gauges, read from the objects bound by the app."""
+
+    def __init__(self) -> None:
+        self.engine: Engine | None = None
+        self.run_queue: Any = None
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        pool = self.engine.pool if self.engine is not None else None
+        for name, doc, attr in (
+            ("operator_db_pool_size", "Configured DB pool size.", "size"),
+            ("operator_db_pool_checked_out", "DB connections checked out.", "checkedout"),
+            ("operator_db_pool_overflow", "DB connections opened beyond the pool size.", "overflow"),
+        ):
+            reader = getattr(pool, attr, None)
+            if callable(reader):
+                yield GaugeMetricFamily(name, doc, value=reader())
+        if self.run_queue is not None:
+            yield GaugeMetricFamily(
+                "operator_run_queue_pending", "Queued or running async runs.", value=self.run_queue.pending
+            )
+
+    def describe(self) -> list[GaugeMetricFamily]:
+        return []
+
+
+runtime = _RuntimeCollector()
+REGISTRY.register(runtime)
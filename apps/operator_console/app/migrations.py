@@ -0,0 +1,156 @@
+"""Versioned schema migrations for the operator console.
+
+Run once per deploy, before the app workers start:
+
+    python -m apps.operator_console.app.migrations          # apply pending
+    python -m apps.operator_console.app.migrations --check  # exit 1 if behind
+
+Workers never issue DDL; the lifespan only compares the recorded version
+with ``LATEST_VERSION``. Each migration runs in its own transaction together
+with its version row; on Postgres an advisory lock serialises concurrent
+runners.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from . import db as db_module
+from . import models  # noqa: F401  (registers the tables on Base.metadata)
+
+logger = logging.getLogger(__name__)
+
+VERSION_TABLE = "operator_schema_version"
+ADVISORY_LOCK_KEY = 7_302_118_049
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+
+
+def _baseline(conn: Connection) -> None:
+    """Tables as of the first release, plus the tenant_id columns older databases lack."""
+    metadata = db_module.Base.metadata
+    metadata.create_all(conn, tables=[metadata.tables[name] for name in ("clients", "automations", "executions")])
+    inspector = inspect(conn)
+    for table in ("clients", "automations", "executions"):
+        columns = {col["name"] for col in inspector.get_columns(table)}
+        if "tenant_id" not in columns:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN tenant_id VARCHAR(80) NOT NULL DEFAULT 'default'"))
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS uq_clients_tenant_name ON clients (tenant_id, name)"))
+
+
+def _execution_indexes(conn: Connection) -> None:
+    for statement in (
+        "CREATE INDEX IF NOT EXISTS ix_executions_tenant_created_status ON executions (tenant_id, created_at, status)",
+        "CREATE INDEX IF NOT EXISTS ix_executions_tenant_created_id ON executions (tenant_id, created_at, id)",
+        (
+            "CREATE INDEX IF NOT EXISTS ix_executions_tenant_automation_created "
+            "ON executions (tenant_id, automation_id, created_at, id)"
+        ),
+        (
+            "CREATE INDEX IF NOT EXISTS ix_executions_tenant_client_created "
+            "ON executions (tenant_id, client_id, created_at, id)"
+        ),
+    ):
+        conn.execute(text(statement))
+
+
+def _execution_daily_stats(conn: Connection) -> None:
+    db_module.Base.metadata.tables["execution_daily_stats"].create(conn, checkfirst=True)
+
+
+def _revoked_tokens(conn: Connection) -> None:
+    db_module.Base.metadata.tables["revoked_tokens"].create(conn, checkfirst=True)
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(1, "baseline", _baseline),
+    Migration(2, "execution_indexes", _execution_indexes),
+    Migration(3, "execution_daily_stats", _execution_daily_stats),
+    Migration(4, "revoked_tokens", _revoked_tokens),
+)
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def _ensure_version_table(conn: Connection) -> None:
+    conn.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} ("
+            "version INTEGER PRIMARY KEY, name VARCHAR(120) NOT NULL, "
+            "applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+        )
+    )
+
+
+def current_version(engine: Engine | None = None) -> int:
+    """Highest applied migration, 0 for a database never migrated."""
+    engine = engine or db_module.engine
+    with engine.connect() as conn:
+        if not inspect(conn).has_table(VERSION_TABLE):
+            return 0
+        return conn.execute(text(f"SELECT COALESCE(MAX(version), 0) FROM {VERSION_TABLE}")).scalar() or 0
+
+
+def migrate(engine: Engine | None = None) -> list[int]:
+    """Apply pending migrations in order; returns the versions applied."""
+    engine = engine or db_module.engine
+    applied: list[int] = []
+    with engine.begin() as conn:
+        _ensure_version_table(conn)
+    for migration in MIGRATIONS:
+        with engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+            done = conn.execute(
+                text(f"SELECT 1 FROM {VERSION_TABLE} WHERE version = :version"), {"version": migration.version}
+            ).first()
+            if done:
+                continue
+            migration.apply(conn)
+            conn.execute(
+                text(f"INSERT INTO {VERSION_TABLE} (version, name) VALUES (:version, :name)"),
+                {"version": migration.version, "name": migration.name},
+            )
+        logger.info("applied migration %s_%s", migration.version, migration.name)
+        applied.append(migration.version)
+    return applied
+
+
+def assert_schema_current(engine: Engine | None = None) -> int:
+    version = current_version(engine)
+    if version < LATEST_VERSION:
+        raise RuntimeError(
+            f"Operator console schema is at version {version}, expected {LATEST_VERSION}; "
+            "run `python -m apps.operator_console.app.migrations`"
+        )
+    return version
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Apply operator console schema migrations.")
+    parser.add_argument("--check", action="store_true", help="Only report; exit 1 if migrations are pending")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.check:
+        version = current_version()
+        print(f"schema version {version}/{LATEST_VERSION}")
+        return 0 if version >= LATEST_VERSION else 1
+    applied = migrate()
+    print(f"applied {applied or 'nothing'}; schema version {current_version()}/{LATEST_VERSION}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
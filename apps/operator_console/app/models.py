@@ -1,8 +1,16 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
-
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text
+from datetime import date, datetime, timezone
+
+from sqlalchemy import (
+    Date,
+    DateTime,
+    ForeignKey,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .db import Base
@@ -59,3 +67,30 @@ class Execution(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, nullable=False)
 
     automation: Mapped[Automation] = relationship("Automation", back_populates="executions")
+
+
+class ExecutionDailyStat(Base):
+    """Per-(tenant, automation, day) aggregate of executions past retention."""
+
+    __tablename__ = "execution_daily_stats"
+    __table_args__ = (UniqueConstraint("tenant_id", "automation_id", "day", name="uq_execution_daily_stats_key"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    tenant_id: Mapped[str] = mapped_column(String(80), nullable=False)
+    client_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    automation_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    runs: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    successes: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    p50_duration_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    p95_duration_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    compacted_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, nullable=False)
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti: Mapped[str] = mapped_column(String(64), primary_key=True)
+    subject: Mapped[str] = mapped_column(String(120), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    revoked_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, nullable=False)
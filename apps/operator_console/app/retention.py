@@ -0,0 +1,304 @@
+"""Retention for the executions table.
+
+Whole UTC days older than ``keep_days`` are processed one at a time: raw
+rows are written to ``<archive_dir>/YYYY/MM/executions-YYYY-MM-DD.jsonl.gz``,
+folded into ``execution_daily_stats`` (runs, successes, p50/p95 duration)
+and deleted in id-bounded batches of ``batch_size``, with the stats upsert
+and the deletes in one transaction per day. An interrupted run leaves the
+day untouched and simply redoes it.
+
+    python -m apps.operator_console.app.retention --keep-days 30 --vacuum
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import logging
+import math
+import os
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.orm import Session
+
+from .db import DATABASE_URL, SessionLocal, engine
+from .migrations import assert_schema_current
+from .models import Execution, ExecutionDailyStat
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_DIR = Path(__file__).resolve().parents[1] / "data" / "archive"
+ARCHIVE_COLUMNS = (
+    Execution.id,
+    Execution.tenant_id,
+    Execution.client_id,
+    Execution.automation_id,
+    Execution.status,
+    Execution.response_code,
+    Execution.response_body,
+    Execution.duration_ms,
+    Execution.created_at,
+)
+
+
+@dataclass
+class RetentionReport:
+    cutoff: str
+    days: list[str] = field(default_factory=list)
+    archived: int = 0
+    deleted: int = 0
+    stats_rows: int = 0
+    files: list[str] = field(default_factory=list)
+
+
+@dataclass
+class _Group:
+    client_id: int
+    runs: int = 0
+    successes: int = 0
+    durations: list[int] = field(default_factory=list)
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """Timestamps are stored as naive UTC (DateTime without timezone)."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def percentile(sorted_values: list[int], q: float) -> int | None:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    rank = min(max(math.ceil(q * len(sorted_values)), 1), len(sorted_values))
+    return sorted_values[rank - 1]
+
+
+def _archive_path(archive_dir: Path, day: date) -> Path:
+    return archive_dir / f"{day:%Y}" / f"{day:%m}" / f"executions-{day.isoformat()}.jsonl.gz"
+
+
+def _partial_path(archive_path: Path) -> Path:
+    return archive_path.with_name(archive_path.name + ".partial")
+
+
+def _archive_and_aggregate(
+    db: Session, start: datetime, end: datetime, archive_path: Path | None, batch_size: int
+) -> tuple[int, int | None, dict[tuple[str, int], _Group]]:
+    """Archive the day's rows to a ``.partial`` file; returns (count, highest id, groups)."""
+    groups: dict[tuple[str, int], _Group] = {}
+    archived = 0
+    last_id: int | None = None
+    query = (
+        select(*ARCHIVE_COLUMNS)
+        .where(Execution.created_at >= start, Execution.created_at < end)
+        .order_by(Execution.id)
+        .execution_options(yield_per=batch_size)
+    )
+    partial = _partial_path(archive_path) if archive_path is not None else None
+    if partial is not None:
+        partial.parent.mkdir(parents=True, exist_ok=True)
+    # Overwrite: a leftover .partial comes from a run whose transaction never committed.
+    with gzip.open(partial, "wt", encoding="utf-8") if partial is not None else nullcontext() as handle:
+        for row in db.execute(query):
+            record = dict(row._mapping)
+            last_id = record["id"]
+            if handle is not None:
+                record_out = {**record, "created_at": record["created_at"].isoformat()}
+                handle.write(json.dumps(record_out, ensure_ascii=False) + "\n")
+            archived += 1
+            group = groups.setdefault((record["tenant_id"], record["automation_id"]), _Group(record["client_id"]))
+            group.runs += 1
+            group.successes += record["status"] == "success"
+            if record["duration_ms"] is not None:
+                group.durations.append(record["duration_ms"])
+    return archived, last_id, groups
+
+
+def _publish_archive(archive_path: Path) -> None:
+    """Move the day's ``.partial`` archive into place, right before the commit.
+
+    An existing file means rows for an already compacted day arrived late:
+    they are added as a new gzip member instead of replacing it. Records carry
+    their execution ``id``; only a crash between this and the commit can
+    archive a row twice.
+    """
+    partial = _partial_path(archive_path)
+    if not archive_path.exists():
+        os.replace(partial, archive_path)
+        return
+    with archive_path.open("ab") as target, partial.open("rb") as source:
+        while chunk := source.read(1 << 20):
+            target.write(chunk)
+    partial.unlink()
+
+
+def _weighted(old: int | None, old_runs: int, new: int | None, new_runs: int) -> int | None:
+    if old is None or new is None:
+        return new if old is None else old
+    return round((old * old_runs + new * new_runs) / (old_runs + new_runs))
+
+
+def _merge_stats(db: Session, day: date, groups: dict[tuple[str, int], _Group]) -> int:
+    """Upsert day aggregates.
+
+    Days are compacted in one transaction, so a stat row already present
+    means rows for that day arrived after it was compacted; counts add up and
+    percentiles are merged as a run-weighted mean, which is approximate but
+    only hit for late rows.
+    """
+    for (tenant_id, automation_id), group in groups.items():
+        durations = sorted(group.durations)
+        p50, p95 = percentile(durations, 0.5), percentile(durations, 0.95)
+        stat = (
+            db.query(ExecutionDailyStat)
+            .filter(
+                ExecutionDailyStat.tenant_id == tenant_id,
+                ExecutionDailyStat.automation_id == automation_id,
+                ExecutionDailyStat.day == day,
+            )
+            .first()
+        )
+        if stat is None:
+            db.add(
+                ExecutionDailyStat(
+                    tenant_id=tenant_id,
+                    client_id=group.client_id,
+                    automation_id=automation_id,
+                    day=day,
+                    runs=group.runs,
+                    successes=group.successes,
+                    p50_duration_ms=p50,
+                    p95_duration_ms=p95,
+                )
+            )
+            continue
+
+        stat.p50_duration_ms = _weighted(stat.p50_duration_ms, stat.runs, p50, group.runs)
+        stat.p95_duration_ms = _weighted(stat.p95_duration_ms, stat.runs, p95, group.runs)
+        stat.runs += group.runs
+        stat.successes += group.successes
+        stat.compacted_at = datetime.now(timezone.utc)
+    return len(groups)
+
+
+def _delete_range(
+    db: Session, start: datetime, end: datetime, last_id: int, batch_size: int
+) -> int:
+    """Delete the archived rows in id-bounded batches (no commit).
+
+    Rows inserted after the scan (id above ``last_id``) stay for the next run.
+    """
+    in_day = (Execution.created_at >= start, Execution.created_at < end)
+    deleted = 0
+    low: int | None = None
+    while True:
+        window = select(Execution.id).where(*in_day, Execution.id <= last_id)
+        if low is not None:
+            window = window.where(Execution.id > low)
+        high = db.scalar(window.order_by(Execution.id).offset(batch_size - 1).limit(1)) or last_id
+        batch = delete(Execution).where(*in_day, Execution.id <= high)
+        if low is not None:
+            batch = batch.where(Execution.id > low)
+        deleted += db.execute(batch).rowcount or 0
+        if high >= last_id:
+            return deleted
+        low = high
+
+
+def apply_retention(
+    keep_days: int = 30,
+    archive_dir: Path | None = DEFAULT_ARCHIVE_DIR,
+    batch_size: int = 1000,
+    now: datetime | None = None,
+    session_factory: Callable[[], Session] = SessionLocal,
+    dry_run: bool = False,
+) -> RetentionReport:
+    """Archive, compact and delete executions older than ``keep_days``.
+
+    ``archive_dir=None`` skips the archive files. ``dry_run`` only reports
+    the days that would be processed.
+    """
+    # Whole days only: a partially retained day would be compacted twice.
+    today = _naive_utc(now or datetime.now(timezone.utc)).replace(hour=0, minute=0, second=0, microsecond=0)
+    cutoff = today - timedelta(days=keep_days)
+    report = RetentionReport(cutoff=cutoff.isoformat())
+    lower: datetime | None = None
+    with session_factory() as db:
+        while True:
+            query = select(func.min(Execution.created_at)).where(Execution.created_at < cutoff)
+            if lower is not None:
+                query = query.where(Execution.created_at >= lower)
+            oldest = db.scalar(query)
+            if oldest is None:
+                return report
+            start = _naive_utc(oldest).replace(hour=0, minute=0, second=0, microsecond=0)
+            end = lower = start + timedelta(days=1)
+            day = start.date()
+            report.days.append(day.isoformat())
+            if dry_run:
+                in_day = Execution.created_at >= start, Execution.created_at < end
+                report.archived += db.scalar(select(func.count(Execution.id)).where(*in_day)) or 0
+                continue
+
+            archive_path = _archive_path(archive_dir, day) if archive_dir is not None else None
+            archived, last_id, groups = _archive_and_aggregate(db, start, end, archive_path, batch_size)
+            if last_id is None:
+                # The day was emptied concurrently; nothing to compact.
+                if archive_path is not None:
+                    _partial_path(archive_path).unlink(missing_ok=True)
+                continue
+            stats_rows = _merge_stats(db, day, groups)
+            deleted = _delete_range(db, start, end, last_id, batch_size)
+            if archive_path is not None:
+                _publish_archive(archive_path)
+            db.commit()
+            report.stats_rows += stats_rows
+            report.archived += archived
+            report.deleted += deleted
+            if archive_path is not None:
+                report.files.append(str(archive_path))
+            logger.info("retention %s: archived=%s deleted=%s", day, archived, deleted)
+
+
+def vacuum() -> None:
+    """Give freed pages back to the filesystem (SQLite) or refresh stats (Postgres)."""
+    statement = "VACUUM" if DATABASE_URL.startswith("sqlite") else "VACUUM ANALYZE executions"
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(statement))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Archive and compact old operator console executions.")
+    parser.add_argument("--keep-days", type=int, default=int(os.getenv("OPERATOR_RETENTION_DAYS", "30")))
+    parser.add_argument("--archive-dir", default=os.getenv("OPERATOR_ARCHIVE_DIR", str(DEFAULT_ARCHIVE_DIR)))
+    parser.add_argument("--no-archive", action="store_true", help="Compact and delete without writing archives")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--vacuum", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.keep_days < 1:
+        parser.error("--keep-days must be at least 1")
+    assert_schema_current()
+    report = apply_retention(
+        keep_days=args.keep_days,
+        archive_dir=None if args.no_archive else Path(args.archive_dir),
+        batch_size=max(args.batch_size, 1),
+        dry_run=args.dry_run,
+    )
+    if args.vacuum and not args.dry_run and report.deleted:
+        vacuum()
+    print(json.dumps(asdict(report)))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
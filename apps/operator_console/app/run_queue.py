@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+def _int_env(name: str, default: int, low: int, high: int) -> int:
+    try:
+        value = int(os.getenv(name, str(default)))
+    except ValueError:
+        value = default
+    return min(max(value, low), high)
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+class RunQueue:
+    """Bounded in-process executor for queued automation runs.
+
+    ``workers`` caps concurrent outbound calls overall and ``per_tenant`` per
+    tenant; a run waiting for its tenant slot does not hold a global one, so
+    one busy tenant cannot starve the rest. ``max_pending`` bounds admitted
+    (queued + running) runs. DB updates are sync callbacks run in the threadpool;
+    a run that raises or is cancelled at shutdown is closed through ``fail`` so
+    its row never stays pending. Other callers (batch runs) share the same
+    limits through ``slot``.
+    """
+
+    def __init__(
+        self,
+        execute: Callable[[Any], Awaitable[Any]],
+        mark_running: Callable[[int], None],
+        complete: Callable[[int, Any, Any], None],
+        fail: Callable[[int, str], None],
+        workers: int | None = None,
+        per_tenant: int | None = None,
+        max_pending: int | None = None,
+    ) -> None:
+        self.execute = execute
+        self.mark_running = mark_running
+        self.complete = complete
+        self.fail = fail
+        self.workers = workers or _int_env("OPERATOR_RUN_WORKERS", 32, 1, 1000)
+        self.per_tenant = per_tenant or _int_env("OPERATOR_RUN_TENANT_CONCURRENCY", 8, 1, 1000)
+        self.max_pending = max_pending or _int_env("OPERATOR_RUN_MAX_PENDING", 5000, 1, 100000)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._tenant_slots: dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(self.per_tenant))
+        self._done: dict[int, asyncio.Event] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, execution_id: object) -> bool:
+        return execution_id in self._done
+
+    def active_ids(self) -> set[int]:
+        """Runs admitted by this process and not finished yet."""
+        return set(self._done)
+
+    def submit(self, execution_id: int, tenant_id: str, target: Any) -> None:
+        """Admit a run whose Execution row is already inserted as ``queued``."""
+        if self.pending >= self.max_pending:
+            raise QueueFull("Run queue is full")
+        self._done[execution_id] = asyncio.Event()
+        task = asyncio.create_task(self._run(execution_id, tenant_id, target))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @asynccontextmanager
+    async def slot(self, tenant_id: str) -> AsyncIterator[None]:
+        """Hold one tenant slot and then one global slot for an outbound call."""
+        async with self._tenant_slots[tenant_id], self._slots:
+            yield
+
+    async def _run(self, execution_id: int, tenant_id: str, target: Any) -> None:
+        try:
+            async with self.slot(tenant_id):
+                await run_in_threadpool(self.mark_running, execution_id)
+                result = await self.execute(target)
+                await run_in_threadpool(self.complete, execution_id, target, result)
+        except asyncio.CancelledError:
+            await self._fail(execution_id, "interrupted: shutdown")
+            raise
+        except Exception as exc:
+            logger.exception("queued run %s failed", execution_id)
+            await self._fail(execution_id, f"error: {type(exc).__name__}")
+        finally:
+            event = self._done.pop(execution_id, None)
+            if event:
+                event.set()
+
+    async def _fail(self, execution_id: int, message: str) -> None:
+        try:
+            await run_in_threadpool(self.fail, execution_id, message)
+        except Exception:
+            logger.exception("could not mark queued run %s as failed", execution_id)
+
+    async def wait(self, execution_id: int, timeout: float) -> bool:
+        """Wait until a run admitted by this process finishes; False if unknown or timed out."""
+        event = self._done.get(execution_id)
+        if event is None:
+            return False
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except TimeoutError:
+            return False
+
+    async def stop(self, grace_seconds: float = 10.0) -> None:
+        """Let in-flight runs finish for ``grace_seconds``, then cancel the rest."""
+        if not self._tasks:
+            return
+        _, remaining = await asyncio.wait(set(self._tasks), timeout=grace_seconds)
+        for task in remaining:
+            task.cancel()
+        if remaining:
+            await asyncio.gather(*remaining, return_exceptions=True)
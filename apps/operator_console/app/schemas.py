@@ -64,10 +64,32 @@ class ExecutionOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ExecutionSummaryOut(BaseModel):
+    id: int
+    client_id: int
+    automation_id: int
+    status: str
+    response_code: int | None = None
+    duration_ms: int | None = None
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ExecutionPage(BaseModel):
+    items: list[ExecutionSummaryOut]
+    next_cursor: str | None = None
+
+
 class RunRequest(BaseModel):
     payload: dict[str, Any] | None = None
 
 
+class RunBatchRequest(BaseModel):
+    payloads: list[dict[str, Any]] = Field(min_length=1)
+    concurrency: int | None = Field(default=None, ge=1)
+
+
 class SummaryOut(BaseModel):
     clients: int
     automations: int
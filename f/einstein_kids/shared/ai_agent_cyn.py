@@ -5,12 +5,13 @@ Usa clawbot.ai + contexto de Cyn + Knowledge Base
 
 import yaml
 import psycopg2
-import json
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 import os
 import re
 
+from .event_log import EventEmitter
+
 class EinsteinKidsAIAgent:
     """Agente AI que responde como Cyn usando clawbot.ai"""
     
@@ -336,24 +337,16 @@ Tambi??n tengo opciones de pago. ??Te gustar??a conocerlas?"""
     
     def log_interaction(self, phone: str, message: str, response: Dict, context: Dict):
         """Registra la interacci??n en BD"""
-        cursor = self.db_connection.cursor()
-        
-        cursor.execute("""
-            INSERT INTO ek_lead_events (lead_id, event_type, payload)
-            VALUES (
-                (SELECT lead_id FROM ek_leads WHERE phone_normalized = %s ORDER BY created_at DESC LIMIT 1),
-                'ai_interaction',
-                %s
-            );
-        """, (phone, json.dumps({
-            "direction": "inbound",
-            "message": message,
-            "response": response["text"],
-            "intent": context["intent"],
-            "confidence": response.get("confidence", 0),
-            "needs_escalation": response.get("needs_escalation", False),
-            "timestamp": datetime.now().isoformat()
-        })))
+        with EventEmitter(self.db_connection) as events:
+            events.emit(None, "ai_interaction", {
+                "direction": "inbound",
+                "message": message,
+                "response": response["text"],
+                "intent": context["intent"],
+                "confidence": response.get("confidence", 0),
+                "needs_escalation": response.get("needs_escalation", False),
+                "timestamp": datetime.now().isoformat()
+            }, phone=phone)
         
         self.db_connection.commit()
     
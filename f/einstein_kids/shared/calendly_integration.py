@@ -9,7 +9,8 @@ import hashlib
 import hmac
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
-import json
+
+from .event_log import EventEmitter
 
 class CalendlyAPIClient:
     """Cliente para Calendly API v2"""
@@ -294,10 +295,8 @@ class CalendlyEinsteinKidsIntegration:
             lead_id = cursor.fetchone()[0]
         
         # Registrar evento
-        cursor.execute("""
-            INSERT INTO ek_lead_events (lead_id, event_type, payload)
-            VALUES (%s, 'calendly_booking', %s);
-        """, (lead_id, json.dumps(lead_data)))
+        with EventEmitter(self.db) as events:
+            events.emit(lead_id, 'calendly_booking', lead_data)
         
         self.db.commit()
         return lead_id
@@ -3,12 +3,16 @@ from __future__ import annotations
 
 import logging
 import os
-from typing import Any, Dict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Tuple
 
 import psycopg2
-from psycopg2.extras import Json, RealDictCursor
+from psycopg2.extras import RealDictCursor
 import yaml
 
+from .event_log import EventEmitter
+from .refresh_funnel import refresh_funnel_view
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -50,10 +54,24 @@ def _resolve_score_add(label: str, rules: Dict[str, int]) -> int:
     return 0
 
 
+def _event_window(event_start_at: str | None) -> Tuple[datetime, datetime] | None:
+    """ts range that can hold a meeting's events, so ek_lead_events is pruned to 1-2 partitions."""
+    if not event_start_at:
+        return None
+    try:
+        start = datetime.fromisoformat(str(event_start_at).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    return start - timedelta(days=1), start + timedelta(days=2)
+
+
 def main(
     meeting_id: str,
     total_duration_minutes: int = 90,
     pg_resource: Dict[str, Any] | None = None,
+    event_start_at: str | None = None,
 ) -> Dict[str, Any]:
     if not meeting_id:
         return {"ok": False, "error": "missing_meeting_id"}
@@ -66,21 +84,35 @@ def main(
 
     try:
         conn = psycopg2.connect(**pg_resource)
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        with EventEmitter(conn) as events, conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute(
                 """
-                SELECT
-                    lead_id,
-                    SUM(COALESCE((payload->>'duration_minutes')::int, 0)) AS duration_minutes
-                FROM ek_lead_events
-                WHERE event_type = 'zoom_participant_left'
-                  AND payload->>'meeting_id' = %s
-                GROUP BY lead_id
+                SELECT lead_id, attended_seconds / 60 AS duration_minutes
+                FROM ek_attendance_sessions
+                WHERE meeting_id = %s
                 """,
                 (meeting_id,),
             )
             records = cur.fetchall()
 
+            if not records:
+                window = _event_window(event_start_at)
+                ts_filter = "AND ts >= %s AND ts < %s" if window else ""
+                cur.execute(
+                    f"""
+                    SELECT
+                        lead_id,
+                        SUM(COALESCE(duration_minutes, 0)) AS duration_minutes
+                    FROM ek_lead_events
+                    WHERE event_type = 'zoom_participant_left'
+                      AND meeting_id = %s
+                      {ts_filter}
+                    GROUP BY lead_id
+                    """,
+                    (meeting_id, *(window or ())),
+                )
+                records = cur.fetchall()
+
             if not records:
                 return {"ok": False, "error": "no_attendance_events_for_meeting", "meeting_id": meeting_id}
 
@@ -90,48 +122,39 @@ def main(
                 label = _resolve_label(duration, total_duration_minutes)
                 score_add = _resolve_score_add(label, rules)
 
+                # The score itself is derived from the event below by lead_scoring.
                 if label == "HOT_LEAD":
                     cur.execute(
                         """
                         UPDATE ek_leads
-                        SET score = score + %s,
-                            stage = CASE WHEN stage != 'CUSTOMER' THEN 'HOT_LEAD' ELSE stage END,
+                        SET stage = 'HOT_LEAD',
                             updated_at = NOW()
-                        WHERE lead_id = %s
+                        WHERE lead_id = %s AND stage != 'CUSTOMER'
                         """,
-                        (score_add, lead_id),
-                    )
-                else:
-                    cur.execute(
-                        """
-                        UPDATE ek_leads
-                        SET score = score + %s,
-                            updated_at = NOW()
-                        WHERE lead_id = %s
-                        """,
-                        (score_add, lead_id),
+                        (lead_id,),
                     )
 
-                cur.execute(
-                    """
-                    INSERT INTO ek_lead_events (lead_id, event_type, payload)
-                    VALUES (%s, 'attendance_segment_computed', %s::jsonb)
-                    """,
-                    (
-                        lead_id,
-                        Json(
-                            {
-                                "meeting_id": meeting_id,
-                                "duration_minutes": duration,
-                                "segment": label,
-                                "score_add": score_add,
-                            }
-                        ),
-                    ),
+                events.emit(
+                    lead_id,
+                    "attendance_segment_computed",
+                    {
+                        "meeting_id": meeting_id,
+                        "duration_minutes": duration,
+                        "segment": label,
+                        "score_add": score_add,
+                    },
                 )
                 processed += 1
 
         conn.commit()
+
+        # The event's stages just changed; keep the precomputed funnel current.
+        # A failed refresh is retried by the schedule and must not fail attendance.
+        try:
+            refresh_funnel_view(conn)
+        except Exception:
+            logger.warning("funnel refresh after attendance failed", exc_info=True)
+
         return {"ok": True, "meeting_id": meeting_id, "processed": processed}
     except Exception as exc:
         if conn:
@@ -10,17 +10,31 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any
 import os
 
+from .hot_leads import list_hot_leads
+from .kpi_rollup import read_daily_kpis, sum_kpis
+from .lead_timeline import get_lead_timeline
+
+
+def connection_params(dsn_env: str = None) -> Dict[str, Any]:
+    """Parámetros de conexión: DSN en ``dsn_env`` si está definido, si no PG* del entorno"""
+    dsn = os.getenv(dsn_env) if dsn_env else None
+    if dsn:
+        return {"dsn": dsn}
+    return {
+        "host": os.getenv('PGHOST', 'localhost'),
+        "port": os.getenv('PGPORT', '5432'),
+        "user": os.getenv('POSTGRES_USER', 'windmill'),
+        "password": os.getenv('POSTGRES_PASSWORD'),
+        "database": os.getenv('POSTGRES_DB', 'windmill')
+    }
+
 class EinsteinKidsDashboard:
     """Dashboard completo para Cyn"""
     
-    def __init__(self):
-        self.conn = psycopg2.connect(
-            host=os.getenv('PGHOST', 'localhost'),
-            port=os.getenv('PGPORT', '5432'),
-            user=os.getenv('POSTGRES_USER', 'windmill'),
-            password=os.getenv('POSTGRES_PASSWORD'),
-            database=os.getenv('POSTGRES_DB', 'windmill')
-        )
+    def __init__(self, conn=None):
+        # Con ``conn`` externa (pool del snapshot service) no es dueño de la conexión
+        self._owns_conn = conn is None
+        self.conn = conn or psycopg2.connect(**connection_params())
     
     def get_resumen_general(self) -> Dict[str, Any]:
         """Resumen general del negocio"""
@@ -90,34 +104,34 @@ class EinsteinKidsDashboard:
             }
         return None
     
-    def get_leads_calientes(self) -> List[Dict[str, Any]]:
-        """Leads con alta puntuaci??n (hot leads)"""
-        cursor = self.conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                lead_id, name, phone, email, score, stage,
-                whatsapp_consent_ts, created_at
-            FROM ek_leads 
-            WHERE score >= 70 
-            ORDER BY score DESC, created_at DESC
-            LIMIT 10;
-        """)
+    def get_leads_calientes(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Leads con alta puntuación (hot leads): primera página del listado"""
+        return self.get_leads_calientes_pagina(limit=limit)["leads"]
+    
+    def get_leads_calientes_pagina(self, limit: int = 10, cursor: str = None) -> Dict[str, Any]:
+        """Página de hot leads por keyset; ``next_cursor`` se pasa como ``cursor`` para la siguiente"""
+        pagina = list_hot_leads(self.conn, limit=limit, cursor=cursor)
         
         leads = []
-        for row in cursor.fetchall():
+        for row in pagina["items"]:
             leads.append({
-                "id": str(row[0]),
-                "nombre": row[1],
-                "telefono": row[2],
-                "email": row[3],
-                "score": row[4],
-                "etapa": row[5],
-                "consentimiento": row[6].strftime("%Y-%m-%d") if row[6] else None,
-                "fecha_registro": row[7].strftime("%Y-%m-%d %H:%M")
+                "id": str(row["lead_id"]),
+                "nombre": row["name"],
+                "telefono": row["phone"],
+                "email": row["email"],
+                "score": row["score"],
+                "etapa": row["stage"],
+                "consentimiento": row["whatsapp_consent_ts"].strftime("%Y-%m-%d") if row["whatsapp_consent_ts"] else None,
+                "fecha_registro": row["created_at"].strftime("%Y-%m-%d %H:%M"),
+                "mensajes": row["message_count"],
+                "ultima_interaccion": row["last_interaction_at"].strftime("%Y-%m-%d %H:%M") if row["last_interaction_at"] else None
             })
         
-        return leads
+        return {"leads": leads, "next_cursor": pagina["next_cursor"]}
+    
+    def get_timeline_lead(self, lead_id: str, limit: int = 20, antes_de: str = None) -> List[Dict[str, Any]]:
+        """Historial reciente de un lead (eventos, mensajes, ventas, jobs) desde ek_lead_timeline"""
+        return get_lead_timeline(self.conn, lead_id, limit=limit, before=antes_de)
     
     def get_claims_pendientes(self) -> List[Dict[str, Any]]:
         """Claims de pago pendientes de revisi??n"""
@@ -156,6 +170,7 @@ class EinsteinKidsDashboard:
                 l.name, m.created_at
             FROM ek_ycloud_messages m
             JOIN ek_leads l ON m.lead_id = l.lead_id
+            WHERE m.created_at >= NOW() - INTERVAL '30 days'  -- poda a las particiones recientes
             ORDER BY m.created_at DESC
             LIMIT %s;
         """, (limit,))
@@ -184,7 +199,7 @@ class EinsteinKidsDashboard:
                 COUNT(CASE WHEN stage = 'EVENT_ATTENDED' THEN 1 END) as asistieron,
                 COUNT(CASE WHEN stage = 'EVENT_NO_SHOW' THEN 1 END) as no_show
             FROM ek_leads 
-            WHERE event_start_at BETWEEN NOW() AND NOW() + INTERVAL '%s days'
+            WHERE event_start_at BETWEEN NOW() AND NOW() + make_interval(days => %s)
             GROUP BY DATE(event_start_at)
             ORDER BY fecha;
         """, (dias,))
@@ -208,46 +223,25 @@ class EinsteinKidsDashboard:
     
     def get_kpis_diarios(self, dias: int = 30) -> Dict[str, Any]:
         """KPIs diarios para dashboard"""
-        cursor = self.conn.cursor()
-        
-        # Leads nuevos por d??a
-        cursor.execute("""
-            SELECT 
-                DATE(created_at) as fecha,
-                COUNT(*) as leads_nuevos
-            FROM ek_leads 
-            WHERE created_at >= NOW() - INTERVAL '%s days'
-            GROUP BY DATE(created_at)
-            ORDER BY fecha DESC;
-        """, (dias,))
+        # Serie diaria desde el rollup ek_daily_kpis: O(días) sin recorrer las tablas
+        hoy = datetime.now().date()
+        kpis_por_dia = read_daily_kpis(self.conn, hoy - timedelta(days=dias), hoy + timedelta(days=1))
         
         leads_diarios = []
-        for row in cursor.fetchall():
-            leads_diarios.append({
-                "fecha": row[0].strftime("%Y-%m-%d"),
-                "leads": row[1]
-            })
-        
-        # Ventas por d??a
-        cursor.execute("""
-            SELECT 
-                DATE(confirmed_at) as fecha,
-                COUNT(*) as ventas,
-                COALESCE(SUM(amount), 0) as monto
-            FROM ek_sales 
-            WHERE status = 'confirmed' 
-            AND confirmed_at >= NOW() - INTERVAL '%s days'
-            GROUP BY DATE(confirmed_at)
-            ORDER BY fecha DESC;
-        """, (dias,))
-        
         ventas_diarias = []
-        for row in cursor.fetchall():
-            ventas_diarias.append({
-                "fecha": row[0].strftime("%Y-%m-%d"),
-                "ventas": row[1],
-                "monto": float(row[2])
-            })
+        for fecha in sorted(kpis_por_dia, reverse=True):
+            kpis = sum_kpis(kpis_por_dia[fecha])
+            if kpis["leads_new"]:
+                leads_diarios.append({
+                    "fecha": fecha.strftime("%Y-%m-%d"),
+                    "leads": kpis["leads_new"]
+                })
+            if kpis["sales_count"]:
+                ventas_diarias.append({
+                    "fecha": fecha.strftime("%Y-%m-%d"),
+                    "ventas": kpis["sales_count"],
+                    "monto": float(kpis["sales_amount"])
+                })
         
         return {
             "leads_diarios": leads_diarios,
@@ -270,7 +264,7 @@ class EinsteinKidsDashboard:
     
     def close(self):
         """Cierra conexi??n a BD"""
-        if self.conn:
+        if self.conn and self._owns_conn:
             self.conn.close()
 
 # Funci??n principal para Windmill
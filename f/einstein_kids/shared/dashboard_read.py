@@ -0,0 +1,20 @@
+"""Dashboard read path: serve the stored snapshot without running section queries."""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+import psycopg2
+
+from .dashboard_cyn import connection_params
+from .dashboard_snapshot import DashboardSnapshotService
+
+
+def main(pg_resource: Dict[str, Any] | None = None, max_age: float = 300.0) -> Dict[str, Any]:
+    """Windmill entry point for the dashboard UI.
+
+    Returns the latest snapshot persisted by dashboard_snapshot (scheduled),
+    with ``stale``/``age_seconds``; an empty envelope until the first run.
+    """
+    params = pg_resource or connection_params()
+    service = DashboardSnapshotService(None, store=lambda: psycopg2.connect(**params), max_age=max_age)
+    return service.get()
@@ -0,0 +1,307 @@
+"""Background-refreshed, versioned snapshot of the Einstein Kids dashboard.
+
+Sections are computed in parallel on pooled (optionally replica) connections;
+readers are served from memory with stale-while-revalidate, so opening the
+dashboard never runs the section queries inline.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict
+
+import psycopg2
+from psycopg2.extras import Json
+from psycopg2.pool import ThreadedConnectionPool
+
+from .dashboard_cyn import EinsteinKidsDashboard, connection_params
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_NAME = "einstein_kids_dashboard"
+REPLICA_DSN_ENV = "EK_DASHBOARD_REPLICA_DSN"
+
+Section = Callable[[Any], Any]
+
+
+def _section(method: str) -> Section:
+    return lambda conn: getattr(EinsteinKidsDashboard(conn), method)()
+
+
+# Same sections (and keys) as EinsteinKidsDashboard.generar_reporte_completo
+SECTIONS: Dict[str, Section] = {
+    "resumen_general": _section("get_resumen_general"),
+    "proximo_evento": _section("get_proximo_evento"),
+    "leads_calientes": _section("get_leads_calientes"),
+    "claims_pendientes": _section("get_claims_pendientes"),
+    "mensajes_recientes": _section("get_mensajes_recientes"),
+    "eventos_proximos": _section("get_eventos_proximos"),
+    "kpis_diarios": _section("get_kpis_diarios"),
+}
+
+
+def load_snapshot(conn, name: str = SNAPSHOT_NAME) -> Dict[str, Any] | None:
+    with conn.cursor() as cur:
+        cur.execute("SELECT payload FROM ek_dashboard_snapshots WHERE name = %s", (name,))
+        row = cur.fetchone()
+    return row[0] if row else None
+
+
+def save_snapshot(conn, snapshot: Dict[str, Any], name: str = SNAPSHOT_NAME) -> None:
+    """Upsert, never moving the stored version backwards."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO ek_dashboard_snapshots (name, version, payload, generated_at)
+            VALUES (%s, %s, %s::jsonb, %s)
+            ON CONFLICT (name) DO UPDATE
+            SET version = EXCLUDED.version,
+                payload = EXCLUDED.payload,
+                generated_at = EXCLUDED.generated_at
+            WHERE ek_dashboard_snapshots.version < EXCLUDED.version
+            """,
+            (name, snapshot["version"], Json(snapshot, dumps=_dumps), snapshot["generated_at"]),
+        )
+    conn.commit()
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, default=str, ensure_ascii=False)
+
+
+def _empty_snapshot() -> Dict[str, Any]:
+    return {"name": SNAPSHOT_NAME, "version": 0, "generated_at": None, "sections": {}, "errors": {}}
+
+
+def _persisted_age(snapshot: Dict[str, Any], max_age: float) -> float:
+    """Seconds since a stored snapshot was generated; unknown ages count as stale."""
+    try:
+        generated_at = datetime.fromisoformat(snapshot["generated_at"])
+    except (KeyError, TypeError, ValueError):
+        return max_age + 1
+    if generated_at.tzinfo is None:
+        generated_at = generated_at.replace(tzinfo=timezone.utc)
+    return max((datetime.now(timezone.utc) - generated_at).total_seconds(), 0.0)
+
+
+class DashboardSnapshotService:
+    """Computes the dashboard payload off the request path and serves it from memory.
+
+    ``pool`` provides read connections (getconn/putconn), ideally on a replica.
+    ``store`` is an optional connection factory used to persist and reload the
+    snapshot blob, so a fresh process can serve immediately after a restart.
+    With ``pool=None`` the service is read-only: it serves the persisted blob
+    and leaves refreshing to the scheduled dashboard_snapshot run.
+    """
+
+    def __init__(
+        self,
+        pool,
+        sections: Dict[str, Section] | None = None,
+        store: Callable[[], Any] | None = None,
+        refresh_interval: float = 60.0,
+        max_age: float = 300.0,
+        max_workers: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.pool = pool
+        self.sections = dict(sections or SECTIONS)
+        self.store = store
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.max_workers = max_workers
+        self._clock = clock
+        self._snapshot: Dict[str, Any] | None = None
+        self._computed_at: float | None = None
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+        self._revalidating = False
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # -- compute -----------------------------------------------------------
+
+    def _run_section(self, name: str) -> Any:
+        conn = self.pool.getconn()
+        try:
+            return self.sections[name](conn)
+        finally:
+            try:
+                conn.rollback()
+            finally:
+                self.pool.putconn(conn)
+
+    def refresh(self) -> Dict[str, Any]:
+        """Compute every section in parallel and publish a new version.
+
+        A failing section keeps its value from the previous snapshot and is
+        listed under ``errors``, so one slow or broken query never blanks the
+        whole dashboard.
+        """
+        with self._refreshing:
+            if self._snapshot is None:
+                # Continue the persisted version sequence after a restart.
+                self._load_persisted()
+            previous = self._snapshot or {}
+            previous_sections = previous.get("sections", {})
+            sections: Dict[str, Any] = {}
+            errors: Dict[str, str] = {}
+
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ek-dashboard") as executor:
+                futures = {name: executor.submit(self._run_section, name) for name in self.sections}
+                for name, future in futures.items():
+                    try:
+                        sections[name] = future.result()
+                    except Exception as exc:
+                        logger.warning("dashboard section %s failed: %s", name, exc)
+                        errors[name] = str(exc)
+                        sections[name] = previous_sections.get(name)
+
+            snapshot = {
+                "name": SNAPSHOT_NAME,
+                "version": int(previous.get("version", 0)) + 1,
+                "generated_at": datetime.now(timezone.utc).isoformat(),
+                "sections": json.loads(_dumps(sections)),
+                "errors": errors,
+            }
+            with self._lock:
+                self._snapshot = snapshot
+                self._computed_at = self._clock()
+
+        if self.store:
+            try:
+                conn = self.store()
+                try:
+                    save_snapshot(conn, snapshot)
+                finally:
+                    conn.close()
+            except Exception:
+                logger.warning("could not persist dashboard snapshot", exc_info=True)
+        return snapshot
+
+    def _refresh_in_background(self) -> None:
+        """Single-flight revalidation: at most one background refresh at a time."""
+        if self.pool is None:
+            return
+        with self._lock:
+            if self._revalidating or self._refreshing.locked():
+                return
+            self._revalidating = True
+
+        def revalidate() -> None:
+            try:
+                self._safe_refresh()
+            finally:
+                with self._lock:
+                    self._revalidating = False
+
+        threading.Thread(target=revalidate, name="ek-dashboard-revalidate", daemon=True).start()
+
+    def _safe_refresh(self) -> None:
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("dashboard snapshot refresh failed")
+
+    # -- read --------------------------------------------------------------
+
+    def _load_persisted(self) -> None:
+        if not self.store:
+            return
+        try:
+            conn = self.store()
+            try:
+                snapshot = load_snapshot(conn)
+            finally:
+                conn.close()
+        except Exception:
+            logger.warning("could not load persisted dashboard snapshot", exc_info=True)
+            return
+        if snapshot:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = snapshot
+                    self._computed_at = self._clock() - _persisted_age(snapshot, self.max_age)
+
+    def get(self) -> Dict[str, Any]:
+        """Current snapshot; stale snapshots are served while a refresh runs.
+
+        Never computes sections on the caller's thread: on a cold start with
+        nothing persisted it returns an empty, stale envelope and revalidates
+        in the background.
+        """
+        if self._snapshot is None:
+            self._load_persisted()
+        with self._lock:
+            snapshot, computed_at = self._snapshot, self._computed_at
+        if snapshot is None:
+            self._refresh_in_background()
+            return {**_empty_snapshot(), "stale": True, "age_seconds": None}
+
+        age = self._clock() - computed_at
+        if age > self.max_age:
+            self._refresh_in_background()
+        return {**snapshot, "stale": age > self.max_age, "age_seconds": round(max(age, 0.0), 1)}
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="ek-dashboard-refresh", daemon=True)
+        self._thread.start()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self._safe_refresh()
+            self._stop.wait(self.refresh_interval)
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def build_service(max_workers: int = 4, **kwargs: Any) -> DashboardSnapshotService:
+    """Service wired from the environment.
+
+    Section queries go to ``EK_DASHBOARD_REPLICA_DSN`` when set (read-only
+    sessions); only the snapshot blob is written to the primary.
+    """
+    read_params = connection_params(REPLICA_DSN_ENV)
+    pool = ThreadedConnectionPool(1, max_workers, **read_params)
+    return DashboardSnapshotService(
+        pool,
+        store=lambda: psycopg2.connect(**connection_params()),
+        max_workers=max_workers,
+        **kwargs,
+    )
+
+
+def main(pg_resource: Dict[str, Any] | None = None, max_workers: int = 4) -> Dict[str, Any]:
+    """Windmill entry point: compute one snapshot and persist it (run on a schedule)."""
+    read_params = pg_resource or connection_params(REPLICA_DSN_ENV)
+    write_params = pg_resource or connection_params()
+    pool = None
+    try:
+        pool = ThreadedConnectionPool(1, max_workers, **read_params)
+        service = DashboardSnapshotService(
+            pool,
+            store=lambda: psycopg2.connect(**write_params),
+            max_workers=max_workers,
+        )
+        snapshot = service.refresh()
+        return {"ok": not snapshot["errors"], "version": snapshot["version"], "errors": snapshot["errors"]}
+    except Exception as exc:
+        logger.exception("dashboard_snapshot failed")
+        return {"ok": False, "error": str(exc)}
+    finally:
+        if pool:
+            pool.closeall()
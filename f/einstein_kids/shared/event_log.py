@@ -0,0 +1,177 @@
+"""Buffered, append-only writer for ek_lead_events.
+
+Scripts emit events on their business connection and the emitter writes them
+in multi-row INSERTs (execute_values) when the buffer reaches ``max_batch``,
+when ``max_delay`` seconds have passed since the first buffered event, or on
+``flush()`` / context exit. Flushing on the same connection keeps events in
+the caller's transaction: they commit or roll back with the business writes.
+
+Usage::
+
+    with EventEmitter(conn) as events:
+        ...
+        events.emit(lead_id, "payment_claim_created", {"sale_id": sale_id})
+    conn.commit()
+"""
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from psycopg2.extras import Json, execute_values
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH = 500
+DEFAULT_MAX_DELAY = 1.0
+
+# Required payload keys per event type. Unknown types are accepted as-is.
+EVENT_SCHEMAS: Dict[str, Tuple[str, ...]] = {
+    "ycloud_inbound_message": ("message_id", "message_type", "action"),
+    "ycloud_message_status": ("message_id", "status"),
+    "zoom_participant_joined": ("meeting_id",),
+    "zoom_participant_left": ("meeting_id", "duration_minutes"),
+    "zoom_attendance": ("meeting_id", "status", "duration_minutes"),
+    "zoom_no_show": ("reason",),
+    "attendance_segment_computed": ("meeting_id", "duration_minutes", "segment", "score_add"),
+    "payment_claim_created": ("sale_id",),
+    "payment_claim_decided": ("sale_id", "decision", "status"),
+    "calendly_booking": (),
+    "ai_interaction": ("intent",),
+    "message_preprocessed": ("preprocessing_result",),
+}
+
+_INSERT_SQL = "INSERT INTO ek_lead_events (lead_id, event_type, payload, ts) VALUES %s"
+_TEMPLATE = "(%s::uuid, %s, %s::jsonb, COALESCE(%s::timestamptz, NOW()))"
+
+
+def compact_payload(value: Any) -> Any:
+    """Drop None and empty containers recursively (jsonb stores no whitespace already)."""
+    if isinstance(value, dict):
+        compacted = {key: compact_payload(item) for key, item in value.items()}
+        return {key: item for key, item in compacted.items() if item not in (None, {}, [], "")}
+    if isinstance(value, (list, tuple)):
+        return [compact_payload(item) for item in value if item is not None]
+    return value
+
+
+def validate_event(event_type: str, payload: Dict[str, Any]) -> None:
+    if not event_type:
+        raise ValueError("missing_event_type")
+    missing = [key for key in EVENT_SCHEMAS.get(event_type, ()) if key not in payload]
+    if missing:
+        raise ValueError(f"invalid_event_payload: {event_type} missing {', '.join(missing)}")
+
+
+class EventEmitter:
+    """Buffer ek_lead_events rows and write them in batches on ``conn``.
+
+    Events may be keyed by ``phone`` (normalized) instead of ``lead_id``; those
+    are resolved with one lookup per flush. Events whose lead cannot be
+    resolved are still written with a NULL lead_id, as before.
+    """
+
+    def __init__(
+        self,
+        conn,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        compact: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.conn = conn
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.compact = compact
+        self._clock = clock
+        self._buffer: List[Dict[str, Any]] = []
+        self._first_at: float | None = None
+        self.written = 0
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def emit(
+        self,
+        lead_id: Any,
+        event_type: str,
+        payload: Dict[str, Any] | None = None,
+        ts: datetime | None = None,
+        phone: str | None = None,
+    ) -> None:
+        payload = dict(payload or {})
+        validate_event(event_type, payload)
+        if self.compact:
+            payload = compact_payload(payload)
+
+        self._buffer.append(
+            {
+                "lead_id": str(lead_id) if lead_id else None,
+                "phone": phone,
+                "event_type": event_type,
+                "payload": payload,
+                "ts": ts,
+            }
+        )
+        if self._first_at is None:
+            self._first_at = self._clock()
+        if len(self._buffer) >= self.max_batch or self._clock() - self._first_at >= self.max_delay:
+            self.flush()
+
+    def emit_many(self, events: Iterable[Tuple[Any, str, Dict[str, Any]]]) -> None:
+        for lead_id, event_type, payload in events:
+            self.emit(lead_id, event_type, payload)
+
+    def _resolve_phones(self, cur) -> None:
+        phones = sorted({e["phone"] for e in self._buffer if not e["lead_id"] and e["phone"]})
+        if not phones:
+            return
+        # Most recent lead per phone, as the per-row subselects did before.
+        cur.execute(
+            """
+            SELECT DISTINCT ON (phone_normalized) phone_normalized, lead_id
+            FROM ek_leads
+            WHERE phone_normalized = ANY(%s)
+            ORDER BY phone_normalized, created_at DESC
+            """,
+            (phones,),
+        )
+        by_phone = {row[0]: str(row[1]) for row in cur.fetchall()}
+        for event in self._buffer:
+            if not event["lead_id"] and event["phone"]:
+                event["lead_id"] = by_phone.get(event["phone"])
+
+    def flush(self) -> int:
+        """Write buffered events in one multi-row INSERT; does not commit."""
+        if not self._buffer:
+            return 0
+        with self.conn.cursor() as cur:
+            self._resolve_phones(cur)
+            rows = [
+                (event["lead_id"], event["event_type"], Json(event["payload"]), event["ts"])
+                for event in self._buffer
+            ]
+            execute_values(cur, _INSERT_SQL, rows, template=_TEMPLATE, page_size=self.max_batch)
+        count = len(rows)
+        self._buffer.clear()
+        self._first_at = None
+        self.written += count
+        return count
+
+    def discard(self) -> None:
+        if self._buffer:
+            logger.warning("discarding %d unflushed lead events", len(self._buffer))
+        self._buffer.clear()
+        self._first_at = None
+
+    def __enter__(self) -> "EventEmitter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is None:
+            self.flush()
+        else:
+            self.discard()
+        return False
@@ -0,0 +1,72 @@
+"""Keyset-paginated listing of hot leads (score >= 70)."""
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any, Dict, List, Tuple
+
+from psycopg2.extras import RealDictCursor
+
+HOT_SCORE = 70
+MAX_PAGE_SIZE = 500
+
+# Served by idx_ek_leads_hot: ORDER BY matches the index and the keyset
+# predicate is a row comparison, so each page is a single index range scan.
+_HOT_LEADS_SQL = """
+    SELECT lead_id, name, phone, email, avatar, score, stage, created_at,
+           whatsapp_consent_ts, last_interaction_at, message_count
+    FROM ek_leads
+    WHERE score >= %(min_score)s
+      {after}
+    ORDER BY score DESC, lead_id DESC
+    LIMIT %(limit)s
+"""
+
+# Same partial predicate, so the total is an index-only scan of idx_ek_leads_hot.
+_COUNT_HOT_LEADS_SQL = "SELECT COUNT(*) FROM ek_leads WHERE score >= %(min_score)s"
+
+
+def encode_cursor(score: int, lead_id: Any) -> str:
+    raw = json.dumps([int(score), str(lead_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, lead_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return int(score), str(lead_id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("invalid_cursor") from exc
+
+
+def list_hot_leads(
+    conn,
+    limit: int = 50,
+    cursor: str | None = None,
+    min_score: int = HOT_SCORE,
+) -> Dict[str, Any]:
+    """One page of hot leads plus the cursor for the next one (None at the end)."""
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    params: Dict[str, Any] = {"min_score": max(int(min_score), HOT_SCORE), "limit": limit + 1}
+    after = ""
+    if cursor:
+        params["after_score"], params["after_id"] = decode_cursor(cursor)
+        after = "AND (score, lead_id) < (%(after_score)s, %(after_id)s::uuid)"
+
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(_HOT_LEADS_SQL.format(after=after), params)
+        rows: List[Dict[str, Any]] = cur.fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["score"], rows[-1]["lead_id"])
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+def count_hot_leads(conn, min_score: int = HOT_SCORE) -> int:
+    """Total hot leads across all pages."""
+    with conn.cursor() as cur:
+        cur.execute(_COUNT_HOT_LEADS_SQL, {"min_score": max(int(min_score), HOT_SCORE)})
+        return int(cur.fetchone()[0])
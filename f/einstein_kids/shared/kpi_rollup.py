@@ -0,0 +1,287 @@
+"""Maintain the ek_daily_kpis rollup incrementally and read it for reports."""
+from __future__ import annotations
+
+import logging
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = "ek_daily_kpis"
+DEFAULT_TENANT = os.getenv("EK_TENANT_ID", "einstein_kids")
+
+KPI_COLUMNS = (
+    "leads_new",
+    "messages_total",
+    "messages_outbound",
+    "messages_inbound",
+    "messages_delivered",
+    "messages_read",
+    "messages_failed",
+    "sales_count",
+    "sales_amount",
+    "event_registered",
+    "event_attended",
+    "event_partial",
+    "event_no_show",
+    "claims_total",
+    "claims_confirmed",
+    "claims_rejected",
+)
+
+
+def _kpi_select(start: str, end: str) -> str:
+    """Per-(day, avatar) KPIs over the half-open range [start, end).
+
+    ``start``/``end`` are SQL expressions (placeholders or scalar subqueries).
+    Each source is filtered on its own timestamp so every CTE is a range scan.
+    """
+    return """
+    WITH leads AS (
+        SELECT created_at::date AS day, COALESCE(avatar, 'unknown') AS avatar,
+               COUNT(*) AS leads_new
+        FROM ek_leads
+        WHERE created_at >= %(start)s AND created_at < %(end)s
+        GROUP BY 1, 2
+    ),
+    messages AS (
+        SELECT m.created_at::date AS day, COALESCE(l.avatar, 'unknown') AS avatar,
+               COUNT(*) AS messages_total,
+               COUNT(*) FILTER (WHERE m.direction = 'outbound') AS messages_outbound,
+               COUNT(*) FILTER (WHERE m.direction = 'inbound') AS messages_inbound,
+               COUNT(*) FILTER (WHERE m.status = 'delivered') AS messages_delivered,
+               COUNT(*) FILTER (WHERE m.status = 'read') AS messages_read,
+               COUNT(*) FILTER (WHERE m.status = 'failed') AS messages_failed
+        FROM ek_ycloud_messages m
+        LEFT JOIN ek_leads l ON l.lead_id = m.lead_id
+        WHERE m.created_at >= %(start)s AND m.created_at < %(end)s
+        GROUP BY 1, 2
+    ),
+    sales AS (
+        SELECT s.confirmed_at::date AS day, COALESCE(l.avatar, 'unknown') AS avatar,
+               COUNT(*) AS sales_count,
+               COALESCE(SUM(s.amount), 0) AS sales_amount
+        FROM ek_sales s
+        LEFT JOIN ek_leads l ON l.lead_id = s.lead_id
+        WHERE s.status = 'confirmed'
+          AND s.confirmed_at >= %(start)s AND s.confirmed_at < %(end)s
+        GROUP BY 1, 2
+    ),
+    claims AS (
+        SELECT s.created_at::date AS day, COALESCE(l.avatar, 'unknown') AS avatar,
+               COUNT(*) AS claims_total,
+               COUNT(*) FILTER (WHERE s.status = 'confirmed') AS claims_confirmed,
+               COUNT(*) FILTER (WHERE s.status = 'rejected') AS claims_rejected
+        FROM ek_sales s
+        LEFT JOIN ek_leads l ON l.lead_id = s.lead_id
+        WHERE s.created_at >= %(start)s AND s.created_at < %(end)s
+        GROUP BY 1, 2
+    ),
+    events AS (
+        SELECT event_start_at::date AS day, COALESCE(avatar, 'unknown') AS avatar,
+               COUNT(*) AS event_registered,
+               COUNT(*) FILTER (WHERE stage = 'EVENT_ATTENDED') AS event_attended,
+               COUNT(*) FILTER (WHERE stage = 'EVENT_PARTIAL') AS event_partial,
+               COUNT(*) FILTER (WHERE stage = 'EVENT_NO_SHOW') AS event_no_show
+        FROM ek_leads
+        WHERE event_start_at >= %(start)s AND event_start_at < %(end)s
+        GROUP BY 1, 2
+    )
+    SELECT day, avatar,
+           SUM(leads_new)::int AS leads_new,
+           SUM(messages_total)::int AS messages_total,
+           SUM(messages_outbound)::int AS messages_outbound,
+           SUM(messages_inbound)::int AS messages_inbound,
+           SUM(messages_delivered)::int AS messages_delivered,
+           SUM(messages_read)::int AS messages_read,
+           SUM(messages_failed)::int AS messages_failed,
+           SUM(sales_count)::int AS sales_count,
+           SUM(sales_amount) AS sales_amount,
+           SUM(event_registered)::int AS event_registered,
+           SUM(event_attended)::int AS event_attended,
+           SUM(event_partial)::int AS event_partial,
+           SUM(event_no_show)::int AS event_no_show,
+           SUM(claims_total)::int AS claims_total,
+           SUM(claims_confirmed)::int AS claims_confirmed,
+           SUM(claims_rejected)::int AS claims_rejected
+    FROM (
+        SELECT day, avatar, leads_new, 0 AS messages_total, 0 AS messages_outbound,
+               0 AS messages_inbound, 0 AS messages_delivered, 0 AS messages_read,
+               0 AS messages_failed, 0 AS sales_count, 0::numeric AS sales_amount,
+               0 AS event_registered, 0 AS event_attended, 0 AS event_partial,
+               0 AS event_no_show, 0 AS claims_total, 0 AS claims_confirmed, 0 AS claims_rejected
+        FROM leads
+        UNION ALL
+        SELECT day, avatar, 0, messages_total, messages_outbound, messages_inbound,
+               messages_delivered, messages_read, messages_failed, 0, 0, 0, 0, 0, 0, 0, 0, 0
+        FROM messages
+        UNION ALL
+        SELECT day, avatar, 0, 0, 0, 0, 0, 0, 0, sales_count, sales_amount, 0, 0, 0, 0, 0, 0, 0
+        FROM sales
+        UNION ALL
+        SELECT day, avatar, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+               claims_total, claims_confirmed, claims_rejected
+        FROM claims
+        UNION ALL
+        SELECT day, avatar, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+               event_registered, event_attended, event_partial, event_no_show, 0, 0, 0
+        FROM events
+    ) AS sources
+    GROUP BY day, avatar
+""".replace("%(start)s", start).replace("%(end)s", end)
+
+
+KPI_SELECT_SQL = _kpi_select("%(start)s", "%(end)s")
+
+# Rollup rows for settled days plus the live tail after the watermark, in a
+# single round trip. Days before the watermark date are settled.
+READ_KPIS_SQL = f"""
+    WITH bounds AS (
+        SELECT LEAST(
+                   %(end)s::date,
+                   GREATEST(%(start)s::date, COALESCE(
+                       (SELECT watermark::date FROM ek_rollup_watermarks WHERE name = %(watermark)s),
+                       %(start)s::date
+                   ))
+               ) AS settled
+    )
+    SELECT day, avatar, {", ".join(KPI_COLUMNS)}
+    FROM ek_daily_kpis
+    WHERE tenant_id = %(tenant_id)s
+      AND day >= %(start)s::date
+      AND day < (SELECT settled FROM bounds)
+    UNION ALL
+    SELECT * FROM ({_kpi_select("(SELECT settled FROM bounds)", "%(end)s::date")}) AS live
+"""
+
+
+def _empty_kpis() -> Dict[str, Any]:
+    return {column: 0 for column in KPI_COLUMNS}
+
+
+def _get_watermark(cur) -> datetime | None:
+    cur.execute("SELECT watermark FROM ek_rollup_watermarks WHERE name = %s", (WATERMARK_NAME,))
+    row = cur.fetchone()
+    return row["watermark"] if row else None
+
+
+def read_daily_kpis(
+    conn,
+    start_day: date,
+    end_day: date,
+    tenant_id: str = DEFAULT_TENANT,
+) -> Dict[date, Dict[str, Dict[str, Any]]]:
+    """KPIs per day and avatar for [start_day, end_day).
+
+    Days already settled come from ek_daily_kpis; the tail after the watermark
+    (usually just today) is computed live over the same half-open ranges.
+    """
+    result: Dict[date, Dict[str, Dict[str, Any]]] = {}
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(
+            READ_KPIS_SQL,
+            {"start": start_day, "end": end_day, "tenant_id": tenant_id, "watermark": WATERMARK_NAME},
+        )
+        rows: List[Dict[str, Any]] = cur.fetchall()
+
+    for row in rows:
+        result.setdefault(row["day"], {})[row["avatar"]] = {column: row[column] for column in KPI_COLUMNS}
+    return result
+
+
+def sum_kpis(per_avatar: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    total = _empty_kpis()
+    for values in per_avatar.values():
+        for column in KPI_COLUMNS:
+            total[column] += values.get(column) or 0
+    return total
+
+
+def refresh_rollup(
+    conn,
+    tenant_id: str = DEFAULT_TENANT,
+    lookback_days: int = 2,
+) -> Dict[str, Any]:
+    """Recompute the day buckets touched since the last watermark.
+
+    Status callbacks, confirmations and attendance arrive after the row was
+    created, so the window also reaches ``lookback_days`` before the previous
+    watermark. Buckets are replaced atomically (delete + insert) to stay exact.
+    """
+    started_at = datetime.now(timezone.utc)
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (WATERMARK_NAME,))
+        watermark = _get_watermark(cur)
+        if watermark is None:
+            cur.execute(
+                """
+                SELECT LEAST(
+                    (SELECT MIN(created_at) FROM ek_leads),
+                    (SELECT MIN(created_at) FROM ek_ycloud_messages),
+                    (SELECT MIN(created_at) FROM ek_sales)
+                ) AS first_ts
+                """
+            )
+            first_ts = cur.fetchone()["first_ts"]
+            start_day = first_ts.date() if first_ts else started_at.date()
+        else:
+            start_day = watermark.date() - timedelta(days=lookback_days)
+        end_day = started_at.date() + timedelta(days=1)
+
+        cur.execute(
+            "DELETE FROM ek_daily_kpis WHERE tenant_id = %s AND day >= %s AND day < %s",
+            (tenant_id, start_day, end_day),
+        )
+        cur.execute(
+            f"""
+            INSERT INTO ek_daily_kpis (tenant_id, day, avatar, {", ".join(KPI_COLUMNS)}, computed_at)
+            SELECT %(tenant_id)s, day, avatar, {", ".join(KPI_COLUMNS)}, NOW()
+            FROM ({KPI_SELECT_SQL}) AS kpis
+            """,
+            {"tenant_id": tenant_id, "start": start_day, "end": end_day},
+        )
+        buckets = cur.rowcount
+        cur.execute(
+            """
+            INSERT INTO ek_rollup_watermarks (name, watermark, updated_at)
+            VALUES (%s, %s, NOW())
+            ON CONFLICT (name) DO UPDATE SET watermark = EXCLUDED.watermark, updated_at = NOW()
+            """,
+            (WATERMARK_NAME, started_at),
+        )
+
+    return {
+        "from_day": start_day.isoformat(),
+        "to_day": (end_day - timedelta(days=1)).isoformat(),
+        "buckets": buckets,
+        "watermark": started_at.isoformat(),
+    }
+
+
+def main(
+    pg_resource: Dict[str, Any] | None = None,
+    tenant_id: str = DEFAULT_TENANT,
+    lookback_days: int = 2,
+) -> Dict[str, Any]:
+    if not pg_resource:
+        return {"ok": False, "error": "missing_pg_resource"}
+
+    conn = None
+    try:
+        conn = psycopg2.connect(**pg_resource)
+        result = refresh_rollup(conn, tenant_id=tenant_id, lookback_days=lookback_days)
+        conn.commit()
+        return {"ok": True, **result}
+    except Exception as exc:
+        if conn:
+            conn.rollback()
+        logger.exception("kpi_rollup failed")
+        return {"ok": False, "error": str(exc)}
+    finally:
+        if conn:
+            conn.close()
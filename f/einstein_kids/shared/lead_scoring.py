@@ -0,0 +1,456 @@
+"""Derive ek_leads.score and stage from ek_lead_events with the scoring.yaml rules.
+
+Score and stage are a deterministic fold over each lead's events in
+(ts, event_id) order. The incremental run continues from a stored cursor,
+starting every touched lead from its snapshot in ek_lead_score_state, and
+writes ek_leads only for leads whose score or stage actually changed, in one
+batched UPDATE per batch. When the rules file changes (its hash is the rules
+version) every lead is rebuilt from scratch, in parallel by lead hash shard;
+the same happens if a touched snapshot was computed with other rules.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+import psycopg2
+import yaml
+from psycopg2.extras import execute_values
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CURSOR_NAME = "ek_lead_scoring"
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../../resources/einstein_kids/scoring.yaml")
+DEFAULT_BATCH_SIZE = 5000
+# Events newer than this are left for the next run: ts is the writer's
+# transaction start, so a slow transaction can still commit slightly older ts.
+DEFAULT_SETTLE_SECONDS = 60
+
+
+@dataclass(frozen=True)
+class ScoringRules:
+    version: str
+    events: Dict[str, Dict[str, Any]]
+    min_score: int | None = 0
+    max_score: int | None = None
+    terminal_stages: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class LeadState:
+    score: int = 0
+    stage: str | None = None
+    event_count: int = 0
+    last_event_ts: datetime | None = None
+
+
+Event = Tuple[Any, str, Dict[str, Any], datetime]  # (lead_id, event_type, payload, ts)
+
+
+def load_rules(path: str = RULES_PATH) -> ScoringRules:
+    with open(path, "rb") as handle:
+        raw = handle.read()
+    data = yaml.safe_load(raw) or {}
+    return ScoringRules(
+        version=hashlib.sha256(raw).hexdigest()[:16],
+        events=data.get("events") or {},
+        min_score=data.get("min_score", 0),
+        max_score=data.get("max_score"),
+        terminal_stages=tuple(data.get("terminal_stages") or ()),
+    )
+
+
+def _number(value: Any) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _apply_rule(state: LeadState, rule: Dict[str, Any], payload: Dict[str, Any], rules: ScoringRules) -> LeadState:
+    score, stage = state.score, state.stage
+    if "set_score_from" in rule and payload.get(rule["set_score_from"]) is not None:
+        score = _number(payload[rule["set_score_from"]])
+    score += _number(rule.get("score", 0))
+    if "score_from" in rule:
+        score += _number(payload.get(rule["score_from"]))
+    if rules.min_score is not None:
+        score = max(score, rules.min_score)
+    if rules.max_score is not None:
+        score = min(score, rules.max_score)
+
+    new_stage = rule.get("stage") or (payload.get(rule["stage_from"]) if "stage_from" in rule else None)
+    if new_stage and stage not in rules.terminal_stages:
+        stage = new_stage
+    state = replace(state, score=score, stage=stage)
+
+    for field, cases in (rule.get("when") or {}).items():
+        value = payload.get(field)
+        sub_rule = cases.get(str(value)) if value is not None else None
+        if sub_rule is None:
+            sub_rule = cases.get("*")
+        if sub_rule:
+            state = _apply_rule(state, sub_rule, payload, rules)
+    return state
+
+
+def apply_event(state: LeadState, event_type: str, payload: Dict[str, Any], ts: datetime | None, rules: ScoringRules) -> LeadState:
+    """Next state for one event; event types without a rule leave the state as is."""
+    rule = rules.events.get(event_type)
+    if rule is None:
+        return state
+    state = _apply_rule(state, rule, payload or {}, rules)
+    return replace(state, event_count=state.event_count + 1, last_event_ts=ts or state.last_event_ts)
+
+
+def fold_events(states: Dict[str, LeadState], events: Iterable[Event], rules: ScoringRules) -> Dict[str, LeadState]:
+    """Apply ``events`` (already in (ts, event_id) order) on top of ``states``."""
+    folded = dict(states)
+    for lead_id, event_type, payload, ts in events:
+        key = str(lead_id)
+        folded[key] = apply_event(folded.get(key, LeadState()), event_type, payload, ts, rules)
+    return folded
+
+
+def changed_leads(before: Dict[str, LeadState], after: Dict[str, LeadState]) -> List[Tuple[str, int, str | None]]:
+    """(lead_id, score, stage) for leads whose score or stage differs from ``before``.
+
+    ``stage`` is None unless the stage itself changed, so a score-only change
+    never overwrites a stage set elsewhere on ek_leads.
+    """
+    changed = []
+    for lead_id in sorted(set(before) | set(after)):
+        old, new = before.get(lead_id, LeadState()), after.get(lead_id, LeadState())
+        if (old.score, old.stage) != (new.score, new.stage):
+            changed.append((lead_id, new.score, new.stage if new.stage != old.stage else None))
+    return changed
+
+
+# -- persistence -------------------------------------------------------------
+
+
+def _load_states(
+    cur, lead_ids: List[str] | None = None, shard: Tuple[int, int] | None = None
+) -> Tuple[Dict[str, LeadState], set[str | None]]:
+    """Snapshots plus the distinct rules versions they were computed with."""
+    if lead_ids is not None:
+        cur.execute(
+            """
+            SELECT lead_id::text, score, stage, event_count, last_event_ts, rules_version
+            FROM ek_lead_score_state
+            WHERE lead_id = ANY(%s::uuid[])
+            """,
+            (lead_ids,),
+        )
+    else:
+        cur.execute(
+            """
+            SELECT lead_id::text, score, stage, event_count, last_event_ts, rules_version
+            FROM ek_lead_score_state
+            WHERE (hashtext(lead_id::text) & 2147483647) %% %s = %s
+            """,
+            shard,
+        )
+    rows = cur.fetchall()
+    return {row[0]: LeadState(row[1], row[2], row[3], row[4]) for row in rows}, {row[5] for row in rows}
+
+
+def _write_states(cur, states: Dict[str, LeadState], changed: List[Tuple[str, int, str | None]], version: str) -> None:
+    if changed:
+        # The stage is only overwritten when the derived stage changed.
+        execute_values(
+            cur,
+            """
+            UPDATE ek_leads AS l
+            SET score = v.score,
+                stage = COALESCE(v.stage, l.stage),
+                updated_at = NOW()
+            FROM (VALUES %s) AS v(lead_id, score, stage)
+            WHERE l.lead_id = v.lead_id
+              AND (l.score IS DISTINCT FROM v.score OR (v.stage IS NOT NULL AND l.stage IS DISTINCT FROM v.stage))
+            """,
+            changed,
+            template="(%s::uuid, %s::integer, %s::text)",
+            page_size=1000,
+        )
+    if states:
+        execute_values(
+            cur,
+            """
+            INSERT INTO ek_lead_score_state (lead_id, score, stage, event_count, last_event_ts, rules_version, updated_at)
+            VALUES %s
+            ON CONFLICT (lead_id) DO UPDATE
+            SET score = EXCLUDED.score,
+                stage = EXCLUDED.stage,
+                event_count = EXCLUDED.event_count,
+                last_event_ts = EXCLUDED.last_event_ts,
+                rules_version = EXCLUDED.rules_version,
+                updated_at = NOW()
+            """,
+            [(lead_id, s.score, s.stage, s.event_count, s.last_event_ts, version) for lead_id, s in states.items()],
+            template="(%s::uuid, %s, %s, %s, %s, %s, NOW())",
+            page_size=1000,
+        )
+
+
+def _get_cursor(cur) -> Tuple[datetime | None, str | None, str | None] | None:
+    cur.execute(
+        "SELECT last_ts, last_event_id::text, rules_version FROM ek_scoring_cursor WHERE name = %s",
+        (CURSOR_NAME,),
+    )
+    return cur.fetchone()
+
+
+def _set_cursor(cur, last_ts: datetime | None, last_event_id: str | None, version: str) -> None:
+    cur.execute(
+        """
+        INSERT INTO ek_scoring_cursor (name, last_ts, last_event_id, rules_version, updated_at)
+        VALUES (%s, %s, %s, %s, NOW())
+        ON CONFLICT (name) DO UPDATE
+        SET last_ts = EXCLUDED.last_ts,
+            last_event_id = EXCLUDED.last_event_id,
+            rules_version = EXCLUDED.rules_version,
+            updated_at = NOW()
+        """,
+        (CURSOR_NAME, last_ts, last_event_id, version),
+    )
+
+
+def _settle_before(settle_seconds: int) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(seconds=settle_seconds)
+
+
+# -- incremental -------------------------------------------------------------
+
+
+def run_incremental(
+    conn,
+    rules: ScoringRules,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    settle_seconds: int = DEFAULT_SETTLE_SECONDS,
+) -> Dict[str, Any]:
+    """Apply events after the stored cursor, one committed batch at a time."""
+    settle_before = _settle_before(settle_seconds)
+    processed = updated = batches = 0
+    while True:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_xact_lock(hashtext(%s))", (CURSOR_NAME,))
+            if not cur.fetchone()[0]:
+                conn.rollback()
+                return {"mode": "incremental", "busy": True, "events": processed, "leads_updated": updated}
+
+            position = _get_cursor(cur)
+            if position is None or position[2] != rules.version:
+                conn.rollback()
+                return {"mode": "incremental", "rebuild_required": True, "events": processed, "leads_updated": updated}
+            last_ts, last_event_id, _ = position
+
+            cur.execute(
+                """
+                SELECT event_id::text, lead_id::text, event_type, payload, ts
+                FROM ek_lead_events
+                WHERE (%(last_ts)s::timestamptz IS NULL
+                       OR (ts, event_id) > (%(last_ts)s::timestamptz, %(last_id)s::uuid))
+                  AND ts < %(settle_before)s
+                  AND event_type = ANY(%(event_types)s)
+                ORDER BY ts, event_id
+                LIMIT %(limit)s
+                """,
+                {
+                    "last_ts": last_ts,
+                    "last_id": last_event_id,
+                    "settle_before": settle_before,
+                    "event_types": sorted(rules.events),
+                    "limit": batch_size,
+                },
+            )
+            rows = cur.fetchall()
+            if not rows:
+                conn.rollback()
+                break
+
+            events = [(lead_id, event_type, payload, ts) for _, lead_id, event_type, payload, ts in rows if lead_id]
+            lead_ids = sorted({event[0] for event in events})
+            before, versions = _load_states(cur, lead_ids=lead_ids)
+            if versions - {rules.version}:
+                # A snapshot from other rules would silently mix two scorings.
+                conn.rollback()
+                return {
+                    "mode": "incremental",
+                    "rebuild_required": True,
+                    "stale_states": True,
+                    "events": processed,
+                    "leads_updated": updated,
+                }
+            after = fold_events(before, events, rules)
+            touched = {lead_id: after[lead_id] for lead_id in lead_ids}
+            changed = changed_leads({k: before.get(k, LeadState()) for k in lead_ids}, touched)
+
+            _write_states(cur, touched, changed, rules.version)
+            _set_cursor(cur, rows[-1][4], rows[-1][0], rules.version)
+        conn.commit()
+
+        processed += len(rows)
+        updated += len(changed)
+        batches += 1
+        if len(rows) < batch_size:
+            break
+
+    return {"mode": "incremental", "events": processed, "leads_updated": updated, "batches": batches}
+
+
+# -- full rebuild ------------------------------------------------------------
+
+
+def _rebuild_shard(
+    connect: Callable[[], Any],
+    rules: ScoringRules,
+    shard: int,
+    shards: int,
+    upto: Tuple[datetime, str] | None,
+) -> Dict[str, int]:
+    conn = connect()
+    try:
+        with conn.cursor() as cur:
+            before, _ = _load_states(cur, shard=(shards, shard))
+            cur.execute(
+                "DELETE FROM ek_lead_score_state WHERE (hashtext(lead_id::text) & 2147483647) %% %s = %s",
+                (shards, shard),
+            )
+
+        after: Dict[str, LeadState] = {}
+        if upto is not None:
+            # Server-side cursor: the shard's events are streamed, not loaded at once.
+            with conn.cursor(name=f"ek_scoring_rebuild_{shard}") as events_cur:
+                events_cur.itersize = DEFAULT_BATCH_SIZE
+                events_cur.execute(
+                    """
+                    SELECT lead_id::text, event_type, payload, ts
+                    FROM ek_lead_events
+                    WHERE lead_id IS NOT NULL
+                      AND (hashtext(lead_id::text) & 2147483647) %% %(shards)s = %(shard)s
+                      AND (ts, event_id) <= (%(upto_ts)s::timestamptz, %(upto_id)s::uuid)
+                      AND event_type = ANY(%(event_types)s)
+                    ORDER BY lead_id, ts, event_id
+                    """,
+                    {
+                        "shards": shards,
+                        "shard": shard,
+                        "upto_ts": upto[0],
+                        "upto_id": upto[1],
+                        "event_types": sorted(rules.events),
+                    },
+                )
+                after = fold_events({}, events_cur, rules)
+
+        changed = changed_leads(before, after)
+        with conn.cursor() as cur:
+            _write_states(cur, after, changed, rules.version)
+        conn.commit()
+        return {"leads": len(after), "leads_updated": len(changed)}
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def rebuild(
+    connect: Callable[[], Any],
+    rules: ScoringRules,
+    shards: int = 4,
+    settle_seconds: int = DEFAULT_SETTLE_SECONDS,
+) -> Dict[str, Any]:
+    """Recompute every lead from the full event log, ``shards`` workers in parallel.
+
+    A session advisory lock keeps incremental runs out until the cursor is
+    moved to the rebuild boundary with the new rules version.
+    """
+    coordinator = connect()
+    try:
+        with coordinator.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (CURSOR_NAME,))
+            if not cur.fetchone()[0]:
+                coordinator.rollback()
+                return {"mode": "rebuild", "busy": True}
+            cur.execute(
+                """
+                SELECT ts, event_id::text
+                FROM ek_lead_events
+                WHERE ts < %s
+                ORDER BY ts DESC, event_id DESC
+                LIMIT 1
+                """,
+                (_settle_before(settle_seconds),),
+            )
+            upto = cur.fetchone()
+        coordinator.commit()
+
+        try:
+            with ThreadPoolExecutor(max_workers=shards, thread_name_prefix="ek-scoring") as executor:
+                results = list(executor.map(lambda k: _rebuild_shard(connect, rules, k, shards, upto), range(shards)))
+
+            with coordinator.cursor() as cur:
+                _set_cursor(cur, upto[0] if upto else None, upto[1] if upto else None, rules.version)
+            coordinator.commit()
+        finally:
+            with coordinator.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(hashtext(%s))", (CURSOR_NAME,))
+            coordinator.commit()
+    finally:
+        coordinator.close()
+
+    return {
+        "mode": "rebuild",
+        "shards": shards,
+        "leads": sum(r["leads"] for r in results),
+        "leads_updated": sum(r["leads_updated"] for r in results),
+        "cursor": upto[0].isoformat() if upto else None,
+    }
+
+
+def run(
+    connect: Callable[[], Any],
+    rules: ScoringRules | None = None,
+    force_rebuild: bool = False,
+    shards: int = 4,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """Incremental run, falling back to a full rebuild on first run or new rules."""
+    rules = rules or load_rules()
+    if not force_rebuild:
+        conn = connect()
+        try:
+            result = run_incremental(conn, rules, batch_size=batch_size)
+        finally:
+            conn.close()
+        if not result.get("rebuild_required"):
+            return {**result, "rules_version": rules.version}
+    return {**rebuild(connect, rules, shards=shards), "rules_version": rules.version}
+
+
+def main(
+    pg_resource: Dict[str, Any] | None = None,
+    rebuild_all: bool = False,
+    shards: int = 4,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    if not pg_resource:
+        return {"ok": False, "error": "missing_pg_resource"}
+    try:
+        result = run(
+            lambda: psycopg2.connect(**pg_resource),
+            force_rebuild=rebuild_all,
+            shards=max(1, int(shards)),
+            batch_size=batch_size,
+        )
+        return {"ok": not result.get("busy"), **result}
+    except Exception as exc:
+        logger.exception("lead_scoring failed")
+        return {"ok": False, "error": str(exc)}
@@ -0,0 +1,107 @@
+"""Per-lead timeline reader backed by the ek_lead_timeline projection.
+
+The projection (migration 0016) is kept current by statement-level triggers
+on ek_lead_events, ek_ycloud_messages, ek_sales and ek_jobs. Reading the last
+N items is one query on the (lead_id, month) primary key that returns only the
+newest months needed to cover N.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import psycopg2
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAX_ITEMS = 500
+
+# Months newest first, stopping at the first month that completes ``limit``.
+_TIMELINE_SQL = """
+    SELECT month, items
+    FROM (
+        SELECT month,
+               items,
+               SUM(item_count) OVER (ORDER BY month DESC) - item_count AS newer
+        FROM ek_lead_timeline
+        WHERE lead_id = %(lead_id)s
+          {before}
+    ) t
+    WHERE newer < %(limit)s
+    ORDER BY month DESC
+"""
+
+
+def _parse_ts(value: Any) -> datetime:
+    ts = value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def get_lead_timeline(conn, lead_id: str, limit: int = 50, before: str | None = None) -> List[Dict[str, Any]]:
+    """Last ``limit`` timeline items for a lead, newest first.
+
+    ``before`` (an item ``ts``) pages further back: only older items are returned.
+    """
+    limit = max(1, min(int(limit), MAX_ITEMS))
+    params: Dict[str, Any] = {"lead_id": lead_id, "limit": limit}
+    before_sql = ""
+    before_ts = None
+    if before:
+        before_ts = _parse_ts(before)
+        params["before"] = before_ts
+        # The newest month returned may hold up to MAX_ITEMS items at or after ``before``.
+        params["limit"] = limit + MAX_ITEMS
+        before_sql = "AND month <= date_trunc('month', %(before)s::timestamptz AT TIME ZONE 'UTC')::date"
+
+    items: List[Dict[str, Any]] = []
+    with conn.cursor() as cur:
+        cur.execute(_TIMELINE_SQL.format(before=before_sql), params)
+        for _month, month_items in cur.fetchall():
+            for item in reversed(month_items or []):
+                if before_ts and _parse_ts(item["ts"]) >= before_ts:
+                    continue
+                items.append(item)
+                if len(items) >= limit:
+                    return items
+    return items
+
+
+def rebuild_lead_timeline(conn, lead_id: str | None = None) -> int:
+    """Rebuild the projection from the source tables (one lead, or all when None)."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT ek_rebuild_lead_timeline(%s::uuid)", (lead_id,))
+        rebuilt = cur.fetchone()[0]
+    conn.commit()
+    return int(rebuilt or 0)
+
+
+def main(
+    lead_id: str | None = None,
+    limit: int = 50,
+    before: str | None = None,
+    rebuild: bool = False,
+    pg_resource: Dict[str, Any] | None = None,
+) -> Dict[str, Any]:
+    if not pg_resource:
+        return {"ok": False, "error": "missing_pg_resource"}
+    if not lead_id and not rebuild:
+        return {"ok": False, "error": "missing_lead_id"}
+
+    conn = None
+    try:
+        conn = psycopg2.connect(**pg_resource)
+        if rebuild:
+            return {"ok": True, "lead_id": lead_id, "rebuilt_months": rebuild_lead_timeline(conn, lead_id)}
+        items = get_lead_timeline(conn, lead_id, limit=limit, before=before)
+        conn.rollback()
+        return {"ok": True, "lead_id": lead_id, "items": items}
+    except Exception as exc:
+        if conn:
+            conn.rollback()
+        logger.exception("lead_timeline failed")
+        return {"ok": False, "error": str(exc)}
+    finally:
+        if conn:
+            conn.close()
@@ -0,0 +1,70 @@
+"""Create upcoming monthly partitions and detach expired ones."""
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict
+
+import psycopg2
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# parent table -> months kept attached (None = keep everything)
+# ek_lead_events is the source of truth for lead_scoring and lead_timeline full
+# rebuilds, so it is never detached (ek_detach_old_partitions refuses it too).
+# Timeline rebuilds only see messages still within their retention.
+RETENTION_MONTHS: Dict[str, int | None] = {
+    "ek_lead_events": None,
+    "ek_ycloud_messages": 24,
+}
+
+
+def main(
+    pg_resource: Dict[str, Any] | None = None,
+    months_ahead: int = 3,
+    apply_retention: bool = True,
+    drop_detached: bool = False,
+) -> Dict[str, Any]:
+    if not pg_resource:
+        return {"ok": False, "error": "missing_pg_resource"}
+
+    conn = None
+    result: Dict[str, Any] = {"created": {}, "detached": {}}
+    try:
+        conn = psycopg2.connect(**pg_resource)
+        with conn.cursor() as cur:
+            for parent, keep_months in RETENTION_MONTHS.items():
+                cur.execute("SELECT ek_ensure_monthly_partitions(%s, NULL, %s)", (parent, months_ahead))
+                result["created"][parent] = cur.fetchone()[0]
+
+                if not apply_retention or keep_months is None:
+                    continue
+                cur.execute(
+                    "SELECT ek_detach_old_partitions(%s, %s, %s)",
+                    (parent, keep_months, drop_detached),
+                )
+                result["detached"][parent] = [row[0] for row in cur.fetchall()]
+
+            keep_messages = RETENTION_MONTHS["ek_ycloud_messages"]
+            if apply_retention and keep_messages is not None:
+                # Dedupe keys only need to outlive the messages they point to.
+                cur.execute(
+                    """
+                    DELETE FROM ek_ycloud_message_keys
+                    WHERE created_at < date_trunc('month', NOW() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+                                       - make_interval(months => %s)
+                    """,
+                    (keep_messages,),
+                )
+                result["expired_message_keys"] = cur.rowcount
+
+        conn.commit()
+        return {"ok": True, **result}
+    except Exception as exc:
+        if conn:
+            conn.rollback()
+        logger.exception("partition_maintenance failed")
+        return {"ok": False, "error": str(exc)}
+    finally:
+        if conn:
+            conn.close()
@@ -7,6 +7,8 @@ from typing import Any, Dict
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+from .event_log import EventEmitter
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,7 +41,7 @@ def main(
         external_ref = (proof or {}).get("external_ref")
 
         conn = psycopg2.connect(**pg_resource)
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        with EventEmitter(conn) as events, conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute("SELECT 1 FROM ek_leads WHERE lead_id = %s", (lead_id,))
             if not cur.fetchone():
                 return {"ok": False, "error": "lead_not_found"}
@@ -54,27 +56,15 @@ def main(
             )
             sale = cur.fetchone()
 
-            cur.execute(
-                """
-                INSERT INTO ek_lead_events (lead_id, event_type, payload)
-                VALUES (%s, 'payment_claim_created', %s::jsonb)
-                """,
-                (
-                    lead_id,
-                    psycopg2.extras.Json(
-                        {
-                            "sale_id": str(sale["sale_id"]),
-                            "amount": amount,
-                            "currency": currency,
-                            "external_ref": external_ref,
-                        }
-                    ),
-                ),
-            )
-
-            cur.execute(
-                "UPDATE ek_leads SET score = score + 30, updated_at = NOW() WHERE lead_id = %s",
-                (lead_id,),
+            events.emit(
+                lead_id,
+                "payment_claim_created",
+                {
+                    "sale_id": str(sale["sale_id"]),
+                    "amount": amount,
+                    "currency": currency,
+                    "external_ref": external_ref,
+                },
             )
 
         conn.commit()
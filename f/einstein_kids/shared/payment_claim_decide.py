@@ -7,6 +7,8 @@ from typing import Any, Dict
 import psycopg2
 from psycopg2.extras import Json, RealDictCursor
 
+from .event_log import EventEmitter
+
 logger = logging.getLogger(__name__)
 
 
@@ -30,7 +32,7 @@ def main(
     conn = None
     try:
         conn = psycopg2.connect(**pg_resource)
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        with EventEmitter(conn) as events, conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute(
                 "SELECT sale_id, lead_id, status FROM ek_sales WHERE sale_id = %s FOR UPDATE",
                 (sale_id,),
@@ -62,7 +64,7 @@ def main(
                 cur.execute(
                     """
                     UPDATE ek_leads
-                    SET stage = 'CUSTOMER', score = score + 100, updated_at = NOW()
+                    SET stage = 'CUSTOMER', updated_at = NOW()
                     WHERE lead_id = %s
                     """,
                     (sale["lead_id"],),
@@ -75,33 +77,17 @@ def main(
                     """,
                     (sale["lead_id"],),
                 )
-            else:
-                cur.execute(
-                    """
-                    UPDATE ek_leads
-                    SET score = GREATEST(score - 20, 0), updated_at = NOW()
-                    WHERE lead_id = %s
-                    """,
-                    (sale["lead_id"],),
-                )
 
-            cur.execute(
-                """
-                INSERT INTO ek_lead_events (lead_id, event_type, payload)
-                VALUES (%s, 'payment_claim_decided', %s::jsonb)
-                """,
-                (
-                    sale["lead_id"],
-                    Json(
-                        {
-                            "sale_id": sale_id,
-                            "decision": action_norm,
-                            "status": new_status,
-                            "actor": actor,
-                            "reason": reason,
-                        }
-                    ),
-                ),
+            events.emit(
+                sale["lead_id"],
+                "payment_claim_decided",
+                {
+                    "sale_id": sale_id,
+                    "decision": action_norm,
+                    "status": new_status,
+                    "actor": actor,
+                    "reason": reason,
+                },
             )
 
         conn.commit()
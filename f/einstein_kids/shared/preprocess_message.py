@@ -4,12 +4,13 @@ Detecta intenci??n, escala si es necesario, y prepara para AI
 """
 
 import re
-import json
 from datetime import datetime
 from typing import Dict, Any, List
 import psycopg2
 import os
 
+from .event_log import EventEmitter
+
 class MessagePreprocessor:
     """Pre-procesa mensajes antes de enviar a AI"""
     
@@ -460,26 +461,18 @@ class MessagePreprocessor:
     def log_preprocessing(self, result: Dict[str, Any]):
         """Registra el pre-procesamiento"""
         
-        cursor = self.db_connection.cursor()
-        
-        cursor.execute("""
-            INSERT INTO ek_lead_events (lead_id, event_type, payload)
-            VALUES (
-                (SELECT lead_id FROM ek_leads WHERE phone_normalized = %s ORDER BY created_at DESC LIMIT 1),
-                'message_preprocessed',
-                %s
-            );
-        """, (result["phone"], json.dumps({
-            "direction": "inbound",
-            "preprocessing_result": {
-                "intent": result["intent"],
-                "escalation": result["escalation"],
-                "route": result["route"],
-                "confidence": result["confidence"],
-                "interaction_type": result["interaction_type"]
-            },
-            "timestamp": result["timestamp"]
-        })))
+        with EventEmitter(self.db_connection) as events:
+            events.emit(None, "message_preprocessed", {
+                "direction": "inbound",
+                "preprocessing_result": {
+                    "intent": result["intent"],
+                    "escalation": result["escalation"],
+                    "route": result["route"],
+                    "confidence": result["confidence"],
+                    "interaction_type": result["interaction_type"]
+                },
+                "timestamp": result["timestamp"]
+            }, phone=result["phone"])
         
         self.db_connection.commit()
     
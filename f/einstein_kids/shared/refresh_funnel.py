@@ -0,0 +1,86 @@
+"""Refresh and read the ek_funnel_daily materialized view."""
+from __future__ import annotations
+
+import logging
+from datetime import date
+from typing import Any, Dict
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FUNNEL_VIEW = "ek_funnel_daily"
+
+
+def refresh_funnel_view(conn) -> bool:
+    """REFRESH ... CONCURRENTLY so readers are never blocked.
+
+    Runs in autocommit; an advisory lock makes overlapping triggers (schedule +
+    compute_attendance) skip instead of queueing a second full refresh.
+    Returns False when another refresh was already running.
+    """
+    previous_autocommit = conn.autocommit
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (FUNNEL_VIEW,))
+            if not cur.fetchone()[0]:
+                return False
+            try:
+                cur.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {FUNNEL_VIEW}")
+            finally:
+                cur.execute("SELECT pg_advisory_unlock(hashtext(%s))", (FUNNEL_VIEW,))
+        return True
+    finally:
+        conn.autocommit = previous_autocommit
+
+
+def read_funnel(conn, start_day: date, end_day: date) -> Dict[str, Any]:
+    """Funnel for leads created in [start_day, end_day), summed from daily buckets."""
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(
+            f"""
+            SELECT avatar, stage,
+                   SUM(leads)::int AS leads,
+                   SUM(converted_leads)::int AS converted_leads,
+                   SUM(sales)::int AS sales,
+                   SUM(sales_amount) AS sales_amount
+            FROM {FUNNEL_VIEW}
+            WHERE cohort_day >= %s AND cohort_day < %s
+            GROUP BY avatar, stage
+            """,
+            (start_day, end_day),
+        )
+        rows = cur.fetchall()
+
+    stages: Dict[str, int] = {}
+    avatars: Dict[str, Dict[str, Any]] = {}
+    total = {"leads": 0, "sales": 0, "sales_amount": 0}
+    for row in rows:
+        stages[row["stage"]] = stages.get(row["stage"], 0) + row["leads"]
+        bucket = avatars.setdefault(row["avatar"], {"leads": 0, "sales": 0})
+        bucket["leads"] += row["leads"]
+        bucket["sales"] += row["sales"]
+        total["leads"] += row["leads"]
+        total["sales"] += row["sales"]
+        total["sales_amount"] += row["sales_amount"] or 0
+    return {"stages": stages, "avatars": avatars, "total": total}
+
+
+def main(pg_resource: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    if not pg_resource:
+        return {"ok": False, "error": "missing_pg_resource"}
+
+    conn = None
+    try:
+        conn = psycopg2.connect(**pg_resource)
+        refreshed = refresh_funnel_view(conn)
+        return {"ok": True, "refreshed": refreshed, "view": FUNNEL_VIEW}
+    except Exception as exc:
+        logger.exception("refresh_funnel failed")
+        return {"ok": False, "error": str(exc)}
+    finally:
+        if conn:
+            conn.close()
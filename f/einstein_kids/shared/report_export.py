@@ -0,0 +1,295 @@
+"""Streamed CSV/Parquet export of lead, message and sale detail for a date range.
+
+Rows come from a server-side (named) cursor fetched ``itersize`` at a time and
+are written out as they arrive: CSV in bounded chunks, Parquet in fixed-size
+row groups. Memory stays constant regardless of the range exported.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import logging
+import os
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import psycopg2
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_ITERSIZE = 5000
+DEFAULT_ROW_GROUP_SIZE = 50_000
+CSV_CHUNK_BYTES = 64 * 1024
+FORMATS = ("csv", "parquet")
+
+# dataset -> (query over [%(start)s, %(end)s), [(column, type)])
+# Types are the Parquet logical types used when pyarrow is available.
+DATASETS: Dict[str, Tuple[str, List[Tuple[str, str]]]] = {
+    "leads": (
+        """
+        SELECT lead_id::text, avatar, name, email, phone_normalized, stage, score,
+               utm_source, utm_campaign, event_start_at, created_at
+        FROM ek_leads
+        WHERE created_at >= %(start)s AND created_at < %(end)s
+        ORDER BY created_at, lead_id
+        """,
+        [
+            ("lead_id", "string"),
+            ("avatar", "string"),
+            ("name", "string"),
+            ("email", "string"),
+            ("phone", "string"),
+            ("stage", "string"),
+            ("score", "int32"),
+            ("utm_source", "string"),
+            ("utm_campaign", "string"),
+            ("event_start_at", "timestamp"),
+            ("created_at", "timestamp"),
+        ],
+    ),
+    "messages": (
+        """
+        SELECT m.id::text, m.lead_id::text, l.avatar, m.direction, m.message_type,
+               m.template_key, m.status, m.created_at, m.delivered_at, m.read_at
+        FROM ek_ycloud_messages m
+        LEFT JOIN ek_leads l ON l.lead_id = m.lead_id
+        WHERE m.created_at >= %(start)s AND m.created_at < %(end)s
+        ORDER BY m.created_at, m.id
+        """,
+        [
+            ("message_id", "string"),
+            ("lead_id", "string"),
+            ("avatar", "string"),
+            ("direction", "string"),
+            ("message_type", "string"),
+            ("template_key", "string"),
+            ("status", "string"),
+            ("created_at", "timestamp"),
+            ("delivered_at", "timestamp"),
+            ("read_at", "timestamp"),
+        ],
+    ),
+    "sales": (
+        """
+        SELECT s.sale_id::text, s.lead_id::text, l.avatar, s.status, s.amount, s.currency,
+               s.created_at, s.confirmed_at
+        FROM ek_sales s
+        LEFT JOIN ek_leads l ON l.lead_id = s.lead_id
+        WHERE s.created_at >= %(start)s AND s.created_at < %(end)s
+        ORDER BY s.created_at, s.sale_id
+        """,
+        [
+            ("sale_id", "string"),
+            ("lead_id", "string"),
+            ("avatar", "string"),
+            ("status", "string"),
+            ("amount", "decimal"),
+            ("currency", "string"),
+            ("created_at", "timestamp"),
+            ("confirmed_at", "timestamp"),
+        ],
+    ),
+}
+
+
+def _dataset(name: str) -> Tuple[str, List[Tuple[str, str]]]:
+    if name not in DATASETS:
+        raise ValueError(f"unknown_dataset: {name}")
+    return DATASETS[name]
+
+
+def columns(dataset: str) -> List[str]:
+    return [name for name, _ in _dataset(dataset)[1]]
+
+
+def iter_rows(
+    conn,
+    dataset: str,
+    start: date | datetime,
+    end: date | datetime,
+    itersize: int = DEFAULT_ITERSIZE,
+) -> Iterator[tuple]:
+    """Yield rows from a named cursor; only ``itersize`` rows are held client-side."""
+    query, _ = _dataset(dataset)
+    with conn.cursor(name=f"ek_export_{dataset}_{uuid.uuid4().hex[:12]}") as cur:
+        cur.itersize = itersize
+        cur.execute(query, {"start": start, "end": end})
+        yield from cur
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(rows: Iterable[Sequence[Any]], header: Sequence[str], chunk_bytes: int = CSV_CHUNK_BYTES) -> Iterator[bytes]:
+    """Encode rows as CSV, yielding ~``chunk_bytes`` chunks (header first)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        if buffer.tell() >= chunk_bytes:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet as pq
+    except ImportError as exc:  # optional dependency
+        raise RuntimeError("parquet_export_requires_pyarrow") from exc
+    return pyarrow, pq
+
+
+def _arrow_schema(pa, spec: List[Tuple[str, str]]):
+    types = {
+        "string": pa.string(),
+        "int32": pa.int32(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+        "decimal": pa.decimal128(14, 2),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in spec])
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain."""
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer.extend(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def _batches(rows: Iterable[Sequence[Any]], size: int) -> Iterator[List[Sequence[Any]]]:
+    batch: List[Sequence[Any]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_parquet(
+    rows: Iterable[Sequence[Any]],
+    dataset: str,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+) -> Iterator[bytes]:
+    """Encode rows as Parquet, one fixed-size row group at a time."""
+    pa, pq = _require_pyarrow()
+    spec = _dataset(dataset)[1]
+    schema = _arrow_schema(pa, spec)
+    names = [name for name, _ in spec]
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for batch in _batches(rows, row_group_size):
+            table = pa.Table.from_pydict(
+                {name: [row[i] for row in batch] for i, name in enumerate(names)},
+                schema=schema,
+            )
+            writer.write_table(table, row_group_size=row_group_size)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    tail = sink.drain()
+    if tail:
+        yield tail
+
+
+def stream_export(
+    conn,
+    dataset: str,
+    start: date | datetime,
+    end: date | datetime,
+    fmt: str = "csv",
+    itersize: int = DEFAULT_ITERSIZE,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+) -> Iterator[bytes]:
+    """Byte chunks for an HTTP chunked response (e.g. a StreamingResponse)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"unsupported_format: {fmt}")
+    rows = iter_rows(conn, dataset, start, end, itersize=itersize)
+    if fmt == "csv":
+        return iter_csv(rows, columns(dataset))
+    return iter_parquet(rows, dataset, row_group_size=row_group_size)
+
+
+def export_to_file(
+    conn,
+    dataset: str,
+    start: date | datetime,
+    end: date | datetime,
+    path: str,
+    fmt: str | None = None,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """Write the export to ``path`` (format from the extension unless given)."""
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower() or "csv"
+    written = 0
+    tmp_path = f"{path}.partial"
+    try:
+        with open(tmp_path, "wb") as handle:
+            for chunk in stream_export(conn, dataset, start, end, fmt=fmt, **kwargs):
+                handle.write(chunk)
+                written += len(chunk)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    return {"dataset": dataset, "format": fmt, "path": path, "bytes": written}
+
+
+def main(
+    dataset: str,
+    start: str,
+    end: str,
+    path: str,
+    fmt: str | None = None,
+    pg_resource: Dict[str, Any] | None = None,
+) -> Dict[str, Any]:
+    if not pg_resource:
+        return {"ok": False, "error": "missing_pg_resource"}
+
+    conn = None
+    try:
+        conn = psycopg2.connect(**pg_resource)
+        # ``end`` is inclusive for callers; queries use [start, end + 1 day).
+        end_day = date.fromisoformat(end) + timedelta(days=1)
+        result = export_to_file(conn, dataset, date.fromisoformat(start), end_day, path, fmt=fmt)
+        conn.rollback()
+        return {"ok": True, **result}
+    except Exception as exc:
+        logger.exception("report_export failed")
+        return {"ok": False, "error": str(exc)}
+    finally:
+        if conn:
+            conn.close()
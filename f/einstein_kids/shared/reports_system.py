@@ -1,14 +1,19 @@
 """
 Sistema de Reportes y Conversiones para Einstein Kids
-Genera reportes diarios, KPIs y m??tricas de conversi??n
+Genera reportes diarios, KPIs y métricas de conversión
 """
 
 import psycopg2
 import json
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Dict, List, Any
 import os
 
+from .kpi_rollup import read_daily_kpis, sum_kpis
+from .hot_leads import count_hot_leads, list_hot_leads
+from .refresh_funnel import read_funnel
+from .report_export import export_to_file
+
 class EinsteinKidsReports:
     """Sistema completo de reportes para Cyn"""
     
@@ -24,72 +29,42 @@ class EinsteinKidsReports:
     def generate_daily_report(self, date: datetime = None) -> Dict[str, Any]:
         """Genera reporte diario completo"""
         if date is None:
-            date = datetime.now().date()
-        
-        cursor = self.conn.cursor()
-        
-        # Leads nuevos del d??a
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as leads_nuevos,
-                COUNT(CASE WHEN avatar = 'mother' THEN 1 END) as moms,
-                COUNT(CASE WHEN avatar = 'therapist' THEN 1 END) as therapists
-            FROM ek_leads 
-            WHERE DATE(created_at) = %s;
-        """, (date,))
-        
-        leads_data = cursor.fetchone()
-        
-        # Mensajes enviados
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as total_mensajes,
-                COUNT(CASE WHEN direction = 'outbound' THEN 1 END) as enviados,
-                COUNT(CASE WHEN direction = 'inbound' THEN 1 END) as recibidos,
-                COUNT(CASE WHEN status = 'delivered' THEN 1 END) as entregados,
-                COUNT(CASE WHEN status = 'read' THEN 1 END) as leidos
-            FROM ek_ycloud_messages 
-            WHERE DATE(created_at) = %s;
-        """, (date,))
-        
-        mensajes_data = cursor.fetchone()
-        
-        # Ventas del d??a
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as ventas,
-                COALESCE(SUM(amount), 0) as monto_total,
-                AVG(amount) as promedio_venta
-            FROM ek_sales 
-            WHERE DATE(confirmed_at) = %s 
-            AND status = 'confirmed';
-        """, (date,))
-        
-        ventas_data = cursor.fetchone()
-        
-        # Eventos del d??a
-        cursor.execute("""
-            SELECT 
-                COUNT(DISTINCT DATE(event_start_at)) as eventos,
-                COUNT(CASE WHEN stage = 'EVENT_ATTENDED' THEN 1 END) as asistieron,
-                COUNT(CASE WHEN stage = 'EVENT_NO_SHOW' THEN 1 END) as no_show
-            FROM ek_leads 
-            WHERE DATE(event_start_at) = %s;
-        """, (date,))
-        
-        eventos_data = cursor.fetchone()
-        
-        # Claims procesados
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as total_claims,
-                COUNT(CASE WHEN status = 'confirmed' THEN 1 END) as confirmados,
-                COUNT(CASE WHEN status = 'rejected' THEN 1 END) as rechazados
-            FROM ek_sales 
-            WHERE DATE(created_at) = %s;
-        """, (date,))
-        
-        claims_data = cursor.fetchone()
+            date = datetime.now()
+        if isinstance(date, datetime):
+            # El rollup se indexa por día: un datetime nunca coincidiría con la llave
+            date = date.date()
+        
+        # KPIs del día desde el rollup ek_daily_kpis (cola en vivo si es hoy)
+        por_avatar = read_daily_kpis(self.conn, date, date + timedelta(days=1)).get(date, {})
+        kpis = sum_kpis(por_avatar)
+        
+        leads_data = (
+            kpis["leads_new"],
+            por_avatar.get("mother", {}).get("leads_new", 0),
+            por_avatar.get("therapist", {}).get("leads_new", 0),
+        )
+        mensajes_data = (
+            kpis["messages_total"],
+            kpis["messages_outbound"],
+            kpis["messages_inbound"],
+            kpis["messages_delivered"],
+            kpis["messages_read"],
+        )
+        ventas_data = (
+            kpis["sales_count"],
+            kpis["sales_amount"],
+            kpis["sales_amount"] / kpis["sales_count"] if kpis["sales_count"] else None,
+        )
+        eventos_data = (
+            1 if kpis["event_registered"] else 0,
+            kpis["event_attended"],
+            kpis["event_no_show"],
+        )
+        claims_data = (
+            kpis["claims_total"],
+            kpis["claims_confirmed"],
+            kpis["claims_rejected"],
+        )
         
         return {
             "fecha": date.isoformat(),
@@ -124,115 +99,79 @@ class EinsteinKidsReports:
             }
         }
     
-    def generate_conversion_funnel(self, days: int = 30) -> Dict[str, Any]:
-        """Genera funnel de conversi??n completo"""
-        cursor = self.conn.cursor()
-        
-        # Funnel por etapas
-        cursor.execute("""
-            SELECT 
-                stage,
-                COUNT(*) as count,
-                COUNT(*) * 100.0 / SUM(COUNT(*)) OVER () as percentage
-            FROM ek_leads 
-            WHERE created_at >= NOW() - INTERVAL '%s days'
-            GROUP BY stage
-            ORDER BY count DESC;
-        """, (days,))
-        
-        stages_data = cursor.fetchall()
-        
-        # Conversi??n de leads a ventas
-        cursor.execute("""
-            SELECT 
-                COUNT(DISTINCT l.lead_id) as total_leads,
-                COUNT(DISTINCT s.sale_id) as total_ventas,
-                COUNT(DISTINCT s.sale_id) * 100.0 / COUNT(DISTINCT l.lead_id) as conversion_rate
-            FROM ek_leads l
-            LEFT JOIN ek_sales s ON l.lead_id = s.lead_id AND s.status = 'confirmed'
-            WHERE l.created_at >= NOW() - INTERVAL '%s days';
-        """, (days,))
-        
-        conversion_data = cursor.fetchone()
-        
-        # Conversi??n por avatar
-        cursor.execute("""
-            SELECT 
-                l.avatar,
-                COUNT(DISTINCT l.lead_id) as leads,
-                COUNT(DISTINCT s.sale_id) as ventas,
-                COUNT(DISTINCT s.sale_id) * 100.0 / COUNT(DISTINCT l.lead_id) as conversion_rate
-            FROM ek_leads l
-            LEFT JOIN ek_sales s ON l.lead_id = s.lead_id AND s.status = 'confirmed'
-            WHERE l.created_at >= NOW() - INTERVAL '%s days'
-            GROUP BY l.avatar;
-        """, (days,))
-        
-        avatar_data = cursor.fetchall()
+    def generate_conversion_funnel(
+        self,
+        days: int = 30,
+        start_date: date = None,
+        end_date: date = None,
+    ) -> Dict[str, Any]:
+        """Genera funnel de conversión completo
+        
+        Rango semiabierto [start_date, end_date): por defecto los últimos
+        ``days`` días incluyendo hoy. Suma los buckets diarios de ek_funnel_daily.
+        """
+        if end_date is None:
+            end_date = datetime.now().date() + timedelta(days=1)
+        if start_date is None:
+            start_date = end_date - timedelta(days=days)
+        
+        funnel = read_funnel(self.conn, start_date, end_date)
+        total_leads = funnel["total"]["leads"]
+        total_ventas = funnel["total"]["sales"]
         
         return {
-            "periodo_dias": days,
+            "periodo_dias": (end_date - start_date).days,
+            "desde": start_date.isoformat(),
+            "hasta": end_date.isoformat(),
             "funnel_stages": [
                 {
-                    "stage": row[0],
-                    "count": row[1],
-                    "percentage": round(row[2], 1)
+                    "stage": stage,
+                    "count": count,
+                    "percentage": round(count * 100.0 / max(total_leads, 1), 1)
                 }
-                for row in stages_data
+                for stage, count in sorted(funnel["stages"].items(), key=lambda item: item[1], reverse=True)
             ],
             "conversion_general": {
-                "total_leads": conversion_data[0],
-                "total_ventas": conversion_data[1],
-                "conversion_rate": round(conversion_data[2], 2)
+                "total_leads": total_leads,
+                "total_ventas": total_ventas,
+                "conversion_rate": round(total_ventas * 100.0 / max(total_leads, 1), 2)
             },
             "conversion_por_avatar": [
                 {
-                    "avatar": row[0],
-                    "leads": row[1],
-                    "ventas": row[2],
-                    "conversion_rate": round(row[3], 2)
+                    "avatar": avatar,
+                    "leads": data["leads"],
+                    "ventas": data["sales"],
+                    "conversion_rate": round(data["sales"] * 100.0 / max(data["leads"], 1), 2)
                 }
-                for row in avatar_data
+                for avatar, data in funnel["avatars"].items()
             ]
         }
     
-    def generate_hot_leads_report(self) -> Dict[str, Any]:
-        """Reporte de leads calientes que necesitan atenci??n"""
-        cursor = self.conn.cursor()
+    def generate_hot_leads_report(self, limit: int = 100, cursor: str = None) -> Dict[str, Any]:
+        """Reporte de leads calientes que necesitan atención
         
-        # Leads calientes (score >= 70)
-        cursor.execute("""
-            SELECT 
-                l.lead_id,
-                l.name,
-                l.phone,
-                l.email,
-                l.avatar,
-                l.score,
-                l.stage,
-                l.created_at,
-                COUNT(m.id) as mensajes_intercambiados
-            FROM ek_leads l
-            LEFT JOIN ek_ycloud_messages m ON l.lead_id = m.lead_id
-            WHERE l.score >= 70
-            GROUP BY l.lead_id, l.name, l.phone, l.email, l.avatar, l.score, l.stage, l.created_at
-            ORDER BY l.score DESC, l.created_at DESC;
-        """)
+        Paginado por keyset: ``next_cursor`` se pasa como ``cursor`` para
+        la siguiente página.
+        """
+        pagina = list_hot_leads(self.conn, limit=limit, cursor=cursor)
         
         hot_leads = []
-        for row in cursor.fetchall():
+        for row in pagina["items"]:
             hot_leads.append({
-                "id": str(row[0]),
-                "nombre": row[1],
-                "telefono": row[2],
-                "email": row[3],
-                "avatar": row[4],
-                "score": row[5],
-                "stage": row[6],
-                "fecha_registro": row[7].strftime("%Y-%m-%d %H:%M"),
-                "mensajes": row[8]
+                "id": str(row["lead_id"]),
+                "nombre": row["name"],
+                "telefono": row["phone"],
+                "email": row["email"],
+                "avatar": row["avatar"],
+                "score": row["score"],
+                "stage": row["stage"],
+                "fecha_registro": row["created_at"].strftime("%Y-%m-%d %H:%M"),
+                "mensajes": row["message_count"],
+                "ultima_interaccion": row["last_interaction_at"].strftime("%Y-%m-%d %H:%M") if row["last_interaction_at"] else None
             })
         
+        cursor = self.conn.cursor()
+        
         # Leads con claims pendientes
         cursor.execute("""
             SELECT 
@@ -260,7 +199,8 @@ class EinsteinKidsReports:
         return {
             "hot_leads": hot_leads,
             "pending_claims": pending_claims,
-            "total_hot": len(hot_leads),
+            "total_hot": count_hot_leads(self.conn),
+            "next_cursor": pagina["next_cursor"],
             "total_pending_claims": len(pending_claims)
         }
     
@@ -270,49 +210,31 @@ class EinsteinKidsReports:
         week_start = today - timedelta(days=today.weekday())  # Lunes
         week_end = week_start + timedelta(days=6)  # Domingo
         
-        cursor = self.conn.cursor()
-        
-        # M??tricas semanales
-        cursor.execute("""
-            SELECT 
-                COUNT(DISTINCT l.lead_id) as leads_semana,
-                COUNT(DISTINCT CASE WHEN l.avatar = 'mother' THEN l.lead_id END) as moms,
-                COUNT(DISTINCT CASE WHEN l.avatar = 'therapist' THEN l.lead_id END) as therapists,
-                COUNT(DISTINCT s.sale_id) as ventas_semana,
-                COALESCE(SUM(s.amount), 0) as monto_semana
-            FROM ek_leads l
-            LEFT JOIN ek_sales s ON l.lead_id = s.lead_id AND s.status = 'confirmed'
-            WHERE DATE(l.created_at) >= %s AND DATE(l.created_at) <= %s;
-        """, (week_start, week_end))
-        
-        semana_data = cursor.fetchone()
-        
-        # Eventos de la semana
-        cursor.execute("""
-            SELECT 
-                DATE(event_start_at) as fecha,
-                COUNT(*) as inscritos,
-                COUNT(CASE WHEN stage = 'EVENT_ATTENDED' THEN 1 END) as asistieron
-            FROM ek_leads 
-            WHERE DATE(event_start_at) >= %s AND DATE(event_start_at) <= %s
-            GROUP BY DATE(event_start_at)
-            ORDER BY fecha;
-        """, (week_start, week_end))
-        
-        eventos_data = cursor.fetchall()
+        # Semana actual y anterior en una sola lectura del rollup
+        kpis_por_dia = read_daily_kpis(self.conn, week_start - timedelta(days=7), week_end + timedelta(days=1))
+        
+        def _semana(inicio) -> Dict[str, Any]:
+            dias = [kpis_por_dia.get(inicio + timedelta(days=i), {}) for i in range(7)]
+            total = sum_kpis({str(i): sum_kpis(dia) for i, dia in enumerate(dias)})
+            return {
+                "leads": total["leads_new"],
+                "moms": sum(dia.get("mother", {}).get("leads_new", 0) for dia in dias),
+                "therapists": sum(dia.get("therapist", {}).get("leads_new", 0) for dia in dias),
+                "ventas": total["sales_count"],
+                "monto": total["sales_amount"],
+            }
         
-        # Tendencia vs semana anterior
-        cursor.execute("""
-            SELECT 
-                COUNT(DISTINCT l.lead_id) as leads_semana_ant,
-                COUNT(DISTINCT s.sale_id) as ventas_semana_ant,
-                COALESCE(SUM(s.amount), 0) as monto_semana_ant
-            FROM ek_leads l
-            LEFT JOIN ek_sales s ON l.lead_id = s.lead_id AND s.status = 'confirmed'
-            WHERE DATE(l.created_at) >= %s AND DATE(l.created_at) <= %s;
-        """, (week_start - timedelta(days=7), week_end - timedelta(days=7)))
+        actual = _semana(week_start)
+        anterior = _semana(week_start - timedelta(days=7))
+        semana_data = (actual["leads"], actual["moms"], actual["therapists"], actual["ventas"], actual["monto"])
+        semana_ant_data = (anterior["leads"], anterior["ventas"], anterior["monto"])
         
-        semana_ant_data = cursor.fetchone()
+        eventos_data = []
+        for i in range(7):
+            dia = week_start + timedelta(days=i)
+            kpis = sum_kpis(kpis_por_dia.get(dia, {}))
+            if kpis["event_registered"]:
+                eventos_data.append((dia, kpis["event_registered"], kpis["event_attended"]))
         
         return {
             "semana": {
@@ -364,16 +286,45 @@ class EinsteinKidsReports:
         }
     
     def close(self):
-        """Cierra conexi??n a BD"""
+        """Cierra conexión a BD"""
         if self.conn:
             self.conn.close()
 
-# Funci??n principal para Windmill
-def main():
-    """Genera reporte completo para Cyn"""
+# Función principal para Windmill
+def main(export: str = None, desde: str = None, hasta: str = None, formato: str = "csv", destino: str = None):
+    """Genera reporte completo para Cyn
+    
+    Con ``export`` (leads | messages | sales) exporta el detalle de
+    [desde, hasta] a ``destino`` en CSV o Parquet, en streaming.
+    """
+    if export:
+        return exportar_detalle(export, desde, hasta, formato, destino)
+    
     reports = EinsteinKidsReports()
     try:
         reporte_completo = reports.generar_reporte_completo()
         print(json.dumps(reporte_completo, indent=2, ensure_ascii=False))
     finally:
         reports.close()
+
+
+def exportar_detalle(dataset: str, desde: str, hasta: str, formato: str = "csv", destino: str = None) -> Dict[str, Any]:
+    """Exporta detalle por rango sin armar el reporte en memoria"""
+    hasta = hasta or datetime.now().date().isoformat()
+    desde = desde or (date.fromisoformat(hasta) - timedelta(days=30)).isoformat()
+    destino = destino or f"/tmp/einstein_kids_{dataset}_{desde}_{hasta}.{formato}"
+    
+    reports = EinsteinKidsReports()
+    try:
+        resultado = export_to_file(
+            reports.conn,
+            dataset,
+            date.fromisoformat(desde),
+            date.fromisoformat(hasta) + timedelta(days=1),
+            destino,
+            fmt=formato,
+        )
+        reports.conn.rollback()
+        return {"ok": True, **resultado}
+    finally:
+        reports.close()
@@ -96,11 +96,29 @@ def main(
             status = "accepted"
 
         # 4. Log to DB
+        # Dedupe key first: ek_ycloud_messages is partitioned by created_at
         cur.execute("""
+            WITH msg_key AS (
+                INSERT INTO ek_ycloud_message_keys (ycloud_message_id)
+                SELECT %(msg_id)s WHERE %(msg_id)s IS NOT NULL
+                ON CONFLICT (ycloud_message_id) DO NOTHING
+                RETURNING message_id, created_at
+            )
             INSERT INTO ek_ycloud_messages (
-                ycloud_message_id, lead_id, direction, message_type, template_name, content, status, sent_at
-            ) VALUES (%s, %s, 'outbound', 'template', %s, %s, %s, NOW())
-        """, (ycloud_msg_id, lead_id, template_name, json.dumps(payload), status))
+                id, ycloud_message_id, lead_id, direction, message_type, template_name, content, status, sent_at, created_at
+            )
+            SELECT COALESCE(k.message_id, gen_random_uuid()), %(msg_id)s, %(lead_id)s, 'outbound', 'template',
+                   %(template_name)s, %(content)s, %(status)s, NOW(), COALESCE(k.created_at, NOW())
+            FROM (SELECT 1) AS one
+            LEFT JOIN msg_key k ON TRUE
+            WHERE %(msg_id)s IS NULL OR k.message_id IS NOT NULL
+        """, {
+            "msg_id": ycloud_msg_id,
+            "lead_id": lead_id,
+            "template_name": template_name,
+            "content": json.dumps(payload),
+            "status": status,
+        })
         
         conn.commit()
         return {"ok": True, "ycloud_message_id": ycloud_msg_id}
@@ -13,6 +13,7 @@ from typing import Any, Dict
 import psycopg2
 from psycopg2.extras import Json
 
+from .event_log import EventEmitter
 from .normalize_phone import normalize_phone_e164_mx
 from .upsert_lead import main as upsert_lead
 
@@ -136,15 +137,34 @@ def main(
     action = "STORED"
     try:
         conn = psycopg2.connect(**pg_resource)
-        with conn.cursor() as cur:
+        with EventEmitter(conn) as events, conn.cursor() as cur:
+            # ek_ycloud_messages is partitioned by created_at, so the global
+            # dedupe on ycloud_message_id goes through ek_ycloud_message_keys.
             cur.execute(
                 """
+                WITH msg_key AS (
+                    INSERT INTO ek_ycloud_message_keys (ycloud_message_id)
+                    SELECT %(msg_id)s WHERE %(msg_id)s IS NOT NULL
+                    ON CONFLICT (ycloud_message_id) DO NOTHING
+                    RETURNING message_id, created_at
+                )
                 INSERT INTO ek_ycloud_messages (
-                    ycloud_message_id, lead_id, direction, message_type, content, status, sent_at
-                ) VALUES (%s, %s, 'inbound', %s, %s::jsonb, 'accepted', to_timestamp(%s::double precision))
-                ON CONFLICT (ycloud_message_id) DO NOTHING
+                    id, ycloud_message_id, lead_id, direction, message_type, content, status, sent_at, created_at
+                )
+                SELECT COALESCE(k.message_id, gen_random_uuid()), %(msg_id)s, %(lead_id)s, 'inbound',
+                       %(msg_type)s, %(content)s::jsonb, 'accepted',
+                       to_timestamp(%(timestamp)s::double precision), COALESCE(k.created_at, NOW())
+                FROM (SELECT 1) AS one
+                LEFT JOIN msg_key k ON TRUE
+                WHERE %(msg_id)s IS NULL OR k.message_id IS NOT NULL
                 """,
-                (msg_id, lead_id, msg_type, Json(msg), timestamp or 0),
+                {
+                    "msg_id": msg_id,
+                    "lead_id": lead_id,
+                    "msg_type": msg_type,
+                    "content": Json(msg),
+                    "timestamp": timestamp or 0,
+                },
             )
 
             if text_body in ("stop", "baja", "unsubscribe"):
@@ -158,15 +178,12 @@ def main(
                     """,
                     (lead_id, Json({"source": "whatsapp_inbound", "message_id": msg_id})),
                 )
-                cur.execute("UPDATE ek_leads SET score = score + 50, updated_at = NOW() WHERE lead_id = %s", (lead_id,))
                 action = "PAYMENT_CLAIM"
 
-            cur.execute(
-                """
-                INSERT INTO ek_lead_events (lead_id, event_type, payload)
-                VALUES (%s, 'ycloud_inbound_message', %s::jsonb)
-                """,
-                (lead_id, Json({"message_id": msg_id, "message_type": msg_type, "action": action})),
+            events.emit(
+                lead_id,
+                "ycloud_inbound_message",
+                {"message_id": msg_id, "message_type": msg_type, "action": action},
             )
 
         conn.commit()
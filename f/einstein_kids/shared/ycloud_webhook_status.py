@@ -5,7 +5,8 @@ import logging
 from typing import Any, Dict
 
 import psycopg2
-from psycopg2.extras import Json
+
+from .event_log import EventEmitter
 
 logger = logging.getLogger(__name__)
 
@@ -53,40 +54,38 @@ def main(payload: Dict[str, Any], pg_resource: Dict[str, Any] | None = None) ->
     conn = None
     try:
         conn = psycopg2.connect(**pg_resource)
-        with conn.cursor() as cur:
-            if _STATUS_TO_COLUMN[status]:
-                column = _STATUS_TO_COLUMN[status]
-                cur.execute(
-                    f"""
-                    UPDATE ek_ycloud_messages
-                    SET status = %s,
-                        {column} = NOW()
-                    WHERE ycloud_message_id = %s
-                    """,
-                    (status, message_id),
-                )
-            else:
-                cur.execute(
-                    """
-                    UPDATE ek_ycloud_messages
-                    SET status = %s
-                    WHERE ycloud_message_id = %s
-                    """,
-                    (status, message_id),
-                )
-
-            if cur.rowcount == 0:
+        # Status callbacks carry the raw YCloud body; compact drops its empty fields.
+        with EventEmitter(conn, compact=True) as events, conn.cursor() as cur:
+            # Resolve the message's created_at first so the UPDATE is pruned
+            # to a single monthly partition of ek_ycloud_messages.
+            cur.execute(
+                "SELECT created_at FROM ek_ycloud_message_keys WHERE ycloud_message_id = %s",
+                (message_id,),
+            )
+            key = cur.fetchone()
+            if not key:
                 return {"ok": False, "error": "message_not_found", "message_id": message_id}
 
+            column = _STATUS_TO_COLUMN[status]
+            timestamp_sql = f", {column} = NOW()" if column else ""
             cur.execute(
-                """
-                INSERT INTO ek_lead_events (lead_id, event_type, payload)
-                SELECT lead_id, 'ycloud_message_status', %s::jsonb
-                FROM ek_ycloud_messages
+                f"""
+                UPDATE ek_ycloud_messages
+                SET status = %s{timestamp_sql}
                 WHERE ycloud_message_id = %s
-                LIMIT 1
+                  AND created_at = %s
+                RETURNING lead_id
                 """,
-                (Json({"message_id": message_id, "status": status, "raw": raw_payload}), message_id),
+                (status, message_id, key[0]),
+            )
+            updated = cur.fetchone()
+            if not updated:
+                return {"ok": False, "error": "message_not_found", "message_id": message_id}
+
+            events.emit(
+                updated[0],
+                "ycloud_message_status",
+                {"message_id": message_id, "status": status, "raw": raw_payload},
             )
 
         conn.commit()
@@ -0,0 +1,288 @@
+"""Maintain per-(meeting, lead) attendance incrementally from Zoom join/leave webhooks."""
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+import psycopg2
+from psycopg2.extras import Json, RealDictCursor
+
+from .event_log import EventEmitter
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+Interval = Tuple[int, int]
+
+_JOINED = "meeting.participant_joined"
+_LEFT = "meeting.participant_left"
+
+
+def merge_intervals(intervals: List[Interval]) -> List[Interval]:
+    """Sort and merge overlapping or touching [start, end] intervals."""
+    merged: List[List[int]] = []
+    for start, end in sorted((int(s), int(e)) for s, e in intervals if e >= s):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def covered_seconds(intervals: List[Interval]) -> int:
+    return sum(end - start for start, end in merge_intervals(intervals))
+
+
+def _with_interval(state: Dict[str, Any], start: int, end: int) -> Dict[str, Any]:
+    intervals = merge_intervals([tuple(i) for i in state.get("intervals") or []] + [(start, max(start, end))])
+    return {**state, "intervals": intervals, "attended_seconds": covered_seconds(intervals)}
+
+
+def apply_join(state: Dict[str, Any], join_ts: int) -> Dict[str, Any]:
+    """Register an open connection; several devices may be open at once.
+
+    Zoom delivers webhooks at least once: a join already open or already
+    closed is a retry and leaves the state unchanged. A join whose leave came
+    first (out-of-order delivery) is closed against that orphan leave.
+    """
+    open_joins = sorted(state.get("open_joins") or [])
+    closed_joins = sorted(state.get("closed_joins") or [])
+    if join_ts in open_joins or join_ts in closed_joins:
+        return state
+
+    orphan_leaves = sorted(state.get("orphan_leaves") or [])
+    leave_ts = next((ts for ts in orphan_leaves if ts >= join_ts), None)
+    if leave_ts is None:
+        return {**state, "open_joins": sorted(open_joins + [join_ts])}
+
+    orphan_leaves.remove(leave_ts)
+    state = {**state, "orphan_leaves": orphan_leaves, "closed_joins": sorted(closed_joins + [join_ts])}
+    return _with_interval(state, join_ts, leave_ts)
+
+
+def apply_leave(state: Dict[str, Any], leave_ts: int, join_ts: int | None = None) -> Dict[str, Any]:
+    """Close one connection and fold its interval into the merged set.
+
+    The connection closed is the one whose join matches ``join_ts`` when Zoom
+    sends it, otherwise the oldest open one. A leave for a join not seen yet
+    is counted when ``join_ts`` is provided and remembered so the late join
+    does not reopen it; without ``join_ts`` it is kept as an orphan until a
+    join arrives. Retried leaves for an already closed join are ignored.
+    """
+    open_joins = sorted(state.get("open_joins") or [])
+    closed_joins = sorted(state.get("closed_joins") or [])
+    if join_ts is not None and join_ts in open_joins:
+        open_joins.remove(join_ts)
+        start = join_ts
+    elif join_ts is not None and join_ts in closed_joins:
+        return state
+    elif open_joins:
+        start = open_joins.pop(0)
+    elif join_ts is not None:
+        start = join_ts
+    else:
+        return {**state, "orphan_leaves": sorted(list(state.get("orphan_leaves") or []) + [leave_ts])}
+
+    state = {**state, "open_joins": open_joins, "closed_joins": sorted(closed_joins + [start])}
+    return _with_interval(state, start, leave_ts)
+
+
+def live_seconds(state: Dict[str, Any], now_ts: int) -> int:
+    """Attendance so far, counting still-open connections up to ``now_ts``."""
+    intervals = [tuple(i) for i in state.get("intervals") or []]
+    intervals += [(join_ts, max(join_ts, now_ts)) for join_ts in state.get("open_joins") or []]
+    return covered_seconds(intervals)
+
+
+def _to_epoch(value: Any) -> int | None:
+    if not value:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def _extract_participant(payload: Dict[str, Any]) -> Tuple[str | None, str | None, Dict[str, Any]]:
+    event_type = payload.get("event") or payload.get("event_type")
+    obj = (payload.get("payload") or {}).get("object") or {}
+    meeting_id = obj.get("id") or payload.get("meeting_id")
+    participant = obj.get("participant") or payload.get("participant") or {}
+    return event_type, str(meeting_id) if meeting_id else None, participant
+
+
+def _resolve_lead_id(cur, participant: Dict[str, Any]) -> Any:
+    if participant.get("lead_id"):
+        return participant["lead_id"]
+    email = (participant.get("email") or participant.get("user_email") or "").strip().lower()
+    if not email:
+        return None
+    cur.execute("SELECT lead_id FROM ek_leads WHERE email_normalized = %s LIMIT 1", (email,))
+    row = cur.fetchone()
+    return row["lead_id"] if row else None
+
+
+def main(payload: Dict[str, Any], pg_resource: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    if not isinstance(payload, dict):
+        return {"ok": False, "error": "invalid_payload"}
+    if not pg_resource:
+        return {"ok": False, "error": "missing_pg_resource"}
+
+    event_type, meeting_id, participant = _extract_participant(payload)
+    if event_type not in (_JOINED, _LEFT):
+        return {"ok": False, "error": "unsupported_event_type", "event_type": event_type}
+    if not meeting_id:
+        return {"ok": False, "error": "missing_meeting_id"}
+
+    join_ts = _to_epoch(participant.get("join_time"))
+    leave_ts = _to_epoch(participant.get("leave_time"))
+    if event_type == _JOINED and join_ts is None:
+        return {"ok": False, "error": "missing_join_time"}
+    if event_type == _LEFT and leave_ts is None:
+        return {"ok": False, "error": "missing_leave_time"}
+
+    conn = None
+    try:
+        conn = psycopg2.connect(**pg_resource)
+        with EventEmitter(conn) as events, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            lead_id = _resolve_lead_id(cur, participant)
+            if not lead_id:
+                return {"ok": False, "error": "lead_not_found", "meeting_id": meeting_id}
+
+            cur.execute(
+                """
+                INSERT INTO ek_attendance_sessions (meeting_id, lead_id)
+                VALUES (%s, %s)
+                ON CONFLICT (meeting_id, lead_id) DO NOTHING
+                """,
+                (meeting_id, lead_id),
+            )
+            cur.execute(
+                """
+                SELECT intervals, open_joins, closed_joins, orphan_leaves, attended_seconds
+                FROM ek_attendance_sessions
+                WHERE meeting_id = %s AND lead_id = %s
+                FOR UPDATE
+                """,
+                (meeting_id, lead_id),
+            )
+            previous = dict(cur.fetchone())
+            previous_seconds = int(previous["attended_seconds"] or 0)
+
+            if event_type == _JOINED:
+                state = apply_join(previous, join_ts)
+            else:
+                state = apply_leave(previous, leave_ts, join_ts)
+            if state is previous:
+                # Retried webhook: nothing changed, nothing to log again.
+                return {
+                    "ok": True,
+                    "duplicate": True,
+                    "meeting_id": meeting_id,
+                    "lead_id": str(lead_id),
+                    "attended_seconds": previous_seconds,
+                    "connected": bool(previous["open_joins"]),
+                }
+
+            cur.execute(
+                """
+                UPDATE ek_attendance_sessions
+                SET intervals = %(intervals)s::jsonb,
+                    open_joins = %(open_joins)s::jsonb,
+                    closed_joins = %(closed_joins)s::jsonb,
+                    orphan_leaves = %(orphan_leaves)s::jsonb,
+                    attended_seconds = %(attended_seconds)s,
+                    first_join_at = CASE
+                        WHEN %(join_ts)s::bigint IS NULL THEN first_join_at
+                        ELSE LEAST(COALESCE(first_join_at, to_timestamp(%(join_ts)s)), to_timestamp(%(join_ts)s))
+                    END,
+                    last_leave_at = CASE
+                        WHEN %(leave_ts)s::bigint IS NULL THEN last_leave_at
+                        ELSE GREATEST(COALESCE(last_leave_at, to_timestamp(%(leave_ts)s)), to_timestamp(%(leave_ts)s))
+                    END,
+                    updated_at = NOW()
+                WHERE meeting_id = %(meeting_id)s AND lead_id = %(lead_id)s
+                """,
+                {
+                    "intervals": Json([list(i) for i in state.get("intervals") or []]),
+                    "open_joins": Json(state.get("open_joins") or []),
+                    "closed_joins": Json(state.get("closed_joins") or []),
+                    "orphan_leaves": Json(state.get("orphan_leaves") or []),
+                    "attended_seconds": state["attended_seconds"],
+                    "join_ts": join_ts,
+                    "leave_ts": leave_ts if event_type == _LEFT else None,
+                    "meeting_id": meeting_id,
+                    "lead_id": lead_id,
+                },
+            )
+
+            # Keep the raw event log for auditing and for meetings recorded
+            # before the aggregate existed.
+            event_payload: Dict[str, Any] = {"meeting_id": meeting_id, "join_time": participant.get("join_time")}
+            if event_type == _LEFT:
+                added_seconds = max(int(state["attended_seconds"]) - previous_seconds, 0)
+                event_payload.update(
+                    {"leave_time": participant.get("leave_time"), "duration_minutes": added_seconds // 60}
+                )
+            events.emit(
+                lead_id,
+                "zoom_participant_joined" if event_type == _JOINED else "zoom_participant_left",
+                event_payload,
+            )
+
+        conn.commit()
+        return {
+            "ok": True,
+            "meeting_id": meeting_id,
+            "lead_id": str(lead_id),
+            "attended_seconds": int(state["attended_seconds"]),
+            "connected": bool(state.get("open_joins")),
+        }
+    except Exception as exc:
+        if conn:
+            conn.rollback()
+        logger.exception("zoom_attendance_live failed")
+        return {"ok": False, "error": str(exc)}
+    finally:
+        if conn:
+            conn.close()
+
+
+def get_live_attendance(meeting_id: str, pg_resource: Dict[str, Any]) -> Dict[str, Any]:
+    """Current attendance for dashboards: connected leads and minutes so far."""
+    now_ts = int(datetime.now(timezone.utc).timestamp())
+    conn = psycopg2.connect(**pg_resource)
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(
+                """
+                SELECT lead_id, intervals, open_joins, attended_seconds
+                FROM ek_attendance_sessions
+                WHERE meeting_id = %s
+                """,
+                (meeting_id,),
+            )
+            rows = cur.fetchall()
+    finally:
+        conn.close()
+
+    attendees = [
+        {
+            "lead_id": str(row["lead_id"]),
+            "connected": bool(row["open_joins"]),
+            "minutes": live_seconds(row, now_ts) // 60,
+        }
+        for row in rows
+    ]
+    return {
+        "meeting_id": meeting_id,
+        "attendees": len(attendees),
+        "connected_now": sum(1 for item in attendees if item["connected"]),
+        "leads": attendees,
+    }
@@ -4,56 +4,202 @@ Conecta con Zoom para obtener asistencia real de los webinars
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import jwt
+import queue
 import time
-from datetime import datetime, timedelta
-from typing import Dict, List, Any
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time as dt_time, timedelta
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
 import os
 
+from psycopg2.extras import Json, execute_values
+
+from .event_log import EventEmitter
+
+
+class ZoomAPIError(RuntimeError):
+    """Respuesta no recuperable de la API de Zoom"""
+
 class ZoomAPIClient:
     """Cliente para Zoom API v2"""
     
-    def __init__(self):
-        self.api_key = os.getenv('ZOOM_API_KEY')
-        self.api_secret = os.getenv('ZOOM_API_SECRET')
-        self.base_url = "https://api.zoom.us/v2"
+    PAGE_SIZE = 300  # máximo permitido por /report/meetings/{id}/participants
+    MAX_RETRIES = 5
+    MAX_RETRY_WAIT_SECONDS = 60
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        api_secret: Optional[str] = None,
+        base_url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        pool_size: int = 10
+    ):
+        self.api_key = api_key or os.getenv('ZOOM_API_KEY')
+        self.api_secret = api_secret or os.getenv('ZOOM_API_SECRET')
+        self.base_url = (base_url or os.getenv('ZOOM_API_BASE_URL') or "https://api.zoom.us/v2").rstrip('/')
+        self.timeout = timeout or float(os.getenv('ZOOM_API_TIMEOUT_SECONDS', '15'))
+        
+        # Sesión con pool de conexiones compartida entre hilos
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        self._token: Optional[str] = None
+        self._token_exp = 0
+        self._token_lock = threading.Lock()
+        self._sleep = time.sleep
         
     def generate_jwt_token(self) -> str:
-        """Genera JWT token para autenticaci??n"""
+        """Genera JWT token para autenticación"""
         payload = {
             'iss': self.api_key,
             'exp': int(time.time()) + 3600  # 1 hora
         }
         return jwt.encode(payload, self.api_secret, algorithm='HS256')
     
-    def get_meeting_participants(self, meeting_id: str) -> List[Dict[str, Any]]:
-        """Obtiene participantes de una reuni??n/zoom"""
-        token = self.generate_jwt_token()
-        headers = {
+    def _auth_headers(self) -> Dict[str, str]:
+        """Headers con token reutilizado hasta 5 minutos antes de expirar"""
+        with self._token_lock:
+            if not self._token or time.time() > self._token_exp - 300:
+                self._token = self.generate_jwt_token()
+                self._token_exp = int(time.time()) + 3600
+            token = self._token
+        return {
             'Authorization': f'Bearer {token}',
             'Content-Type': 'application/json'
         }
-        
-        url = f"{self.base_url}/report/meetings/{meeting_id}/participants"
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code == 200:
+    
+    def _retry_after_seconds(self, response: requests.Response, attempt: int) -> float:
+        """Segundos a esperar según Retry-After (segundos o fecha HTTP) o backoff exponencial"""
+        header = response.headers.get('Retry-After')
+        wait = None
+        if header:
+            try:
+                wait = float(header)
+            except ValueError:
+                try:
+                    retry_at = parsedate_to_datetime(header)
+                    wait = (retry_at - datetime.now(retry_at.tzinfo)).total_seconds()
+                except (TypeError, ValueError):
+                    wait = None
+        if wait is None:
+            wait = 2 ** attempt
+        return min(max(wait, 0.0), self.MAX_RETRY_WAIT_SECONDS)
+    
+    def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+        """GET con timeout, reintentando 429 según Retry-After"""
+        url = f"{self.base_url}{path}"
+        for attempt in range(self.MAX_RETRIES + 1):
+            response = self.session.get(url, headers=self._auth_headers(), params=params, timeout=self.timeout)
+            if response.status_code != 429 or attempt == self.MAX_RETRIES:
+                return response
+            self._sleep(self._retry_after_seconds(response, attempt))
+        return response
+    
+    def iter_participant_pages(self, meeting_id: str) -> Iterator[List[Dict[str, Any]]]:
+        """Genera las páginas de participantes siguiendo next_page_token"""
+        params: Dict[str, Any] = {'page_size': self.PAGE_SIZE}
+        while True:
+            response = self._get(f"/report/meetings/{meeting_id}/participants", params=params)
+            if response.status_code != 200:
+                raise ZoomAPIError(f"Error obteniendo participantes de {meeting_id}: {response.status_code}")
+            
             data = response.json()
-            return data.get('participants', [])
-        else:
-            print(f"Error obteniendo participantes: {response.status_code}")
+            yield data.get('participants', [])
+            
+            next_token = data.get('next_page_token')
+            if not next_token:
+                return
+            params = {'page_size': self.PAGE_SIZE, 'next_page_token': next_token}
+    
+    def iter_meeting_participants(self, meeting_id: str) -> Iterator[Dict[str, Any]]:
+        """Participantes de una reunión, página por página"""
+        for page in self.iter_participant_pages(meeting_id):
+            yield from page
+    
+    def get_meeting_participants(self, meeting_id: str) -> List[Dict[str, Any]]:
+        """Obtiene participantes de una reunión/zoom"""
+        try:
+            return list(self.iter_meeting_participants(meeting_id))
+        except ZoomAPIError as exc:
+            print(str(exc))
             return []
     
-    def get_meeting_details(self, meeting_id: str) -> Dict[str, Any]:
-        """Obtiene detalles de una reuni??n"""
-        token = self.generate_jwt_token()
-        headers = {
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json'
-        }
+    def iter_meetings_participant_pages(
+        self,
+        meeting_ids: Iterable[str],
+        max_workers: int = 4,
+        max_buffered_pages: int = 16
+    ) -> Iterator[Tuple[str, Optional[List[Dict[str, Any]]]]]:
+        """
+        Descarga varias reuniones en paralelo y genera (meeting_id, página)
+        a medida que llegan. Al terminar cada reunión genera (meeting_id, None).
+        La cola acotada evita acumular páginas si el consumidor es más lento.
+        """
+        meeting_ids = list(dict.fromkeys(meeting_ids))
+        if not meeting_ids:
+            return
         
-        url = f"{self.base_url}/meetings/{meeting_id}"
-        response = requests.get(url, headers=headers)
+        pages: "queue.Queue[Tuple[str, Any]]" = queue.Queue(maxsize=max_buffered_pages)
+        stop = threading.Event()
+        done_marker = object()
+        
+        def put(item: Tuple[str, Any]) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def fetch(meeting_id: str) -> None:
+            try:
+                for page in self.iter_participant_pages(meeting_id):
+                    if not put((meeting_id, page)):
+                        return
+                put((meeting_id, done_marker))
+            except Exception as exc:  # se propaga al consumidor
+                put((meeting_id, exc))
+        
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(meeting_ids))))
+        try:
+            for meeting_id in meeting_ids:
+                executor.submit(fetch, meeting_id)
+            
+            pending = len(meeting_ids)
+            while pending:
+                meeting_id, item = pages.get()
+                if isinstance(item, Exception):
+                    raise item
+                if item is done_marker:
+                    pending -= 1
+                    yield meeting_id, None
+                    continue
+                yield meeting_id, item
+        finally:
+            # Los productores dejan de encolar si el consumidor salió antes
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def fetch_meetings_participants(self, meeting_ids: Iterable[str], max_workers: int = 4) -> Dict[str, List[Dict[str, Any]]]:
+        """Participantes completos de varias reuniones descargadas en paralelo"""
+        result: Dict[str, List[Dict[str, Any]]] = {}
+        for meeting_id, page in self.iter_meetings_participant_pages(meeting_ids, max_workers=max_workers):
+            bucket = result.setdefault(meeting_id, [])
+            if page:
+                bucket.extend(page)
+        return result
+    
+    def get_meeting_details(self, meeting_id: str) -> Dict[str, Any]:
+        """Obtiene detalles de una reunión"""
+        response = self._get(f"/meetings/{meeting_id}")
         
         if response.status_code == 200:
             return response.json()
@@ -63,12 +209,6 @@ class ZoomAPIClient:
     
     def get_past_meetings(self, user_id: str = "me", days: int = 30) -> List[Dict[str, Any]]:
         """Obtiene reuniones pasadas de un usuario"""
-        token = self.generate_jwt_token()
-        headers = {
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json'
-        }
-        
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
@@ -78,8 +218,7 @@ class ZoomAPIClient:
             'page_size': 100
         }
         
-        url = f"{self.base_url}/users/{user_id}/meetings"
-        response = requests.get(url, headers=headers, params=params)
+        response = self._get(f"/users/{user_id}/meetings", params=params)
         
         if response.status_code == 200:
             data = response.json()
@@ -88,162 +227,345 @@ class ZoomAPIClient:
             print(f"Error obteniendo reuniones: {response.status_code}")
             return []
 
-class ZoomAttendanceProcessor:
-    """Procesa asistencia de Zoom para Einstein Kids"""
+def normalize_name(name: Optional[str]) -> str:
+    """Minúsculas, sin acentos ni signos, espacios colapsados"""
+    if not name:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', name)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    cleaned = ''.join(ch if ch.isalnum() else ' ' for ch in stripped.lower())
+    return ' '.join(cleaned.split())
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class LeadMatcher:
+    """
+    Índice de leads esperados para una reunión.
+
+    Se construye una sola vez: diccionario por email, diccionario por nombre
+    normalizado y un índice invertido token -> leads. Cada participante se
+    resuelve con búsquedas exactas y, si no hay, con similitud de trigramas
+    acotada a los leads que comparten algún token del nombre. Un lead ya
+    asignado sale del índice, así que el costo total es casi lineal.
+    """
+
+    MIN_TOKEN_LENGTH = 2
+    MAX_BUCKET_SIZE = 50
+    MIN_SIMILARITY = 0.5
+
+    def __init__(self, expected_leads: List):
+        self._leads: Dict[Any, Dict[str, Any]] = {}
+        self._order: Dict[Any, int] = {}
+        self._by_email: Dict[str, Any] = {}
+        self._by_name: Dict[str, List[Any]] = {}
+        self._by_token: Dict[str, List[Any]] = {}
+        self._trigram_cache: Dict[Any, set] = {}
+        # Zoom reporta una fila por conexión: el mismo participante puede
+        # aparecer varias veces y debe resolver siempre al mismo lead.
+        self._resolved: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+        for position, lead in enumerate(expected_leads):
+            lead_id, email, phone, name = lead[0], lead[1], lead[2], lead[3]
+            if lead_id in self._leads:
+                continue
+            self._leads[lead_id] = {
+                'lead_id': lead_id,
+                'email': email,
+                'phone': phone,
+                'name': name
+            }
+            self._order[lead_id] = position
+
+            email_key = (email or '').strip().lower()
+            if email_key and email_key not in self._by_email:
+                self._by_email[email_key] = lead_id
+
+            name_key = normalize_name(name)
+            if name_key:
+                self._by_name.setdefault(name_key, []).append(lead_id)
+                for token in set(name_key.split()):
+                    if len(token) >= self.MIN_TOKEN_LENGTH:
+                        self._by_token.setdefault(token, []).append(lead_id)
+
+    def __len__(self) -> int:
+        return len(self._leads)
+
+    def match(self, email: Optional[str], name: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Devuelve el lead del participante o None"""
+        email_key = (email or '').strip().lower()
+        name_key = normalize_name(name)
+        identity = (email_key, name_key)
+
+        if identity in self._resolved:
+            return self._resolved[identity]
+
+        lead_id = self._match_email(email_key)
+        if lead_id is None:
+            lead_id = self._match_exact_name(name_key)
+        if lead_id is None:
+            lead_id = self._match_fuzzy_name(name_key)
+        if lead_id is None:
+            return None
+
+        lead_info = self._take(lead_id)
+        self._resolved[identity] = lead_info
+        return lead_info
+
+    def _match_email(self, email_key: str) -> Optional[Any]:
+        if not email_key:
+            return None
+        lead_id = self._by_email.get(email_key)
+        return lead_id if lead_id in self._leads else None
+
+    def _match_exact_name(self, name_key: str) -> Optional[Any]:
+        if not name_key:
+            return None
+        for lead_id in self._by_name.get(name_key, []):
+            if lead_id in self._leads:
+                return lead_id
+        return None
+
+    def _match_fuzzy_name(self, name_key: str) -> Optional[Any]:
+        if not name_key:
+            return None
+
+        candidates = set()
+        for token in set(name_key.split()):
+            if len(token) < self.MIN_TOKEN_LENGTH:
+                continue
+            bucket = self._by_token.get(token, [])
+            # Tokens muy comunes ("maria") no discriminan: se ignoran
+            if len(bucket) > self.MAX_BUCKET_SIZE:
+                continue
+            candidates.update(lead_id for lead_id in bucket if lead_id in self._leads)
+
+        if not candidates:
+            return None
+
+        participant_grams = _trigrams(name_key)
+        best_id = None
+        best_key = None
+        for lead_id in candidates:
+            lead_grams = self._lead_trigrams(lead_id)
+            union = len(participant_grams | lead_grams)
+            similarity = len(participant_grams & lead_grams) / union if union else 0.0
+            if similarity < self.MIN_SIMILARITY:
+                continue
+            # Desempate determinista: mayor similitud y luego orden original
+            key = (-similarity, self._order[lead_id])
+            if best_key is None or key < best_key:
+                best_id, best_key = lead_id, key
+        return best_id
+
+    def _lead_trigrams(self, lead_id: Any) -> set:
+        grams = self._trigram_cache.get(lead_id)
+        if grams is None:
+            grams = _trigrams(normalize_name(self._leads[lead_id]['name']))
+            self._trigram_cache[lead_id] = grams
+        return grams
+
+    def _take(self, lead_id: Any) -> Dict[str, Any]:
+        lead_info = self._leads.pop(lead_id)
+        self._trigram_cache.pop(lead_id, None)
+        return lead_info
+
+
+def event_day_range(event_start_at: datetime) -> Tuple[datetime, datetime]:
+    """Rango semiabierto [00:00, 00:00 del día siguiente) del evento, usable por índice"""
+    day_start = datetime.combine(event_start_at.date(), dt_time.min, tzinfo=event_start_at.tzinfo)
+    return day_start, day_start + timedelta(days=1)
+
+
+class MeetingAttendance:
+    """Agrega la asistencia de una reunión página por página: una fila de Zoom por conexión"""
     
-    def __init__(self, db_connection):
-        self.db = db_connection
-        self.zoom_client = ZoomAPIClient()
-        self.attendance_threshold = 45  # minutos para considerar asistencia
+    def __init__(self, meeting_id: str, matcher: LeadMatcher):
+        self.meeting_id = meeting_id
+        self.matcher = matcher
+        self.seen_participants = 0
+        self._by_lead: Dict[Any, Dict[str, Any]] = {}
     
-    def process_meeting_attendance(self, meeting_id: str, event_start_at: datetime):
-        """Procesa asistencia de una reuni??n espec??fica"""
-        participants = self.zoom_client.get_meeting_participants(meeting_id)
-        
-        if not participants:
-            print(f"No hay participantes para la reuni??n {meeting_id}")
-            return
-        
-        # Obtener leads que deber??an haber asistido
-        cursor = self.db.cursor()
-        cursor.execute("""
-            SELECT lead_id, email, phone_normalized, name
-            FROM ek_leads 
-            WHERE DATE(event_start_at) = DATE(%s)
-            AND stage IN ('EVENT_REGISTERED', 'REMINDER_SENT')
-        """, (event_start_at,))
-        
-        expected_leads = cursor.fetchall()
-        
-        # Procesar cada participante
-        attendance_records = []
+    def add(self, participants: Iterable[Dict[str, Any]]) -> None:
         for participant in participants:
-            email = participant.get('user_email', '').lower()
-            name = participant.get('name', '')
+            self.seen_participants += 1
+            lead_info = self.matcher.match(participant.get('user_email', ''), participant.get('name', ''))
+            if not lead_info:
+                continue
+            
             join_time = participant.get('join_time')
             leave_time = participant.get('leave_time')
-            duration = participant.get('duration', 0)
-            
-            # Buscar lead por email o nombre
-            lead_info = self.find_matching_lead(email, name, expected_leads)
+            duration = int(participant.get('duration', 0) or 0)
             
-            if lead_info:
-                status = 'attended' if duration >= self.attendance_threshold else 'partial'
-                
-                attendance_records.append({
+            record = self._by_lead.get(lead_info['lead_id'])
+            if record is None:
+                self._by_lead[lead_info['lead_id']] = {
                     'lead_id': lead_info['lead_id'],
-                    'meeting_id': meeting_id,
-                    'status': status,
+                    'meeting_id': self.meeting_id,
                     'duration_minutes': duration,
                     'join_time': join_time,
                     'leave_time': leave_time
-                })
-                
-                # Actualizar lead en BD
-                self.update_lead_attendance(lead_info['lead_id'], status, duration)
+                }
+                continue
+            
+            record['duration_minutes'] += duration
+            if join_time and (not record['join_time'] or join_time < record['join_time']):
+                record['join_time'] = join_time
+            if leave_time and (not record['leave_time'] or leave_time > record['leave_time']):
+                record['leave_time'] = leave_time
+    
+    def records(self, attendance_threshold: int) -> List[Dict[str, Any]]:
+        attendance_records = list(self._by_lead.values())
+        for record in attendance_records:
+            record['status'] = 'attended' if record['duration_minutes'] >= attendance_threshold else 'partial'
+        return attendance_records
+
+
+class ZoomAttendanceProcessor:
+    """Procesa asistencia de Zoom para Einstein Kids"""
+    
+    def __init__(self, db_connection, zoom_client: Optional[ZoomAPIClient] = None):
+        self.db = db_connection
+        self.zoom_client = zoom_client or ZoomAPIClient()
+        self.attendance_threshold = 45  # minutos para considerar asistencia
+    
+    def process_meetings_attendance(self, meetings: Dict[str, datetime], max_workers: int = 4) -> Dict[str, List[Dict[str, Any]]]:
+        """Procesa varias reuniones descargando sus reportes en paralelo"""
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        in_progress: Dict[str, MeetingAttendance] = {}
+        stream = self.zoom_client.iter_meetings_participant_pages(meetings.keys(), max_workers=max_workers)
+        for meeting_id, page in stream:
+            # Cada página se agrega al llegar; solo se conserva un registro por lead
+            attendance = in_progress.get(meeting_id)
+            if attendance is None:
+                attendance = in_progress[meeting_id] = self._start_meeting(meeting_id, meetings[meeting_id])
+            if page is not None:
+                attendance.add(page)
+                continue
+            del in_progress[meeting_id]
+            results[meeting_id] = self._write_attendance(attendance, meetings[meeting_id])
+        return results
+    
+    def process_meeting_attendance(
+        self,
+        meeting_id: str,
+        event_start_at: datetime,
+        participants: Optional[Iterable[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Procesa asistencia de una reunión específica"""
+        if participants is None:
+            participants = self.zoom_client.iter_meeting_participants(meeting_id)
+        
+        attendance = self._start_meeting(meeting_id, event_start_at)
+        # La descarga de Zoom ocurre sin transacción abierta
+        attendance.add(participants)
+        return self._write_attendance(attendance, event_start_at)
+    
+    def _start_meeting(self, meeting_id: str, event_start_at: datetime) -> 'MeetingAttendance':
+        """Carga los leads esperados del día y cierra la transacción de lectura"""
+        day_start, day_end = event_day_range(event_start_at)
+        try:
+            # Obtener leads que deberían haber asistido
+            cursor = self.db.cursor()
+            cursor.execute("""
+                SELECT lead_id, email, phone_normalized, name
+                FROM ek_leads 
+                WHERE event_start_at >= %s AND event_start_at < %s
+                AND stage IN ('EVENT_REGISTERED', 'REMINDER_SENT')
+            """, (day_start, day_end))
+            expected_leads = cursor.fetchall()
+        finally:
+            # psycopg2 abre una transacción implícita con el SELECT; no se mantiene durante el HTTP
+            self.db.rollback()
+        return MeetingAttendance(meeting_id, LeadMatcher(expected_leads))
+    
+    def _write_attendance(self, attendance: 'MeetingAttendance', event_start_at: datetime) -> List[Dict[str, Any]]:
+        """Aplica asistencia y no-shows en una sola transacción corta"""
+        if not attendance.seen_participants:
+            # Sin reporte de Zoom no se marca a nadie como no-show
+            print(f"No hay participantes para la reunión {attendance.meeting_id}")
+            return []
         
-        # Marcar no-shows
-        self.mark_no_shows(event_start_at, attendance_records)
+        attendance_records = attendance.records(self.attendance_threshold)
+        try:
+            self.update_lead_attendance(attendance_records)
+            self.mark_no_shows(event_start_at, attendance_records)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
         
         return attendance_records
     
     def find_matching_lead(self, email: str, name: str, expected_leads: List) -> Dict[str, Any]:
         """Encuentra el lead que corresponde al participante"""
-        # Buscar por email exacto
-        for lead in expected_leads:
-            if email and lead[1] and email.lower() == lead[1].lower():
-                return {
-                    'lead_id': lead[0],
-                    'email': lead[1],
-                    'phone': lead[2],
-                    'name': lead[3]
-                }
-        
-        # Buscar por nombre aproximado
-        for lead in expected_leads:
-            lead_name = lead[3].lower() if lead[3] else ''
-            participant_name = name.lower() if name else ''
-            
-            if lead_name and participant_name:
-                # Coincidencia parcial
-                if lead_name in participant_name or participant_name in lead_name:
-                    return {
-                        'lead_id': lead[0],
-                        'email': lead[1],
-                        'phone': lead[2],
-                        'name': lead[3]
-                    }
-        
-        return None
+        return LeadMatcher(expected_leads).match(email, name)
     
-    def update_lead_attendance(self, lead_id: str, status: str, duration: int):
-        """Actualiza el estado del lead basado en asistencia"""
-        cursor = self.db.cursor()
+    def update_lead_attendance(self, attendance_records: List[Dict[str, Any]]):
+        """Actualiza etapa y registra eventos de todos los asistentes en lote (sin commit)"""
+        if not attendance_records:
+            return
         
-        new_stage = 'EVENT_ATTENDED' if status == 'attended' else 'EVENT_PARTIAL'
+        cursor = self.db.cursor()
         
-        cursor.execute("""
-            UPDATE ek_leads 
-            SET stage = %s, 
+        execute_values(cursor, """
+            UPDATE ek_leads AS l
+            SET stage = v.stage,
                 updated_at = NOW()
-            WHERE lead_id = %s;
-        """, (new_stage, lead_id))
-        
-        # Registrar evento
-        cursor.execute("""
-            INSERT INTO ek_lead_events (lead_id, event_type, payload)
-            VALUES (%s, %s, %s);
-        """, (lead_id, 'zoom_attendance', json.dumps({
-            'status': status,
-            'duration_minutes': duration,
-            'meeting_id': 'zoom_meeting_id',
-            'timestamp': datetime.now().isoformat()
-        })))
-        
-        self.db.commit()
+            FROM (VALUES %s) AS v(lead_id, stage)
+            WHERE l.lead_id = v.lead_id::uuid;
+        """, [
+            (str(record['lead_id']), 'EVENT_ATTENDED' if record['status'] == 'attended' else 'EVENT_PARTIAL')
+            for record in attendance_records
+        ], page_size=1000)
+        
+        timestamp = datetime.now().isoformat()
+        with EventEmitter(self.db, max_batch=1000) as events:
+            for record in attendance_records:
+                events.emit(record['lead_id'], 'zoom_attendance', {
+                    'status': record['status'],
+                    'duration_minutes': record['duration_minutes'],
+                    'meeting_id': record['meeting_id'],
+                    'timestamp': timestamp
+                })
         
-        print(f"Lead {lead_id} actualizado: {status} ({duration} min)")
+        print(f"Leads actualizados por asistencia: {len(attendance_records)}")
     
-    def mark_no_shows(self, event_date: datetime, attendance_records: List[Dict]):
-        """Marca como no-show a los leads que no asistieron"""
-        attended_lead_ids = [record['lead_id'] for record in attendance_records]
-        
-        if not attended_lead_ids:
-            attended_lead_ids = ['00000000-0000-0000-0000-000000000000']  # Dummy para SQL
+    def mark_no_shows(self, event_date: datetime, attendance_records: List[Dict]) -> int:
+        """Marca como no-show a los leads que no asistieron (sin commit)"""
+        attended_lead_ids = [str(record['lead_id']) for record in attendance_records]
+        day_start, day_end = event_day_range(event_date)
         
         cursor = self.db.cursor()
         
+        # Un solo statement: anti-join + UPDATE ... RETURNING alimenta el INSERT de eventos
         cursor.execute("""
-            UPDATE ek_leads 
-            SET stage = 'EVENT_NO_SHOW',
-                updated_at = NOW()
-            WHERE DATE(event_start_at) = DATE(%s)
-            AND stage IN ('EVENT_REGISTERED', 'REMINDER_SENT')
-            AND lead_id NOT IN %s;
-        """, (event_date, tuple(attended_lead_ids)))
-        
-        # Registrar eventos de no-show
-        cursor.execute("""
-            SELECT lead_id FROM ek_leads 
-            WHERE DATE(event_start_at) = DATE(%s)
-            AND stage = 'EVENT_NO_SHOW'
-            AND lead_id NOT IN %s;
-        """, (event_date, tuple(attended_lead_ids)))
-        
-        no_shows = cursor.fetchall()
-        
-        for (lead_id,) in no_shows:
-            cursor.execute("""
-                INSERT INTO ek_lead_events (lead_id, event_type, payload)
-                VALUES (%s, %s, %s);
-            """, (lead_id, 'zoom_no_show', json.dumps({
-                'reason': 'did_not_attend',
-                'timestamp': datetime.now().isoformat()
-            })))
-        
-        self.db.commit()
+            WITH no_shows AS (
+                UPDATE ek_leads AS l
+                SET stage = 'EVENT_NO_SHOW',
+                    updated_at = NOW()
+                WHERE l.event_start_at >= %s AND l.event_start_at < %s
+                AND l.stage IN ('EVENT_REGISTERED', 'REMINDER_SENT')
+                AND NOT EXISTS (
+                    SELECT 1 FROM unnest(%s::uuid[]) AS attended(lead_id)
+                    WHERE attended.lead_id = l.lead_id
+                )
+                RETURNING l.lead_id
+            )
+            INSERT INTO ek_lead_events (lead_id, event_type, payload)
+            SELECT lead_id, 'zoom_no_show', %s::jsonb
+            FROM no_shows;
+        """, (day_start, day_end, attended_lead_ids, Json({
+            'reason': 'did_not_attend',
+            'timestamp': datetime.now().isoformat()
+        })))
         
-        print(f"Marcados {len(no_shows)} no-shows")
+        marked = cursor.rowcount
+        print(f"Marcados {marked} no-shows")
+        return marked
     
     def get_attendance_report(self, event_date: datetime) -> Dict[str, Any]:
         """Genera reporte de asistencia para un evento"""
@@ -256,8 +578,8 @@ class ZoomAttendanceProcessor:
                 COUNT(CASE WHEN stage = 'EVENT_NO_SHOW' THEN 1 END) as no_show,
                 COUNT(CASE WHEN stage = 'EVENT_PARTIAL' THEN 1 END) as parcial
             FROM ek_leads 
-            WHERE DATE(event_start_at) = DATE(%s);
-        """, (event_date,))
+            WHERE event_start_at >= %s AND event_start_at < %s;
+        """, event_day_range(event_date))
         
         stats = cursor.fetchone()
         
@@ -273,13 +595,13 @@ class ZoomAttendanceProcessor:
             'tasa_no_show': round((no_show / max(total, 1)) * 100, 1)
         }
 
-# Funci??n principal para Windmill
+# Función principal para Windmill
 def main(meeting_id: str, event_start_at: str):
     """
     Procesa asistencia de Zoom para Einstein Kids
     
     Args:
-        meeting_id: ID de la reuni??n en Zoom
+        meeting_id: ID de la reunión en Zoom
         event_start_at: Fecha/hora del evento (ISO format)
     """
     import psycopg2
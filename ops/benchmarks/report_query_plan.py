@@ -0,0 +1,187 @@
+"""Benchmark the single-pass KPI report query against a large synthetic dataset.
+
+Seeds ek_leads / ek_ycloud_messages / ek_sales (1M+ messages by default),
+runs EXPLAIN (ANALYZE, BUFFERS) on kpi_rollup.READ_KPIS_SQL for one day and
+checks that every source table is read through an index range scan.
+
+Usage (from the repo root, against a scratch database with migrations applied):
+
+    PGHOST=localhost POSTGRES_USER=windmill POSTGRES_PASSWORD=... \
+    POSTGRES_DB=windmill_test python ops/benchmarks/report_query_plan.py --messages 1000000
+
+Seeded rows (and any monthly partitions created for them) are rolled back
+unless --keep is given.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from datetime import date, timedelta
+
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from f.einstein_kids.shared.kpi_rollup import READ_KPIS_SQL, WATERMARK_NAME  # noqa: E402
+
+RESULTS_DIR = "ops/benchmarks/results"
+RESULT_FILE = os.path.join(RESULTS_DIR, "report-query-plan.json")
+
+SOURCE_TABLES = ("ek_leads", "ek_ycloud_messages", "ek_sales")
+INDEX_SCANS = ("Index Scan", "Index Only Scan", "Bitmap Heap Scan")
+# Monthly partitions (migration 0015): <parent>_pYYYYMM and <parent>_default
+PARTITION_SUFFIX = re.compile(r"_(p[0-9]{6}|default)$")
+PARTITIONED_TABLES = ("ek_ycloud_messages",)
+
+
+def ensure_partitions(cur, days: int) -> None:
+    """Create the monthly partitions covering the seeded range so rows do not land in DEFAULT."""
+    first_month = date.today() - timedelta(days=days)
+    for table in PARTITIONED_TABLES:
+        cur.execute("SELECT relkind FROM pg_class WHERE relname = %s", (table,))
+        row = cur.fetchone()
+        if row and row[0] == "p":
+            cur.execute("SELECT ek_ensure_monthly_partitions(%s, %s, 1)", (table, first_month))
+
+
+def seed(cur, leads: int, messages: int, sales: int, days: int) -> None:
+    """Spread rows uniformly over the last ``days`` days."""
+    ensure_partitions(cur, days)
+    cur.execute(
+        """
+        INSERT INTO ek_leads (avatar, name, phone_normalized, email_normalized, created_at, event_start_at, stage)
+        SELECT CASE WHEN g %% 2 = 0 THEN 'mother' ELSE 'therapist' END,
+               'bench ' || g,
+               'bench-' || g,
+               'bench-' || g || '@example.com',
+               NOW() - (random() * %(days)s) * INTERVAL '1 day',
+               NOW() - (random() * %(days)s) * INTERVAL '1 day',
+               (ARRAY['NEW_LEAD', 'EVENT_ATTENDED', 'EVENT_NO_SHOW'])[1 + g %% 3]
+        FROM generate_series(1, %(leads)s) AS g
+        """,
+        {"leads": leads, "days": days},
+    )
+    cur.execute(
+        """
+        CREATE TEMP TABLE bench_leads ON COMMIT DROP AS
+        SELECT row_number() OVER () AS n, lead_id FROM ek_leads WHERE name LIKE 'bench %'
+        """
+    )
+    cur.execute(
+        """
+        INSERT INTO ek_ycloud_messages (lead_id, direction, message_type, content, status, created_at)
+        SELECT b.lead_id,
+               CASE WHEN g %% 3 = 0 THEN 'inbound' ELSE 'outbound' END,
+               'text',
+               '{}'::jsonb,
+               (ARRAY['sent', 'delivered', 'read', 'failed'])[1 + g %% 4],
+               NOW() - (random() * %(days)s) * INTERVAL '1 day'
+        FROM generate_series(1, %(messages)s) AS g
+        JOIN bench_leads b ON b.n = 1 + g %% %(leads)s
+        """,
+        {"messages": messages, "leads": leads, "days": days},
+    )
+    cur.execute(
+        """
+        INSERT INTO ek_sales (lead_id, status, amount, created_at, confirmed_at)
+        SELECT b.lead_id,
+               (ARRAY['claimed', 'confirmed', 'rejected'])[1 + g %% 3],
+               997,
+               ts,
+               CASE WHEN g %% 3 = 1 THEN ts + INTERVAL '1 hour' END
+        FROM (
+            SELECT g, NOW() - (random() * %(days)s) * INTERVAL '1 day' AS ts
+            FROM generate_series(1, %(sales)s) AS g
+        ) AS s
+        JOIN bench_leads b ON b.n = 1 + g %% %(leads)s
+        """,
+        {"sales": sales, "leads": leads, "days": days},
+    )
+    for table in SOURCE_TABLES:
+        cur.execute(f"ANALYZE {table}")
+
+
+def parent_relation(relation: str) -> str:
+    """Partitions are reported under their own name; fold them into the parent table."""
+    return PARTITION_SUFFIX.sub("", relation)
+
+
+def scans_by_table(plan: dict) -> dict:
+    """Map relation name (partitions folded into their parent) -> node types used to read it."""
+    found = {}
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        relation = node.get("Relation Name")
+        if relation:
+            found.setdefault(parent_relation(relation), set()).add(node["Node Type"])
+        stack.extend(node.get("Plans", []))
+    return found
+
+
+def run(args) -> dict:
+    conn = psycopg2.connect(
+        host=os.getenv("PGHOST", "localhost"),
+        port=os.getenv("PGPORT", "5432"),
+        user=os.getenv("POSTGRES_USER", "windmill"),
+        password=os.getenv("POSTGRES_PASSWORD"),
+        database=os.getenv("POSTGRES_DB", "windmill"),
+    )
+    try:
+        with conn.cursor() as cur:
+            started = time.perf_counter()
+            seed(cur, args.leads, args.messages, args.sales, args.days)
+            seed_seconds = time.perf_counter() - started
+
+            day = date.today() - timedelta(days=1)
+            params = {
+                "start": day,
+                "end": day + timedelta(days=1),
+                "tenant_id": "einstein_kids",
+                # Unknown watermark: the whole range is computed live from the sources.
+                "watermark": f"{WATERMARK_NAME}:benchmark",
+            }
+            cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + READ_KPIS_SQL, params)
+            explain = cur.fetchone()[0][0]
+
+        if args.keep:
+            conn.commit()
+        else:
+            conn.rollback()
+    finally:
+        conn.close()
+
+    scans = scans_by_table(explain["Plan"])
+    seq_scans = sorted(t for t in SOURCE_TABLES if "Seq Scan" in scans.get(t, set()))
+    return {
+        "rows": {"leads": args.leads, "messages": args.messages, "sales": args.sales, "days": args.days},
+        "seed_seconds": round(seed_seconds, 2),
+        "execution_ms": explain.get("Execution Time"),
+        "planning_ms": explain.get("Planning Time"),
+        "scans": {table: sorted(types) for table, types in scans.items()},
+        "seq_scans": seq_scans,
+        "ok": not seq_scans and bool(scans.get("ek_ycloud_messages", set()) & set(INDEX_SCANS)),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--leads", type=int, default=100_000)
+    parser.add_argument("--sales", type=int, default=20_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--keep", action="store_true", help="commit the seeded rows")
+    args = parser.parse_args()
+
+    result = run(args)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(RESULT_FILE, "w") as f:
+        json.dump(result, f, indent=2)
+    print(json.dumps(result, indent=2))
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+-- Einstein Kids: columnas tipadas e índice de asistencia Zoom
+-- compute_attendance filtra ek_lead_events por meeting_id y suma duration_minutes
+-- desde el payload JSONB; con solo idx por event_type/lead_id eso termina en un
+-- scan completo de todos los eventos zoom_participant_left.
+
+-- 1. Columnas generadas a partir del payload (se llenan solas en cada INSERT).
+--    duration_minutes solo se castea si el valor es numérico, para que un payload
+--    mal formado no rompa el INSERT del webhook.
+ALTER TABLE ek_lead_events
+    ADD COLUMN IF NOT EXISTS meeting_id TEXT
+        GENERATED ALWAYS AS (payload->>'meeting_id') STORED;
+
+ALTER TABLE ek_lead_events
+    ADD COLUMN IF NOT EXISTS duration_minutes INTEGER
+        GENERATED ALWAYS AS (
+            CASE
+                WHEN (payload->>'duration_minutes') ~ '^[0-9]{1,9}$'
+                THEN (payload->>'duration_minutes')::integer
+            END
+        ) STORED;
+
+-- 2. Índice parcial de cobertura: la agregación por reunión se resuelve con
+--    un index-only scan (meeting_id -> lead_id, duration_minutes).
+CREATE INDEX IF NOT EXISTS idx_ek_lead_events_zoom_left_meeting
+    ON ek_lead_events (meeting_id, lead_id)
+    INCLUDE (duration_minutes)
+    WHERE event_type = 'zoom_participant_left';
+
+-- 3. Refrescar visibility map y estadísticas para que el planner elija el
+--    index-only scan desde el primer cálculo.
+VACUUM (ANALYZE) ek_lead_events;
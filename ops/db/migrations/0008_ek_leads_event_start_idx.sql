@@ -0,0 +1,7 @@
+-- Einstein Kids: índice por fecha de evento
+-- ZoomAttendanceProcessor y los reportes filtran leads por día de evento con
+-- rangos semiabiertos (event_start_at >= día AND < día + 1) en lugar de
+-- DATE(event_start_at) = ..., que no podía usar ningún índice.
+CREATE INDEX IF NOT EXISTS idx_ek_leads_event_start_at
+    ON ek_leads (event_start_at, stage)
+    WHERE event_start_at IS NOT NULL;
@@ -0,0 +1,28 @@
+-- Einstein Kids: agregado de asistencia en tiempo real
+-- Una fila por (reunión, lead) mantenida por los webhooks participant_joined /
+-- participant_left. Los intervalos se guardan ya fusionados (reconexiones y
+-- dispositivos simultáneos no se cuentan doble), así que la segmentación post
+-- evento lee O(asistentes) filas en lugar de re-agregar ek_lead_events.
+CREATE TABLE IF NOT EXISTS ek_attendance_sessions (
+    meeting_id VARCHAR(100) NOT NULL,
+    lead_id UUID NOT NULL REFERENCES ek_leads(lead_id) ON DELETE CASCADE,
+    intervals JSONB NOT NULL DEFAULT '[]'::jsonb,   -- [[inicio, fin], ...] epoch segundos, fusionados
+    open_joins JSONB NOT NULL DEFAULT '[]'::jsonb,  -- conexiones abiertas (epoch segundos)
+    closed_joins JSONB NOT NULL DEFAULT '[]'::jsonb,   -- joins ya cerrados: un webhook reintentado no los reabre
+    orphan_leaves JSONB NOT NULL DEFAULT '[]'::jsonb,  -- leaves llegados antes que su join
+    attended_seconds INTEGER NOT NULL DEFAULT 0,
+    first_join_at TIMESTAMP WITH TIME ZONE,
+    last_leave_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (meeting_id, lead_id)
+);
+
+-- Zoom entrega webhooks al menos una vez y sin orden garantizado
+ALTER TABLE ek_attendance_sessions
+    ADD COLUMN IF NOT EXISTS closed_joins JSONB NOT NULL DEFAULT '[]'::jsonb,
+    ADD COLUMN IF NOT EXISTS orphan_leaves JSONB NOT NULL DEFAULT '[]'::jsonb;
+
+-- Dashboards en vivo: quién sigue conectado en la reunión
+CREATE INDEX IF NOT EXISTS idx_ek_attendance_sessions_open
+    ON ek_attendance_sessions (meeting_id)
+    WHERE open_joins <> '[]'::jsonb;
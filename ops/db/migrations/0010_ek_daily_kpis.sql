@@ -0,0 +1,34 @@
+-- Einstein Kids: rollup diario de KPIs
+-- Reportes y dashboard leen este rollup (O(días)) en lugar de recontar
+-- ek_leads / ek_ycloud_messages / ek_sales en cada request. Lo mantiene el
+-- job kpi_rollup.py de forma incremental a partir de un watermark.
+CREATE TABLE IF NOT EXISTS ek_daily_kpis (
+    tenant_id VARCHAR(80) NOT NULL DEFAULT 'einstein_kids',
+    day DATE NOT NULL,
+    avatar VARCHAR(20) NOT NULL,  -- mother | therapist | unknown
+    leads_new INTEGER NOT NULL DEFAULT 0,
+    messages_total INTEGER NOT NULL DEFAULT 0,
+    messages_outbound INTEGER NOT NULL DEFAULT 0,
+    messages_inbound INTEGER NOT NULL DEFAULT 0,
+    messages_delivered INTEGER NOT NULL DEFAULT 0,
+    messages_read INTEGER NOT NULL DEFAULT 0,
+    messages_failed INTEGER NOT NULL DEFAULT 0,
+    sales_count INTEGER NOT NULL DEFAULT 0,
+    sales_amount NUMERIC(14,2) NOT NULL DEFAULT 0,
+    event_registered INTEGER NOT NULL DEFAULT 0,
+    event_attended INTEGER NOT NULL DEFAULT 0,
+    event_partial INTEGER NOT NULL DEFAULT 0,
+    event_no_show INTEGER NOT NULL DEFAULT 0,
+    claims_total INTEGER NOT NULL DEFAULT 0,
+    claims_confirmed INTEGER NOT NULL DEFAULT 0,
+    claims_rejected INTEGER NOT NULL DEFAULT 0,
+    computed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (tenant_id, day, avatar)
+);
+
+-- Watermarks de los jobs de agregación (último instante procesado)
+CREATE TABLE IF NOT EXISTS ek_rollup_watermarks (
+    name VARCHAR(100) PRIMARY KEY,
+    watermark TIMESTAMP WITH TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
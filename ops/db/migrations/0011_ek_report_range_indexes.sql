@@ -0,0 +1,26 @@
+-- Einstein Kids: índices por rango de tiempo para reportes
+-- El reporte diario/semanal (kpi_rollup.READ_KPIS_SQL) filtra cada tabla con
+-- rangos semiabiertos (col >= día AND col < día + 1) y agrega con FILTER; estos
+-- índices convierten cada fuente en un index range scan en lugar de un seq scan.
+
+-- Leads nuevos por día
+CREATE INDEX IF NOT EXISTS idx_ek_leads_created_at
+    ON ek_leads (created_at);
+
+-- Mensajes por día, dirección y estado; lead_id incluido para resolver el
+-- avatar sin volver al heap (index-only scan).
+CREATE INDEX IF NOT EXISTS idx_ek_ycloud_messages_created_dir_status
+    ON ek_ycloud_messages (created_at, direction, status)
+    INCLUDE (lead_id);
+
+-- Ventas confirmadas por día de confirmación
+CREATE INDEX IF NOT EXISTS idx_ek_sales_status_confirmed_at
+    ON ek_sales (status, confirmed_at);
+
+-- Claims por día de creación
+CREATE INDEX IF NOT EXISTS idx_ek_sales_created_at
+    ON ek_sales (created_at);
+
+ANALYZE ek_leads;
+ANALYZE ek_ycloud_messages;
+ANALYZE ek_sales;
@@ -0,0 +1,27 @@
+-- Einstein Kids: funnel de conversión precalculado
+-- generate_conversion_funnel recalculaba GROUP BY + window functions sobre
+-- ek_leads JOIN ek_sales en cada request. La vista materializada guarda un
+-- bucket por (día de cohorte, avatar, etapa); cualquier rango de fechas se
+-- responde sumando buckets. Se refresca CONCURRENTLY (refresh_funnel.py y al
+-- final de compute_attendance), por eso necesita el índice único.
+CREATE MATERIALIZED VIEW IF NOT EXISTS ek_funnel_daily AS
+SELECT
+    l.created_at::date AS cohort_day,
+    COALESCE(l.avatar, 'unknown') AS avatar,
+    COALESCE(l.stage, 'UNKNOWN') AS stage,
+    COUNT(*)::int AS leads,
+    COUNT(s.lead_id)::int AS converted_leads,
+    COALESCE(SUM(s.sales), 0)::int AS sales,
+    COALESCE(SUM(s.amount), 0)::numeric(14,2) AS sales_amount
+FROM ek_leads l
+LEFT JOIN (
+    SELECT lead_id, COUNT(*) AS sales, SUM(amount) AS amount
+    FROM ek_sales
+    WHERE status = 'confirmed'
+    GROUP BY lead_id
+) s ON s.lead_id = l.lead_id
+WHERE l.created_at IS NOT NULL
+GROUP BY 1, 2, 3;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ek_funnel_daily_pk
+    ON ek_funnel_daily (cohort_day, avatar, stage);
@@ -0,0 +1,59 @@
+-- Einstein Kids: leads calientes paginados por keyset
+-- generate_hot_leads_report hacía GROUP BY de ek_leads JOIN ek_ycloud_messages
+-- por cada columna del lead solo para contar mensajes. Ahora el conteo y la
+-- última interacción se mantienen en ek_leads al escribir, y el listado es un
+-- index scan por (score DESC, lead_id DESC) a costo constante por página.
+
+-- 1. Contadores denormalizados por lead
+ALTER TABLE ek_leads ADD COLUMN IF NOT EXISTS last_interaction_at TIMESTAMP WITH TIME ZONE;
+ALTER TABLE ek_leads ADD COLUMN IF NOT EXISTS message_count INTEGER NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION ek_leads_track_message()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE ek_leads
+        SET message_count = message_count + 1,
+            last_interaction_at = GREATEST(COALESCE(last_interaction_at, NEW.created_at), NEW.created_at)
+        WHERE lead_id = NEW.lead_id;
+        RETURN NEW;
+    END IF;
+
+    UPDATE ek_leads
+    SET message_count = GREATEST(message_count - 1, 0)
+    WHERE lead_id = OLD.lead_id;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_ek_ycloud_messages_track_lead ON ek_ycloud_messages;
+CREATE TRIGGER trg_ek_ycloud_messages_track_lead
+    AFTER INSERT OR DELETE ON ek_ycloud_messages
+    FOR EACH ROW
+    EXECUTE FUNCTION ek_leads_track_message();
+
+-- 2. Backfill desde el histórico
+UPDATE ek_leads l
+SET message_count = m.total,
+    last_interaction_at = m.last_at
+FROM (
+    SELECT lead_id, COUNT(*) AS total, MAX(created_at) AS last_at
+    FROM ek_ycloud_messages
+    WHERE lead_id IS NOT NULL
+    GROUP BY lead_id
+) m
+WHERE l.lead_id = m.lead_id;
+
+-- 3. Índice parcial de cobertura para el listado. lead_id va DESC para que el
+--    keyset (score, lead_id) < (%s, %s) sea un rango contiguo del índice.
+--    message_count/last_interaction_at quedan fuera del INCLUDE a propósito:
+--    así el UPDATE del trigger sigue siendo HOT y cada página solo lee del
+--    heap las filas que devuelve.
+CREATE INDEX IF NOT EXISTS idx_ek_leads_hot
+    ON ek_leads (score DESC, lead_id DESC)
+    INCLUDE (name, phone, email, avatar, stage, created_at)
+    WHERE score >= 70;
+
+DROP INDEX IF EXISTS idx_ek_leads_score;
+
+ANALYZE ek_leads;
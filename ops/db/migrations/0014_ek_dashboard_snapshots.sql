@@ -0,0 +1,10 @@
+-- Einstein Kids: snapshots versionados del dashboard
+-- dashboard_snapshot.py calcula el payload completo en segundo plano y lo
+-- guarda aquí; los procesos que arrancan sirven este blob de inmediato en vez
+-- de lanzar todas las consultas del dashboard contra la base primaria.
+CREATE TABLE IF NOT EXISTS ek_dashboard_snapshots (
+    name VARCHAR(100) PRIMARY KEY,
+    version BIGINT NOT NULL,
+    payload JSONB NOT NULL,
+    generated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,225 @@
+-- Einstein Kids: particionado mensual de ek_lead_events y ek_ycloud_messages
+-- Ambas tablas crecen con cada webhook (mensajes, status, asistencia, IA). Como
+-- heap único, vacuum, bloat de índices y scans por rango empeoran cada mes.
+-- Se convierten a particionado nativo por rango mensual:
+--   * ek_lead_events por ts (su columna de tiempo; no tiene created_at)
+--   * ek_ycloud_messages por created_at
+-- ek_ensure_monthly_partitions crea particiones futuras y
+-- ek_detach_old_partitions aplica retención; ambas las llama
+-- partition_maintenance.py de forma programada.
+--
+-- ek_lead_events nunca se desacopla: lead_scoring y ek_rebuild_lead_timeline
+-- reconstruyen todo desde el log de eventos completo, y una partición
+-- desacoplada cambiaría en silencio el score y la timeline de los leads viejos.
+
+-- 1. Funciones de mantenimiento (límites de mes en UTC)
+CREATE OR REPLACE FUNCTION ek_partition_name(parent TEXT, month DATE)
+RETURNS TEXT AS $$
+    SELECT format('%s_p%s', parent, to_char(month, 'YYYYMM'));
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION ek_ensure_monthly_partitions(
+    parent TEXT,
+    from_month DATE DEFAULT NULL,
+    months_ahead INTEGER DEFAULT 3
+)
+RETURNS INTEGER AS $$
+DECLARE
+    current_month DATE := date_trunc('month', COALESCE(from_month, (NOW() AT TIME ZONE 'UTC')::date))::date;
+    last_month DATE := (date_trunc('month', NOW() AT TIME ZONE 'UTC') + make_interval(months => months_ahead))::date;
+    part TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE current_month <= last_month LOOP
+        part := ek_partition_name(parent, current_month);
+        IF to_regclass(part) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                part,
+                parent,
+                current_month::timestamp AT TIME ZONE 'UTC',
+                (current_month + INTERVAL '1 month')::timestamp AT TIME ZONE 'UTC'
+            );
+            created := created + 1;
+        END IF;
+        current_month := (current_month + INTERVAL '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION ek_detach_old_partitions(
+    parent TEXT,
+    keep_months INTEGER,
+    drop_detached BOOLEAN DEFAULT FALSE
+)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', NOW() AT TIME ZONE 'UTC') - make_interval(months => keep_months))::date;
+    part RECORD;
+BEGIN
+    IF parent = 'ek_lead_events' THEN
+        RAISE EXCEPTION 'ek_lead_events is the replay source for full rebuilds and cannot be detached';
+    END IF;
+
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = parent::regclass
+          AND c.relname ~ ('^' || parent || '_p[0-9]{6}$')
+          AND to_date(right(c.relname, 6), 'YYYYMM') < cutoff
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', parent, part.relname);
+        IF drop_detached THEN
+            EXECUTE format('DROP TABLE %I', part.relname);
+        END IF;
+        RETURN NEXT part.relname;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Renombra los índices de una tabla legacy para liberar los nombres canónicos
+CREATE OR REPLACE FUNCTION ek_rename_legacy_indexes(legacy TEXT)
+RETURNS VOID AS $$
+DECLARE
+    idx RECORD;
+BEGIN
+    FOR idx IN
+        SELECT c.relname
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = legacy::regclass
+    LOOP
+        EXECUTE format('ALTER INDEX %I RENAME TO %I', idx.relname, left(idx.relname, 52) || '_legacy');
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 2. Dedupe global de ycloud_message_id: un UNIQUE en la tabla particionada
+--    tendría que incluir created_at, así que la unicidad vive en esta tabla
+--    de llaves. También resuelve el created_at (y por tanto la partición) de
+--    un mensaje para los callbacks de status.
+CREATE TABLE IF NOT EXISTS ek_ycloud_message_keys (
+    ycloud_message_id VARCHAR(100) PRIMARY KEY,
+    message_id UUID NOT NULL DEFAULT gen_random_uuid(),
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_ek_ycloud_message_keys_created_at
+    ON ek_ycloud_message_keys (created_at);
+
+-- 3. ek_lead_events -> particionada por ts
+DO $$
+DECLARE
+    first_month DATE;
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'ek_lead_events' AND relkind = 'r') THEN
+        ALTER TABLE ek_lead_events RENAME TO ek_lead_events_legacy;
+        PERFORM ek_rename_legacy_indexes('ek_lead_events_legacy');
+
+        CREATE TABLE ek_lead_events (
+            event_id UUID NOT NULL DEFAULT gen_random_uuid(),
+            lead_id UUID REFERENCES ek_leads(lead_id) ON DELETE CASCADE,
+            event_type VARCHAR(100) NOT NULL,
+            payload JSONB NOT NULL,
+            ts TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+            meeting_id TEXT GENERATED ALWAYS AS (payload->>'meeting_id') STORED,
+            duration_minutes INTEGER GENERATED ALWAYS AS (
+                CASE
+                    WHEN (payload->>'duration_minutes') ~ '^[0-9]{1,9}$'
+                    THEN (payload->>'duration_minutes')::integer
+                END
+            ) STORED,
+            PRIMARY KEY (event_id, ts)
+        ) PARTITION BY RANGE (ts);
+
+        CREATE TABLE ek_lead_events_default PARTITION OF ek_lead_events DEFAULT;
+
+        SELECT date_trunc('month', MIN(ts) AT TIME ZONE 'UTC')::date INTO first_month
+        FROM ek_lead_events_legacy;
+        PERFORM ek_ensure_monthly_partitions('ek_lead_events', first_month, 3);
+
+        INSERT INTO ek_lead_events (event_id, lead_id, event_type, payload, ts)
+        SELECT event_id, lead_id, event_type, payload, COALESCE(ts, NOW())
+        FROM ek_lead_events_legacy;
+
+        DROP TABLE ek_lead_events_legacy;
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_ek_lead_events_lead_id ON ek_lead_events (lead_id, ts);
+CREATE INDEX IF NOT EXISTS idx_ek_lead_events_type ON ek_lead_events (event_type, ts);
+CREATE INDEX IF NOT EXISTS idx_ek_lead_events_zoom_left_meeting
+    ON ek_lead_events (meeting_id, lead_id)
+    INCLUDE (duration_minutes)
+    WHERE event_type = 'zoom_participant_left';
+
+-- 4. ek_ycloud_messages -> particionada por created_at
+DO $$
+DECLARE
+    first_month DATE;
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'ek_ycloud_messages' AND relkind = 'r') THEN
+        ALTER TABLE ek_ycloud_messages RENAME TO ek_ycloud_messages_legacy;
+        PERFORM ek_rename_legacy_indexes('ek_ycloud_messages_legacy');
+
+        CREATE TABLE ek_ycloud_messages (
+            id UUID NOT NULL DEFAULT gen_random_uuid(),
+            ycloud_message_id VARCHAR(100),
+            lead_id UUID REFERENCES ek_leads(lead_id) ON DELETE CASCADE,
+            direction VARCHAR(20) CHECK (direction IN ('inbound', 'outbound')),
+            message_type VARCHAR(20) CHECK (message_type IN ('text', 'template', 'interactive', 'media')),
+            template_key VARCHAR(100),
+            template_name VARCHAR(100),
+            content JSONB NOT NULL,
+            status VARCHAR(20) CHECK (status IN ('accepted', 'sent', 'delivered', 'read', 'failed')),
+            sent_at TIMESTAMP WITH TIME ZONE,
+            delivered_at TIMESTAMP WITH TIME ZONE,
+            read_at TIMESTAMP WITH TIME ZONE,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at);
+
+        CREATE TABLE ek_ycloud_messages_default PARTITION OF ek_ycloud_messages DEFAULT;
+
+        SELECT date_trunc('month', MIN(created_at) AT TIME ZONE 'UTC')::date INTO first_month
+        FROM ek_ycloud_messages_legacy;
+        PERFORM ek_ensure_monthly_partitions('ek_ycloud_messages', first_month, 3);
+
+        -- Se copia antes de crear el trigger de contadores (abajo): message_count
+        -- ya está al día y no debe contarse otra vez.
+        INSERT INTO ek_ycloud_messages (
+            id, ycloud_message_id, lead_id, direction, message_type, template_key, template_name,
+            content, status, sent_at, delivered_at, read_at, created_at
+        )
+        SELECT id, ycloud_message_id, lead_id, direction, message_type, template_key, template_name,
+               content, status, sent_at, delivered_at, read_at, COALESCE(created_at, NOW())
+        FROM ek_ycloud_messages_legacy;
+
+        INSERT INTO ek_ycloud_message_keys (ycloud_message_id, message_id, created_at)
+        SELECT ycloud_message_id, id, COALESCE(created_at, NOW())
+        FROM ek_ycloud_messages_legacy
+        WHERE ycloud_message_id IS NOT NULL
+        ON CONFLICT (ycloud_message_id) DO NOTHING;
+
+        DROP TABLE ek_ycloud_messages_legacy;
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_ek_ycloud_messages_lead_id ON ek_ycloud_messages (lead_id);
+CREATE INDEX IF NOT EXISTS idx_ek_ycloud_messages_yc_id ON ek_ycloud_messages (ycloud_message_id);
+CREATE INDEX IF NOT EXISTS idx_ek_ycloud_messages_created_dir_status
+    ON ek_ycloud_messages (created_at, direction, status)
+    INCLUDE (lead_id);
+
+-- Trigger de contadores por lead (0013), ahora sobre la tabla particionada
+DROP TRIGGER IF EXISTS trg_ek_ycloud_messages_track_lead ON ek_ycloud_messages;
+CREATE TRIGGER trg_ek_ycloud_messages_track_lead
+    AFTER INSERT OR DELETE ON ek_ycloud_messages
+    FOR EACH ROW
+    EXECUTE FUNCTION ek_leads_track_message();
+
+ANALYZE ek_lead_events;
+ANALYZE ek_ycloud_messages;
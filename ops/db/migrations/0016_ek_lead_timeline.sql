@@ -0,0 +1,263 @@
+-- Einstein Kids: timeline desnormalizada por lead
+-- "¿Qué pasó con este lead?" requería leer ek_lead_events, ek_ycloud_messages,
+-- ek_jobs y ek_sales por separado. ek_lead_timeline guarda, por lead y mes,
+-- un arreglo jsonb compacto y ordenado cronológicamente con lo ocurrido en las
+-- cuatro fuentes; leer los últimos N elementos es un lookup por la PK.
+--
+-- Se mantiene con triggers por sentencia (tablas de transición): cada INSERT
+-- multi-fila del EventEmitter, o cualquier INSERT ... SELECT, agrega sus
+-- elementos con un solo upsert por (lead, mes).
+--
+-- Cada elemento: {"ts", "source": event|message|sale|job, "type", "data"}
+
+CREATE TABLE IF NOT EXISTS ek_lead_timeline (
+    lead_id UUID NOT NULL REFERENCES ek_leads(lead_id) ON DELETE CASCADE,
+    month DATE NOT NULL,
+    items JSONB NOT NULL DEFAULT '[]'::jsonb,
+    item_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (lead_id, month)
+);
+
+-- 1. Helpers
+-- Ordena por ts y aplica el tope por (lead, mes): conserva los 500 más recientes.
+-- El orden se recalcula en cada upsert porque una sentencia puede traer
+-- elementos anteriores a los ya guardados (ts explícito, reintentos, backfill).
+-- A igual ts se respeta el orden de llegada. STABLE por el cast a timestamptz.
+CREATE OR REPLACE FUNCTION ek_timeline_cap(items JSONB)
+RETURNS JSONB AS $$
+    SELECT COALESCE(jsonb_agg(e.item ORDER BY e.ts, e.ord), '[]'::jsonb)
+    FROM (
+        SELECT a.item, a.ord, (a.item->>'ts')::timestamptz AS ts
+        FROM jsonb_array_elements(items) WITH ORDINALITY AS a(item, ord)
+        ORDER BY (a.item->>'ts')::timestamptz DESC, a.ord DESC
+        LIMIT 500
+    ) e;
+$$ LANGUAGE sql STABLE;
+
+-- STABLE, no IMMUTABLE: el timestamptz se serializa según el TimeZone de la sesión
+CREATE OR REPLACE FUNCTION ek_timeline_item(ts TIMESTAMP WITH TIME ZONE, source TEXT, item_type TEXT, data JSONB)
+RETURNS JSONB AS $$
+    SELECT jsonb_build_object('ts', ts, 'source', source, 'type', item_type, 'data', jsonb_strip_nulls(data));
+$$ LANGUAGE sql STABLE;
+
+-- Eventos que ya aparecen como su fila de origen (el mensaje) no se duplican
+CREATE OR REPLACE FUNCTION ek_timeline_skipped_event(event_type TEXT)
+RETURNS BOOLEAN AS $$
+    SELECT event_type IN ('ycloud_inbound_message', 'ycloud_message_status');
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Upsert agrupado por (lead, mes) de los elementos de una sentencia; en
+-- conflicto, la unión con lo guardado se reordena por ts antes del tope.
+-- Amplificación de escritura: jsonb no se modifica en sitio, así que cada
+-- sentencia que toca un (lead, mes) reescribe el arreglo completo (hasta 500
+-- elementos, TOAST incluido) y deja una versión muerta de la fila. Es aceptable
+-- porque las escrituras por lead son pocas y llegan agrupadas por sentencia
+-- (EventEmitter); si un lead concentra muchas sentencias sueltas, bajar el tope
+-- de ek_timeline_cap o particionar el bucket por semana en vez de por mes.
+CREATE OR REPLACE FUNCTION ek_timeline_append(
+    p_lead_ids UUID[],
+    p_ts TIMESTAMP WITH TIME ZONE[],
+    p_items JSONB[]
+)
+RETURNS VOID AS $$
+    INSERT INTO ek_lead_timeline AS t (lead_id, month, items, item_count)
+    SELECT u.lead_id,
+           date_trunc('month', u.ts AT TIME ZONE 'UTC')::date,
+           ek_timeline_cap(jsonb_agg(u.item ORDER BY u.ts)),
+           LEAST(COUNT(*), 500)
+    FROM unnest(p_lead_ids, p_ts, p_items) AS u(lead_id, ts, item)
+    WHERE u.lead_id IS NOT NULL AND u.ts IS NOT NULL
+    GROUP BY u.lead_id, date_trunc('month', u.ts AT TIME ZONE 'UTC')::date
+    ON CONFLICT (lead_id, month) DO UPDATE
+    SET items = ek_timeline_cap(t.items || EXCLUDED.items),
+        item_count = LEAST(t.item_count + EXCLUDED.item_count, 500),
+        updated_at = NOW();
+$$ LANGUAGE sql;
+
+-- 2. Funciones de trigger (una llamada a ek_timeline_append por sentencia)
+CREATE OR REPLACE FUNCTION ek_timeline_from_events()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM ek_timeline_append(
+        array_agg(n.lead_id),
+        array_agg(n.ts),
+        array_agg(ek_timeline_item(n.ts, 'event', n.event_type, n.payload - 'raw'))
+    )
+    FROM new_rows n
+    WHERE NOT ek_timeline_skipped_event(n.event_type);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION ek_timeline_from_messages()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM ek_timeline_append(
+        array_agg(n.lead_id),
+        array_agg(n.created_at),
+        array_agg(ek_timeline_item(n.created_at, 'message', n.direction, jsonb_build_object(
+            'message_id', n.id,
+            'message_type', n.message_type,
+            'template_key', n.template_key,
+            'text', left(n.content #>> '{text,body}', 280)
+        )))
+    )
+    FROM new_rows n;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Ventas: alta (INSERT) y cambio de estado (UPDATE)
+CREATE OR REPLACE FUNCTION ek_timeline_from_sales()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM ek_timeline_append(
+            array_agg(n.lead_id),
+            array_agg(COALESCE(n.created_at, NOW())),
+            array_agg(ek_timeline_item(COALESCE(n.created_at, NOW()), 'sale', n.status, jsonb_build_object(
+                'sale_id', n.sale_id, 'amount', n.amount, 'currency', n.currency
+            )))
+        )
+        FROM new_rows n;
+    ELSE
+        PERFORM ek_timeline_append(
+            array_agg(n.lead_id),
+            array_agg(COALESCE(n.confirmed_at, NOW())),
+            array_agg(ek_timeline_item(COALESCE(n.confirmed_at, NOW()), 'sale', n.status, jsonb_build_object(
+                'sale_id', n.sale_id, 'amount', n.amount, 'currency', n.currency, 'actor', n.confirmed_by
+            )))
+        )
+        FROM new_rows n
+        JOIN old_rows o ON o.sale_id = n.sale_id
+        WHERE o.status IS DISTINCT FROM n.status;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Jobs: programación (INSERT) y resultado (UPDATE de status)
+CREATE OR REPLACE FUNCTION ek_timeline_from_jobs()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM ek_timeline_append(
+            array_agg(n.lead_id),
+            array_agg(COALESCE(n.created_at, NOW())),
+            array_agg(ek_timeline_item(COALESCE(n.created_at, NOW()), 'job', n.job_type, jsonb_build_object(
+                'job_id', n.job_id, 'status', n.status, 'run_at', n.run_at
+            )))
+        )
+        FROM new_rows n;
+    ELSE
+        PERFORM ek_timeline_append(
+            array_agg(n.lead_id),
+            array_agg(NOW()),
+            array_agg(ek_timeline_item(NOW(), 'job', n.job_type, jsonb_build_object(
+                'job_id', n.job_id, 'status', n.status, 'run_at', n.run_at, 'error', left(n.last_error, 280)
+            )))
+        )
+        FROM new_rows n
+        JOIN old_rows o ON o.job_id = n.job_id
+        WHERE o.status IS DISTINCT FROM n.status;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 3. Triggers por sentencia (se permiten en la raíz de una tabla particionada)
+DROP TRIGGER IF EXISTS trg_ek_lead_events_timeline ON ek_lead_events;
+CREATE TRIGGER trg_ek_lead_events_timeline
+    AFTER INSERT ON ek_lead_events
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION ek_timeline_from_events();
+
+DROP TRIGGER IF EXISTS trg_ek_ycloud_messages_timeline ON ek_ycloud_messages;
+CREATE TRIGGER trg_ek_ycloud_messages_timeline
+    AFTER INSERT ON ek_ycloud_messages
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION ek_timeline_from_messages();
+
+DROP TRIGGER IF EXISTS trg_ek_sales_timeline_insert ON ek_sales;
+CREATE TRIGGER trg_ek_sales_timeline_insert
+    AFTER INSERT ON ek_sales
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION ek_timeline_from_sales();
+
+DROP TRIGGER IF EXISTS trg_ek_sales_timeline_update ON ek_sales;
+CREATE TRIGGER trg_ek_sales_timeline_update
+    AFTER UPDATE ON ek_sales
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION ek_timeline_from_sales();
+
+DROP TRIGGER IF EXISTS trg_ek_jobs_timeline_insert ON ek_jobs;
+CREATE TRIGGER trg_ek_jobs_timeline_insert
+    AFTER INSERT ON ek_jobs
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION ek_timeline_from_jobs();
+
+DROP TRIGGER IF EXISTS trg_ek_jobs_timeline_update ON ek_jobs;
+CREATE TRIGGER trg_ek_jobs_timeline_update
+    AFTER UPDATE ON ek_jobs
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION ek_timeline_from_jobs();
+
+-- 4. Reconstrucción desde el histórico (backfill completo o un lead puntual).
+--    De ventas y jobs solo existe su estado actual, no las transiciones.
+CREATE OR REPLACE FUNCTION ek_rebuild_lead_timeline(p_lead_id UUID DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    rebuilt INTEGER;
+BEGIN
+    DELETE FROM ek_lead_timeline WHERE p_lead_id IS NULL OR lead_id = p_lead_id;
+
+    INSERT INTO ek_lead_timeline (lead_id, month, items, item_count)
+    SELECT src.lead_id,
+           date_trunc('month', src.ts AT TIME ZONE 'UTC')::date,
+           ek_timeline_cap(jsonb_agg(src.item ORDER BY src.ts)),
+           LEAST(COUNT(*), 500)
+    FROM (
+        SELECT e.lead_id, e.ts, ek_timeline_item(e.ts, 'event', e.event_type, e.payload - 'raw') AS item
+        FROM ek_lead_events e
+        WHERE NOT ek_timeline_skipped_event(e.event_type)
+          AND (p_lead_id IS NULL OR e.lead_id = p_lead_id)
+        UNION ALL
+        SELECT m.lead_id, m.created_at, ek_timeline_item(m.created_at, 'message', m.direction, jsonb_build_object(
+            'message_id', m.id, 'message_type', m.message_type, 'template_key', m.template_key,
+            'text', left(m.content #>> '{text,body}', 280)
+        ))
+        FROM ek_ycloud_messages m
+        WHERE p_lead_id IS NULL OR m.lead_id = p_lead_id
+        UNION ALL
+        SELECT s.lead_id, COALESCE(s.confirmed_at, s.created_at),
+               ek_timeline_item(COALESCE(s.confirmed_at, s.created_at), 'sale', s.status, jsonb_build_object(
+                   'sale_id', s.sale_id, 'amount', s.amount, 'currency', s.currency, 'actor', s.confirmed_by
+               ))
+        FROM ek_sales s
+        WHERE p_lead_id IS NULL OR s.lead_id = p_lead_id
+        UNION ALL
+        SELECT j.lead_id, COALESCE(j.updated_at, j.created_at),
+               ek_timeline_item(COALESCE(j.updated_at, j.created_at), 'job', j.job_type, jsonb_build_object(
+                   'job_id', j.job_id, 'status', j.status, 'run_at', j.run_at, 'error', left(j.last_error, 280)
+               ))
+        FROM ek_jobs j
+        WHERE p_lead_id IS NULL OR j.lead_id = p_lead_id
+    ) src
+    WHERE src.lead_id IS NOT NULL AND src.ts IS NOT NULL
+    GROUP BY src.lead_id, date_trunc('month', src.ts AT TIME ZONE 'UTC')::date;
+
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+    RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ek_rebuild_lead_timeline();
+
+ANALYZE ek_lead_timeline;
@@ -0,0 +1,29 @@
+-- Einstein Kids: score y etapa derivados del log de eventos
+-- Antes cada script hacía "score = score + N" sobre ek_leads dentro de su
+-- transacción: nada se podía recalcular y los updates concurrentes competían
+-- por la misma fila. lead_scoring.py pliega ek_lead_events con las reglas de
+-- resources/einstein_kids/scoring.yaml y escribe en lote solo los leads que
+-- cambian.
+
+-- 1. Estado por lead (snapshot del pliegue) y versión de reglas que lo produjo
+CREATE TABLE IF NOT EXISTS ek_lead_score_state (
+    lead_id UUID PRIMARY KEY REFERENCES ek_leads(lead_id) ON DELETE CASCADE,
+    score INTEGER NOT NULL DEFAULT 0,
+    stage VARCHAR(50),
+    event_count INTEGER NOT NULL DEFAULT 0,
+    last_event_ts TIMESTAMP WITH TIME ZONE,
+    rules_version VARCHAR(64) NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- 2. Cursor del procesamiento incremental: último (ts, event_id) aplicado
+CREATE TABLE IF NOT EXISTS ek_scoring_cursor (
+    name VARCHAR(100) PRIMARY KEY,
+    last_ts TIMESTAMP WITH TIME ZONE,
+    last_event_id UUID,
+    rules_version VARCHAR(64),
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- 3. Lectura incremental en orden (ts, event_id) como rango de índice
+CREATE INDEX IF NOT EXISTS idx_ek_lead_events_ts_event ON ek_lead_events (ts, event_id);
@@ -0,0 +1,27 @@
+-- Verifica que las columnas generadas de ek_lead_events reflejen el payload Zoom
+DO $$
+DECLARE
+  v_lead UUID;
+  v_meeting TEXT;
+  v_duration INTEGER;
+BEGIN
+  INSERT INTO ek_leads (name, phone_normalized)
+  VALUES ('Test Attendance', '+520000000026')
+  RETURNING lead_id INTO v_lead;
+
+  INSERT INTO ek_lead_events (lead_id, event_type, payload)
+  VALUES (v_lead, 'zoom_participant_left', '{"meeting_id":"mtg-026","duration_minutes":"42"}');
+
+  SELECT meeting_id, duration_minutes INTO v_meeting, v_duration
+  FROM ek_lead_events
+  WHERE lead_id = v_lead AND event_type = 'zoom_participant_left';
+
+  IF v_meeting IS DISTINCT FROM 'mtg-026' OR v_duration IS DISTINCT FROM 42 THEN
+    RAISE EXCEPTION 'Generated attendance columns mismatch: % / %', v_meeting, v_duration;
+  END IF;
+
+  INSERT INTO ek_lead_events (lead_id, event_type, payload)
+  VALUES (v_lead, 'zoom_participant_left', '{"meeting_id":"mtg-026","duration_minutes":"n/a"}');
+
+  DELETE FROM ek_leads WHERE lead_id = v_lead;
+END $$;
@@ -0,0 +1,74 @@
+-- Verifica que ek_lead_timeline se mantiene al escribir en las tablas fuente
+DO $$
+DECLARE
+  v_lead UUID;
+  v_sale UUID;
+  v_items JSONB;
+  v_capped JSONB;
+BEGIN
+  INSERT INTO ek_leads (name, phone_normalized)
+  VALUES ('Test Timeline', '+520000000039')
+  RETURNING lead_id INTO v_lead;
+
+  -- Un INSERT multi-fila (como el EventEmitter) agrega ambos eventos
+  INSERT INTO ek_lead_events (lead_id, event_type, payload)
+  VALUES (v_lead, 'custom_a', '{"k": 1}'), (v_lead, 'custom_b', '{"k": null}');
+
+  -- Los status de mensajes no se duplican en la timeline
+  INSERT INTO ek_lead_events (lead_id, event_type, payload)
+  VALUES (v_lead, 'ycloud_message_status', '{"status": "read"}');
+
+  INSERT INTO ek_ycloud_messages (ycloud_message_id, lead_id, direction, message_type, content, status)
+  VALUES ('wamid-039', v_lead, 'inbound', 'text', '{"text": {"body": "hola"}}', 'accepted');
+
+  INSERT INTO ek_sales (lead_id, status, amount) VALUES (v_lead, 'claimed', 997) RETURNING sale_id INTO v_sale;
+  UPDATE ek_sales SET status = 'confirmed', confirmed_at = NOW() WHERE sale_id = v_sale;
+  UPDATE ek_sales SET updated_at = NOW() WHERE sale_id = v_sale;  -- sin cambio de status
+
+  SELECT items INTO v_items
+  FROM ek_lead_timeline
+  WHERE lead_id = v_lead AND month = date_trunc('month', NOW() AT TIME ZONE 'UTC')::date;
+
+  IF jsonb_array_length(v_items) <> 5 THEN
+    RAISE EXCEPTION 'Expected 5 timeline items, got %', jsonb_array_length(v_items);
+  END IF;
+  IF EXISTS (
+    SELECT 1 FROM jsonb_array_elements(v_items) AS e(item)
+    WHERE e.item->>'type' = 'custom_b' AND e.item->'data' <> '{}'::jsonb
+  ) THEN
+    RAISE EXCEPTION 'Null payload values should be stripped: %', v_items;
+  END IF;
+  IF v_items->2->'data'->>'text' <> 'hola' OR v_items->4->>'type' <> 'confirmed' THEN
+    RAISE EXCEPTION 'Unexpected timeline items: %', v_items;
+  END IF;
+
+  -- Un evento con ts anterior, escrito después, queda en su lugar cronológico
+  INSERT INTO ek_lead_events (lead_id, event_type, payload, ts)
+  VALUES (v_lead, 'custom_late', '{}', NOW() - INTERVAL '1 hour');
+
+  SELECT items INTO v_items
+  FROM ek_lead_timeline
+  WHERE lead_id = v_lead AND month = date_trunc('month', NOW() AT TIME ZONE 'UTC')::date;
+
+  IF date_trunc('month', (NOW() - INTERVAL '1 hour') AT TIME ZONE 'UTC') = date_trunc('month', NOW() AT TIME ZONE 'UTC')
+     AND v_items->0->>'type' <> 'custom_late' THEN
+    RAISE EXCEPTION 'Late item should be first: %', v_items;
+  END IF;
+
+  -- El tope descarta los más antiguos, no los primeros del arreglo
+  SELECT jsonb_agg(ek_timeline_item(NOW() - make_interval(mins => g), 'event', 'n' || g, '{}') ORDER BY g)
+  INTO v_capped
+  FROM generate_series(0, 500) AS g;
+  v_capped := ek_timeline_cap(v_capped);
+  IF jsonb_array_length(v_capped) <> 500 OR v_capped->0->>'type' <> 'n499' OR v_capped->499->>'type' <> 'n0' THEN
+    RAISE EXCEPTION 'Cap should keep the 500 newest items in order: % .. %', v_capped->0, v_capped->499;
+  END IF;
+
+  -- La reconstrucción solo conserva el estado actual de cada venta
+  PERFORM ek_rebuild_lead_timeline(v_lead);
+  IF (SELECT SUM(item_count) FROM ek_lead_timeline WHERE lead_id = v_lead) <> 5 THEN
+    RAISE EXCEPTION 'Unexpected rebuilt timeline size';
+  END IF;
+
+  DELETE FROM ek_leads WHERE lead_id = v_lead;
+END $$;
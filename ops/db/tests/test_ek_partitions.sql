@@ -0,0 +1,49 @@
+-- Verifica el particionado mensual de ek_lead_events / ek_ycloud_messages
+DO $$
+DECLARE
+  v_lead UUID;
+  v_part TEXT;
+BEGIN
+  IF (SELECT relkind FROM pg_class WHERE relname = 'ek_lead_events') <> 'p'
+     OR (SELECT relkind FROM pg_class WHERE relname = 'ek_ycloud_messages') <> 'p' THEN
+    RAISE EXCEPTION 'ek_lead_events / ek_ycloud_messages must be partitioned';
+  END IF;
+
+  -- Crear particiones es idempotente
+  PERFORM ek_ensure_monthly_partitions('ek_ycloud_messages', NULL, 3);
+  IF ek_ensure_monthly_partitions('ek_ycloud_messages', NULL, 3) <> 0 THEN
+    RAISE EXCEPTION 'ek_ensure_monthly_partitions is not idempotent';
+  END IF;
+
+  INSERT INTO ek_leads (name, phone_normalized)
+  VALUES ('Test Partitions', '+520000000037')
+  RETURNING lead_id INTO v_lead;
+
+  INSERT INTO ek_ycloud_messages (ycloud_message_id, lead_id, direction, message_type, content, status)
+  VALUES ('wamid-037', v_lead, 'inbound', 'text', '{}', 'accepted');
+
+  SELECT tableoid::regclass::text INTO v_part
+  FROM ek_ycloud_messages
+  WHERE ycloud_message_id = 'wamid-037';
+
+  IF v_part IS DISTINCT FROM ek_partition_name('ek_ycloud_messages', (NOW() AT TIME ZONE 'UTC')::date) THEN
+    RAISE EXCEPTION 'Message routed to % instead of the current month partition', v_part;
+  END IF;
+
+  -- Nada dentro de la retención se desacopla
+  IF EXISTS (SELECT 1 FROM ek_detach_old_partitions('ek_ycloud_messages', 1200)) THEN
+    RAISE EXCEPTION 'Detached partitions within retention';
+  END IF;
+
+  -- El log de eventos nunca se desacopla (rebuilds completos)
+  BEGIN
+    PERFORM ek_detach_old_partitions('ek_lead_events', 1);
+    RAISE EXCEPTION 'ek_lead_events partitions must not be detachable';
+  EXCEPTION WHEN raise_exception THEN
+    IF SQLERRM NOT LIKE '%cannot be detached%' THEN
+      RAISE;
+    END IF;
+  END;
+
+  DELETE FROM ek_leads WHERE lead_id = v_lead;
+END $$;
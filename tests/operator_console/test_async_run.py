@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import importlib
+from pathlib import Path
+
+import httpx
+from fastapi.testclient import TestClient
+
+
+def _load_app(monkeypatch, tmp_path: Path):
+    db_path = tmp_path / "operator_console_async.db"
+    monkeypatch.setenv("OPERATOR_DB_URL", f"sqlite:///{db_path}")
+    monkeypatch.setenv("OPERATOR_ENV", "dev")
+    monkeypatch.setenv("OPERATOR_ADMIN_USER", "admin")
+    monkeypatch.setenv("OPERATOR_ADMIN_PASSWORD", "change_me")
+    monkeypatch.setenv("OPERATOR_JWT_SECRET", "test_secret_async_1234567890")
+    monkeypatch.setenv("OPERATOR_ALLOWED_ENDPOINT_HOSTS", "windmill-cyn")
+    monkeypatch.setenv("OPERATOR_TOKEN_TARGET_HOSTS", "windmill-cyn")
+    monkeypatch.setenv("WINDMILL_API_TOKEN", "wm_secret")
+
+    db = importlib.import_module("apps.operator_console.app.db")
+    models = importlib.import_module("apps.operator_console.app.models")
+    auth = importlib.import_module("apps.operator_console.app.auth")
+    importlib.reload(db)
+    importlib.reload(models)
+    importlib.reload(auth)
+    module = importlib.import_module("apps.operator_console.app.main")
+    module = importlib.reload(module)
+    importlib.import_module("apps.operator_console.app.migrations").migrate()
+    return module, TestClient(module.app)
+
+
+def test_run_uses_shared_async_client(monkeypatch, tmp_path: Path) -> None:
+    module, client = _load_app(monkeypatch, tmp_path)
+    token = client.post("/api/auth/login", json={"username": "admin", "password": "change_me"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}", "X-Operator-Tenant": "cyn"}
+
+    client_id = client.post("/api/clients", headers=headers, json={"name": "Cyn Async"}).json()["id"]
+    automation = client.post(
+        "/api/automations",
+        headers=headers,
+        json={
+            "client_id": client_id,
+            "name": "Async Run",
+            "run_endpoint": "https://windmill-cyn/api/run",
+            "payload_template": '{"source": "template"}',
+        },
+    ).json()
+
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(502, text="upstream down")
+
+    def blocking_request(*_: object, **__: object):
+        raise AssertionError("requests must not be used when an AsyncClient is configured")
+
+    monkeypatch.setattr(module.requests, "request", blocking_request)
+    module.app.state.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    try:
+        run = client.post(f"/api/automations/{automation['id']}/run", headers=headers, json={"payload": {"x": 1}})
+    finally:
+        del module.app.state.http_client
+
+    assert run.status_code == 200
+    body = run.json()
+    assert body["status"] == "error"
+    assert body["response_code"] == 502
+    assert body["response_body"] == "upstream down"
+    assert seen[0].headers["Authorization"] == "Bearer wm_secret"
+    assert seen[0].read() == b'{"source":"template","x":1}'
+
+    automations = client.get("/api/automations", headers=headers).json()
+    assert automations[0]["last_run_at"] is not None
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import importlib
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+
+def _load_module(monkeypatch, tmp_path: Path):
+    monkeypatch.setenv("OPERATOR_DB_URL", f"sqlite:///{tmp_path / 'operator_console_auth.db'}")
+    monkeypatch.setenv("OPERATOR_ENV", "dev")
+    monkeypatch.setenv("OPERATOR_ADMIN_USER", "admin")
+    monkeypatch.setenv("OPERATOR_ADMIN_PASSWORD", "change_me")
+    monkeypatch.setenv("OPERATOR_JWT_SECRET", "test_secret_auth_cache_1234567890")
+
+    db = importlib.import_module("apps.operator_console.app.db")
+    models = importlib.import_module("apps.operator_console.app.models")
+    auth = importlib.import_module("apps.operator_console.app.auth")
+    importlib.reload(db)
+    importlib.reload(models)
+    importlib.reload(auth)
+    module = importlib.reload(importlib.import_module("apps.operator_console.app.main"))
+    importlib.import_module("apps.operator_console.app.migrations").migrate()
+    return module, auth
+
+
+def test_verified_tokens_are_cached_until_expiry(monkeypatch, tmp_path: Path) -> None:
+    _, auth = _load_module(monkeypatch, tmp_path)
+    token = auth.create_token("admin")
+    calls = 0
+    real_decode = auth.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+    first = auth.verify_token(token)
+    assert auth.verify_token(token) == first
+    assert calls == 1
+    assert first.subject == "admin" and first.jti
+
+    assert auth.token_cache.get(token, now=first.expires_at) is None
+    with pytest.raises(HTTPException):
+        auth.verify_token(token + "x")
+
+
+def test_lru_evicts_least_recently_used() -> None:
+    from apps.operator_console.app.auth import TokenCache, VerifiedToken
+
+    cache = TokenCache(max_entries=2)
+    entry = VerifiedToken("admin", expires_at=100.0)
+    cache.put("a", entry)
+    cache.put("b", entry)
+    assert cache.get("a", now=0) == entry
+    cache.put("c", entry)
+    assert cache.get("b", now=0) is None
+    assert cache.get("a", now=0) == entry
+
+
+def test_logout_revokes_token_and_survives_resync(monkeypatch, tmp_path: Path) -> None:
+    module, auth = _load_module(monkeypatch, tmp_path)
+    client = TestClient(module.app)
+    token = client.post("/api/auth/login", json={"username": "admin", "password": "change_me"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/api/summary", headers=headers).status_code == 200
+    assert client.post("/api/auth/logout", headers=headers).status_code == 204
+    assert client.get("/api/summary", headers=headers).status_code == 401
+
+    # Another worker learns about the revocation from the table.
+    auth.revoked_tokens.replace([], now=0)
+    assert client.get("/api/summary", headers=headers).status_code == 200
+    module._sync_revocations()
+    assert client.get("/api/summary", headers=headers).status_code == 401
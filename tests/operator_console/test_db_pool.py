@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import importlib
+from pathlib import Path
+
+from sqlalchemy import text
+
+
+def _load_db(monkeypatch, url: str):
+    monkeypatch.setenv("OPERATOR_DB_URL", url)
+    monkeypatch.setenv("OPERATOR_ENV", "dev")
+    return importlib.reload(importlib.import_module("apps.operator_console.app.db"))
+
+
+def test_sqlite_engine_uses_wal_busy_timeout_and_env_pool(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("OPERATOR_DB_POOL_SIZE", "3")
+    monkeypatch.setenv("OPERATOR_DB_MAX_OVERFLOW", "2")
+    monkeypatch.setenv("OPERATOR_SQLITE_BUSY_TIMEOUT_MS", "2500")
+    db = _load_db(monkeypatch, f"sqlite:///{tmp_path / 'pool.db'}")
+    try:
+        with db.engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 2500
+        assert db.engine.pool.size() == 3
+        assert db.engine.pool._max_overflow == 2
+        assert db.warm_up_pool() == 3
+        assert db.engine.pool.checkedout() == 0
+    finally:
+        db.close_engine()
+
+
+def test_postgres_kwargs_carry_statement_timeout(monkeypatch, tmp_path: Path) -> None:
+    db = _load_db(monkeypatch, f"sqlite:///{tmp_path / 'kwargs.db'}")
+    monkeypatch.setenv("OPERATOR_DB_STATEMENT_TIMEOUT_MS", "3000")
+    monkeypatch.setenv("OPERATOR_DB_POOL_RECYCLE", "not-a-number")
+    kwargs = db._engine_kwargs("postgresql://user:pass@db:5432/console")
+    assert kwargs["pool_pre_ping"] is True
+    assert kwargs["pool_recycle"] == 1800
+    assert "statement_timeout=3000" in kwargs["connect_args"]["options"]
+    assert "check_same_thread" not in kwargs["connect_args"]
+    db.close_engine()
@@ -32,6 +32,7 @@ def _load_app(monkeypatch, tmp_path: Path):
     importlib.reload(auth)
     module = importlib.import_module("apps.operator_console.app.main")
     module = importlib.reload(module)
+    importlib.import_module("apps.operator_console.app.migrations").migrate()
     return module, TestClient(module.app)
 
 
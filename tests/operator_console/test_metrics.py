@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import importlib
+from pathlib import Path
+
+import httpx
+from fastapi.testclient import TestClient
+
+
+def _load_module(monkeypatch, tmp_path: Path):
+    monkeypatch.setenv("OPERATOR_DB_URL", f"sqlite:///{tmp_path / 'operator_console_metrics.db'}")
+    monkeypatch.setenv("OPERATOR_ENV", "dev")
+    monkeypatch.setenv("OPERATOR_ADMIN_USER", "admin")
+    monkeypatch.setenv("OPERATOR_ADMIN_PASSWORD", "change_me")
+    monkeypatch.setenv("OPERATOR_JWT_SECRET", "test_secret_metrics_1234567890")
+    monkeypatch.setenv("OPERATOR_ALLOWED_ENDPOINT_HOSTS", "windmill-cyn")
+
+    db = importlib.import_module("apps.operator_console.app.db")
+    models = importlib.import_module("apps.operator_console.app.models")
+    auth = importlib.import_module("apps.operator_console.app.auth")
+    importlib.reload(db)
+    importlib.reload(models)
+    importlib.reload(auth)
+    module = importlib.reload(importlib.import_module("apps.operator_console.app.main"))
+    importlib.import_module("apps.operator_console.app.migrations").migrate()
+    return module
+
+
+def test_metrics_expose_route_run_pool_and_threadpool_series(monkeypatch, tmp_path: Path) -> None:
+    module = _load_module(monkeypatch, tmp_path)
+    with TestClient(module.app) as client:
+        module.app.state.http_client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, text="ok"))
+        )
+        token = client.post("/api/auth/login", json={"username": "admin", "password": "change_me"}).json()[
+            "access_token"
+        ]
+        headers = {"Authorization": f"Bearer {token}", "X-Operator-Tenant": "metrics-tenant"}
+        client_id = client.post("/api/clients", headers=headers, json={"name": "Metrics"}).json()["id"]
+        automation_id = client.post(
+            "/api/automations",
+            headers=headers,
+            json={"client_id": client_id, "name": "Metrics", "run_endpoint": "https://windmill-cyn/api/run"},
+        ).json()["id"]
+        client.post(f"/api/automations/{automation_id}/run", headers=headers, json={})
+        client.get("/api/executions/999999", headers=headers)
+
+        body = client.get("/metrics").text
+
+    assert 'route="/api/automations/{automation_id}/run"' in body
+    assert 'route="/api/executions/{execution_id}",status="4xx"' in body
+    assert f'operator_runs_total{{automation="{automation_id}",outcome="success",tenant="metrics-tenant"}}' in body
+    assert "operator_run_duration_seconds_bucket" in body
+    assert "operator_db_pool_checked_out" in body
+    assert "operator_threadpool_limit" in body
+    assert "operator_run_queue_pending" in body
+
+
+def test_label_budget_folds_excess_series_into_other() -> None:
+    from apps.operator_console.app.metrics import LabelBudget
+
+    budget = LabelBudget(max_series=2)
+    assert budget("a", "1") == ("a", "1")
+    assert budget("b", "2") == ("b", "2")
+    assert budget("c", "3") == ("other", "other")
+    assert budget("a", "1") == ("a", "1")
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import importlib
+import sqlite3
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect
+
+
+def _load(monkeypatch, db_path: Path):
+    monkeypatch.setenv("OPERATOR_DB_URL", f"sqlite:///{db_path}")
+    monkeypatch.setenv("OPERATOR_ENV", "dev")
+    monkeypatch.setenv("OPERATOR_JWT_SECRET", "test_secret_migrations_1234567890")
+    db = importlib.reload(importlib.import_module("apps.operator_console.app.db"))
+    importlib.reload(importlib.import_module("apps.operator_console.app.models"))
+    importlib.reload(importlib.import_module("apps.operator_console.app.auth"))
+    main = importlib.reload(importlib.import_module("apps.operator_console.app.main"))
+    return db, importlib.import_module("apps.operator_console.app.migrations"), main
+
+
+def test_import_does_no_ddl_and_migrate_is_idempotent(monkeypatch, tmp_path: Path) -> None:
+    db, migrations, _ = _load(monkeypatch, tmp_path / "fresh.db")
+    assert inspect(db.engine).get_table_names() == []
+    assert migrations.main(["--check"]) == 1
+
+    assert migrations.migrate() == [1, 2, 3, 4]
+    assert migrations.migrate() == []
+    assert migrations.current_version() == migrations.LATEST_VERSION
+    assert migrations.main(["--check"]) == 0
+    indexes = {index["name"] for index in inspect(db.engine).get_indexes("executions")}
+    assert "ix_executions_tenant_created_id" in indexes
+
+
+def test_baseline_adds_tenant_column_to_legacy_tables(monkeypatch, tmp_path: Path) -> None:
+    db_path = tmp_path / "legacy.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE clients (id INTEGER PRIMARY KEY, name VARCHAR(120) NOT NULL, industry VARCHAR(120), "
+            "owner VARCHAR(120), status VARCHAR(30), created_at DATETIME)"
+        )
+        conn.execute("INSERT INTO clients (name) VALUES ('Legacy')")
+    db, migrations, _ = _load(monkeypatch, db_path)
+
+    migrations.migrate()
+
+    columns = {column["name"] for column in inspect(db.engine).get_columns("clients")}
+    assert "tenant_id" in columns
+
+
+def test_lifespan_refuses_outdated_schema_without_auto_migrate(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("OPERATOR_AUTO_MIGRATE", "false")
+    _, migrations, main = _load(monkeypatch, tmp_path / "outdated.db")
+
+    with pytest.raises(RuntimeError, match="schema is at version 0"), TestClient(main.app):
+        pass
+
+    migrations.migrate()
+    with TestClient(main.app) as client:
+        assert client.get("/health").status_code == 200
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import gzip
+import importlib
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+
+def _load(monkeypatch, tmp_path: Path):
+    monkeypatch.setenv("OPERATOR_DB_URL", f"sqlite:///{tmp_path / 'operator_console_retention.db'}")
+    monkeypatch.setenv("OPERATOR_ENV", "dev")
+    db = importlib.import_module("apps.operator_console.app.db")
+    models = importlib.import_module("apps.operator_console.app.models")
+    importlib.reload(db)
+    importlib.reload(models)
+    retention = importlib.reload(importlib.import_module("apps.operator_console.app.retention"))
+    importlib.import_module("apps.operator_console.app.migrations").migrate()
+    return db, models, retention
+
+
+def _execution(models, created_at: datetime, status: str = "success", duration_ms: int | None = 100, **extra):
+    values = {"tenant_id": "cyn", "client_id": 1, "automation_id": 1, "response_body": "body"}
+    values.update(extra)
+    return models.Execution(status=status, duration_ms=duration_ms, created_at=created_at, **values)
+
+
+def test_percentile_nearest_rank(monkeypatch, tmp_path: Path) -> None:
+    _, _, retention = _load(monkeypatch, tmp_path)
+    values = list(range(1, 101))
+    assert retention.percentile(values, 0.5) == 50
+    assert retention.percentile(values, 0.95) == 95
+    assert retention.percentile([7], 0.95) == 7
+    assert retention.percentile([], 0.5) is None
+
+
+def test_old_rows_are_archived_compacted_and_deleted(monkeypatch, tmp_path: Path) -> None:
+    db, models, retention = _load(monkeypatch, tmp_path)
+    with db.SessionLocal() as session:
+        session.add_all(
+            [
+                _execution(models, datetime(2026, 8, 1, 9), duration_ms=100),
+                _execution(models, datetime(2026, 8, 1, 10), status="error", duration_ms=300),
+                _execution(models, datetime(2026, 8, 1, 23), duration_ms=None),
+                _execution(models, datetime(2026, 8, 1, 11), tenant_id="other", automation_id=2, client_id=2),
+                _execution(models, datetime(2026, 8, 3, 8), duration_ms=50),
+                _execution(models, datetime(2026, 10, 18, 8)),
+            ]
+        )
+        session.commit()
+
+    archive_dir = tmp_path / "archive"
+    now = datetime(2026, 10, 19)
+    preview = retention.apply_retention(keep_days=30, archive_dir=archive_dir, now=now, dry_run=True)
+    assert preview.days == ["2026-08-01", "2026-08-03"]
+    assert preview.archived == 5 and preview.deleted == 0
+
+    report = retention.apply_retention(keep_days=30, archive_dir=archive_dir, batch_size=2, now=now)
+    assert report.cutoff == "2026-09-19T00:00:00"
+    assert (report.archived, report.deleted, report.stats_rows) == (5, 5, 3)
+
+    with gzip.open(archive_dir / "2026" / "08" / "executions-2026-08-01.jsonl.gz", "rt") as handle:
+        rows = [json.loads(line) for line in handle]
+    assert len(rows) == 4 and rows[0]["response_body"] == "body"
+    assert not list(archive_dir.rglob("*.partial"))
+
+    with db.SessionLocal() as session:
+        assert session.query(models.Execution).count() == 1
+        stat = (
+            session.query(models.ExecutionDailyStat)
+            .filter_by(tenant_id="cyn", automation_id=1, day=datetime(2026, 8, 1).date())
+            .one()
+        )
+        assert (stat.runs, stat.successes, stat.p50_duration_ms, stat.p95_duration_ms) == (3, 2, 100, 300)
+
+    assert retention.apply_retention(keep_days=30, archive_dir=archive_dir, now=now).days == []
+
+
+def test_cutoff_keeps_whole_days(monkeypatch, tmp_path: Path) -> None:
+    db, models, retention = _load(monkeypatch, tmp_path)
+    with db.SessionLocal() as session:
+        session.add_all([_execution(models, datetime(2026, 9, 19, 1)), _execution(models, datetime(2026, 9, 18, 23))])
+        session.commit()
+
+    report = retention.apply_retention(keep_days=30, archive_dir=None, now=datetime(2026, 10, 19, 18, 30))
+
+    assert (report.days, report.deleted) == (["2026-09-18"], 1)
+
+
+def test_interrupted_day_is_redone_without_double_counting(monkeypatch, tmp_path: Path) -> None:
+    db, models, retention = _load(monkeypatch, tmp_path)
+    with db.SessionLocal() as session:
+        session.add_all([_execution(models, datetime(2026, 8, 1, hour)) for hour in (9, 10, 11)])
+        session.commit()
+
+    archive_dir = tmp_path / "archive"
+    now = datetime(2026, 10, 19)
+    real_delete = retention._delete_range
+
+    def crash(*args, **kwargs):
+        real_delete(*args, **kwargs)
+        raise RuntimeError("killed mid-day")
+
+    monkeypatch.setattr(retention, "_delete_range", crash)
+    with pytest.raises(RuntimeError):
+        retention.apply_retention(keep_days=30, archive_dir=archive_dir, now=now)
+    monkeypatch.setattr(retention, "_delete_range", real_delete)
+
+    with db.SessionLocal() as session:
+        assert session.query(models.Execution).count() == 3
+        assert session.query(models.ExecutionDailyStat).count() == 0
+
+    report = retention.apply_retention(keep_days=30, archive_dir=archive_dir, now=now)
+    assert (report.archived, report.deleted) == (3, 3)
+
+    with gzip.open(archive_dir / "2026" / "08" / "executions-2026-08-01.jsonl.gz", "rt") as handle:
+        assert len(handle.readlines()) == 3
+    with db.SessionLocal() as session:
+        assert session.query(models.ExecutionDailyStat).one().runs == 3
+
+
+def test_day_is_deleted_in_id_bounded_batches(monkeypatch, tmp_path: Path) -> None:
+    from sqlalchemy import event
+
+    db, models, retention = _load(monkeypatch, tmp_path)
+    with db.SessionLocal() as session:
+        # Another day's row sits between this day's ids and must not be touched.
+        days = [datetime(2026, 8, 1, 9), datetime(2026, 8, 1, 10), datetime(2026, 10, 18, 8)]
+        days += [datetime(2026, 8, 1, hour) for hour in (11, 12, 13)]
+        session.add_all([_execution(models, created_at) for created_at in days])
+        session.commit()
+
+    deletes: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        if statement.lstrip().upper().startswith("DELETE FROM EXECUTIONS"):
+            deletes.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        report = retention.apply_retention(
+            keep_days=30, archive_dir=None, batch_size=2, now=datetime(2026, 10, 19)
+        )
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+
+    assert (report.archived, report.deleted) == (5, 5)
+    assert len(deletes) == 3
+    with db.SessionLocal() as session:
+        assert session.query(models.Execution).count() == 1
+        assert session.query(models.ExecutionDailyStat).one().runs == 5
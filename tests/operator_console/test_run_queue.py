@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import json
+from pathlib import Path
+
+import httpx
+from fastapi.testclient import TestClient
+
+
+def _load_module(monkeypatch, tmp_path: Path):
+    db_path = tmp_path / "operator_console_queue.db"
+    monkeypatch.setenv("OPERATOR_DB_URL", f"sqlite:///{db_path}")
+    monkeypatch.setenv("OPERATOR_ENV", "dev")
+    monkeypatch.setenv("OPERATOR_ADMIN_USER", "admin")
+    monkeypatch.setenv("OPERATOR_ADMIN_PASSWORD", "change_me")
+    monkeypatch.setenv("OPERATOR_JWT_SECRET", "test_secret_queue_1234567890")
+    monkeypatch.setenv("OPERATOR_ALLOWED_ENDPOINT_HOSTS", "windmill-cyn")
+
+    db = importlib.import_module("apps.operator_console.app.db")
+    models = importlib.import_module("apps.operator_console.app.models")
+    auth = importlib.import_module("apps.operator_console.app.auth")
+    importlib.reload(db)
+    importlib.reload(models)
+    importlib.reload(auth)
+    module = importlib.import_module("apps.operator_console.app.main")
+    module = importlib.reload(module)
+    importlib.import_module("apps.operator_console.app.migrations").migrate()
+    return module
+
+
+def _setup(client: TestClient, tenant: str) -> tuple[dict[str, str], int]:
+    token = client.post("/api/auth/login", json={"username": "admin", "password": "change_me"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}", "X-Operator-Tenant": tenant}
+    client_id = client.post("/api/clients", headers=headers, json={"name": f"{tenant} queue"}).json()["id"]
+    automation = client.post(
+        "/api/automations",
+        headers=headers,
+        json={"client_id": client_id, "name": "Queued", "run_endpoint": "https://windmill-cyn/api/run"},
+    ).json()
+    return headers, automation["id"]
+
+
+def test_async_run_returns_202_and_completes(monkeypatch, tmp_path: Path) -> None:
+    module = _load_module(monkeypatch, tmp_path)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text="done")
+
+    with TestClient(module.app) as client:
+        module.app.state.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        headers, automation_id = _setup(client, "cyn")
+
+        queued = client.post(f"/api/automations/{automation_id}/runs?async=true", headers=headers, json={})
+        assert queued.status_code == 202
+        execution = queued.json()
+        assert execution["status"] == "queued"
+
+        finished = client.get(f"/api/executions/{execution['id']}/wait?timeout=5", headers=headers)
+        assert finished.status_code == 200
+        assert finished.json()["status"] == "success"
+        assert finished.json()["response_body"] == "done"
+
+        events = client.get(f"/api/executions/{execution['id']}/events", headers=headers)
+        assert events.headers["content-type"].startswith("text/event-stream")
+        assert events.text.count("event: status") == 1
+        assert '"status":"success"' in events.text
+
+        other_headers = {**headers, "X-Operator-Tenant": "other"}
+        assert client.get(f"/api/executions/{execution['id']}/wait", headers=other_headers).status_code == 404
+
+
+def test_sync_runs_endpoint_matches_run(monkeypatch, tmp_path: Path) -> None:
+    module = _load_module(monkeypatch, tmp_path)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(500, text="boom")
+
+    with TestClient(module.app) as client:
+        module.app.state.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        headers, automation_id = _setup(client, "cyn")
+        run = client.post(f"/api/automations/{automation_id}/runs", headers=headers, json={})
+
+    assert run.status_code == 200
+    assert run.json()["status"] == "error"
+    assert run.json()["response_code"] == 500
+
+
+def test_queue_full_rejects_with_503(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("OPERATOR_RUN_MAX_PENDING", "1")
+    module = _load_module(monkeypatch, tmp_path)
+
+    with TestClient(module.app) as client:
+        headers, automation_id = _setup(client, "cyn")
+        module.app.state.run_queue._tasks.add(object())
+        try:
+            rejected = client.post(f"/api/automations/{automation_id}/runs?async=true", headers=headers, json={})
+        finally:
+            module.app.state.run_queue._tasks.clear()
+
+    assert rejected.status_code == 503
+
+
+def test_run_batch_streams_progress_and_records_executions(monkeypatch, tmp_path: Path) -> None:
+    module = _load_module(monkeypatch, tmp_path)
+    bodies: list[bytes] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(request.read())
+        return httpx.Response(200 if b'"ok":true' in request.content else 400, text="r")
+
+    with TestClient(module.app) as client:
+        module.app.state.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        headers, automation_id = _setup(client, "cyn")
+
+        batch = client.post(
+            f"/api/automations/{automation_id}/run-batch",
+            headers=headers,
+            json={"payloads": [{"ok": True, "n": i} for i in range(5)] + [{"ok": False}], "concurrency": 3},
+        )
+        lines = [json.loads(line) for line in batch.text.splitlines()]
+        assert batch.headers["content-type"].startswith("application/x-ndjson")
+        assert sorted(line["index"] for line in lines[:-1]) == list(range(6))
+        assert lines[-1] == {"done": True, "total": 6, "success": 5, "error": 1}
+
+        upload = client.post(
+            f"/api/automations/{automation_id}/run-batch",
+            headers=headers,
+            files={"file": ("leads.jsonl", b'{"ok": true}\n\n{"ok": true}\n', "application/x-ndjson")},
+        )
+        assert json.loads(upload.text.splitlines()[-1])["success"] == 2
+
+        bad = client.post(
+            f"/api/automations/{automation_id}/run-batch",
+            headers=headers,
+            files={"file": ("leads.jsonl", b"[1]\n", "application/x-ndjson")},
+        )
+        assert bad.status_code == 400
+
+        summary = client.get("/api/summary", headers=headers).json()
+
+    assert len(bodies) == 8
+    assert summary["executions_24h"] == 8
+    assert summary["success_24h"] == 7
+
+
+def test_run_batch_respects_queue_tenant_limit(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("OPERATOR_RUN_TENANT_CONCURRENCY", "2")
+    module = _load_module(monkeypatch, tmp_path)
+    in_flight = {"now": 0, "max": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return httpx.Response(200, text="r")
+
+    with TestClient(module.app) as client:
+        module.app.state.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        headers, automation_id = _setup(client, "cyn")
+        batch = client.post(
+            f"/api/automations/{automation_id}/run-batch",
+            headers=headers,
+            json={"payloads": [{"n": i} for i in range(8)], "concurrency": 8},
+        )
+
+    assert json.loads(batch.text.splitlines()[-1])["success"] == 8
+    assert in_flight["max"] == 2
+
+
+def test_cancelled_or_failed_runs_are_marked_error() -> None:
+    from apps.operator_console.app.run_queue import RunQueue
+
+    failed: dict[int, str] = {}
+
+    async def execute(target: str) -> str:
+        if target == "hang":
+            await asyncio.sleep(60)
+        return target
+
+    def mark_running(execution_id: int) -> None:
+        if execution_id == 2:
+            raise RuntimeError("db down")
+
+    async def scenario() -> None:
+        queue = RunQueue(
+            execute=execute,
+            mark_running=mark_running,
+            complete=lambda *_: None,
+            fail=lambda execution_id, message: failed.__setitem__(execution_id, message),
+        )
+        queue.submit(1, "cyn", "hang")
+        queue.submit(2, "cyn", "ok")
+        await queue.wait(2, timeout=5)
+        await queue.stop(grace_seconds=0.05)
+
+    asyncio.run(scenario())
+
+    assert failed == {1: "interrupted: shutdown", 2: "error: RuntimeError"}
+
+
+def test_stale_sweep_skips_runs_this_process_holds(monkeypatch, tmp_path: Path) -> None:
+    from datetime import datetime, timedelta, timezone
+
+    module = _load_module(monkeypatch, tmp_path)
+    models = importlib.import_module("apps.operator_console.app.models")
+    old = datetime.now(timezone.utc) - timedelta(hours=1)
+    with module.SessionLocal() as db:
+        rows = [
+            models.Execution(
+                tenant_id="cyn",
+                client_id=1,
+                automation_id=1,
+                status="queued",
+                response_body="",
+                created_at=old,
+            )
+            for _ in range(2)
+        ]
+        db.add_all(rows)
+        db.commit()
+        lost, held = (row.id for row in rows)
+
+    module._fail_stale_runs({held})
+
+    with module.SessionLocal() as db:
+        statuses = {row.id: row.status for row in db.query(models.Execution).all()}
+    assert statuses == {lost: "error", held: "queued"}
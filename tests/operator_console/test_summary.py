@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import importlib
+from pathlib import Path
+
+import httpx
+from fastapi.testclient import TestClient
+
+
+def _load_module(monkeypatch, tmp_path: Path):
+    db_path = tmp_path / "operator_console_summary.db"
+    monkeypatch.setenv("OPERATOR_DB_URL", f"sqlite:///{db_path}")
+    monkeypatch.setenv("OPERATOR_ENV", "dev")
+    monkeypatch.setenv("OPERATOR_ADMIN_USER", "admin")
+    monkeypatch.setenv("OPERATOR_ADMIN_PASSWORD", "change_me")
+    monkeypatch.setenv("OPERATOR_JWT_SECRET", "test_secret_summary_1234567890")
+    monkeypatch.setenv("OPERATOR_ALLOWED_ENDPOINT_HOSTS", "windmill-cyn")
+    monkeypatch.setenv("OPERATOR_SUMMARY_TTL_SECONDS", "300")
+
+    db = importlib.import_module("apps.operator_console.app.db")
+    models = importlib.import_module("apps.operator_console.app.models")
+    auth = importlib.import_module("apps.operator_console.app.auth")
+    importlib.reload(db)
+    importlib.reload(models)
+    importlib.reload(auth)
+    module = importlib.import_module("apps.operator_console.app.main")
+    module = importlib.reload(module)
+    importlib.import_module("apps.operator_console.app.migrations").migrate()
+    return module, db, models
+
+
+def test_summary_is_cached_per_tenant_and_invalidated_on_writes(monkeypatch, tmp_path: Path) -> None:
+    module, db, models = _load_module(monkeypatch, tmp_path)
+    client = TestClient(module.app)
+    token = client.post("/api/auth/login", json={"username": "admin", "password": "change_me"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}", "X-Operator-Tenant": "cyn"}
+    other = {**headers, "X-Operator-Tenant": "other"}
+
+    assert client.get("/api/summary", headers=headers).json()["clients"] == 0
+    client_id = client.post("/api/clients", headers=headers, json={"name": "Cyn Summary"}).json()["id"]
+    automation_id = client.post(
+        "/api/automations",
+        headers=headers,
+        json={"client_id": client_id, "name": "Summary", "run_endpoint": "https://windmill-cyn/api/run"},
+    ).json()["id"]
+
+    module.app.state.http_client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, text="ok"))
+    )
+    try:
+        client.post(f"/api/automations/{automation_id}/run", headers=headers, json={})
+    finally:
+        del module.app.state.http_client
+
+    summary = client.get("/api/summary", headers=headers).json()
+    assert summary == {"clients": 1, "automations": 1, "executions_24h": 1, "success_24h": 1}
+    assert client.get("/api/summary", headers=other).json()["clients"] == 0
+
+    # Writes that bypass the API are only seen once the entry expires.
+    with db.SessionLocal() as session:
+        session.add(models.Execution(tenant_id="cyn", client_id=client_id, automation_id=automation_id, status="error"))
+        session.commit()
+    assert client.get("/api/summary", headers=headers).json()["executions_24h"] == 1
+    module.summary_cache.invalidate("cyn")
+    assert client.get("/api/summary", headers=headers).json() == {
+        "clients": 1,
+        "automations": 1,
+        "executions_24h": 2,
+        "success_24h": 1,
+    }
+
+
+def test_executions_keyset_pages_and_detail(monkeypatch, tmp_path: Path) -> None:
+    from datetime import datetime
+
+    module, db, models = _load_module(monkeypatch, tmp_path)
+    client = TestClient(module.app)
+    token = client.post("/api/auth/login", json={"username": "admin", "password": "change_me"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}", "X-Operator-Tenant": "cyn"}
+    client_id = client.post("/api/clients", headers=headers, json={"name": "Cyn Pages"}).json()["id"]
+    automation_id = client.post(
+        "/api/automations",
+        headers=headers,
+        json={"client_id": client_id, "name": "Pages", "run_endpoint": "https://windmill-cyn/api/run"},
+    ).json()["id"]
+
+    same_second = datetime(2026, 10, 1, 12, 0, 0)
+    with db.SessionLocal() as session:
+        for index in range(5):
+            session.add(
+                models.Execution(
+                    tenant_id="cyn",
+                    client_id=client_id,
+                    automation_id=automation_id,
+                    status="success" if index % 2 == 0 else "error",
+                    response_body="x" * 5000,
+                    created_at=same_second if index < 4 else datetime(2026, 10, 2),
+                )
+            )
+        session.commit()
+
+    seen: list[int] = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/executions", headers=headers, params=params).json()
+        assert all("response_body" not in item for item in page["items"])
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [5, 4, 3, 2, 1]
+
+    errors = client.get("/api/executions", headers=headers, params={"status": "error"}).json()
+    assert [item["id"] for item in errors["items"]] == [4, 2]
+    recent = client.get("/api/executions", headers=headers, params={"since": "2026-10-01T12:00:01"}).json()
+    assert [item["id"] for item in recent["items"]] == [5]
+
+    detail = client.get("/api/executions/5", headers=headers)
+    assert detail.json()["response_body"] == "x" * 5000
+    assert client.get("/api/executions/5", headers={**headers, "X-Operator-Tenant": "other"}).status_code == 404
+    assert client.get("/api/executions", headers=headers, params={"cursor": "%%%"}).status_code == 400
@@ -22,6 +22,7 @@ def test_tenant_isolation_smoke(monkeypatch, tmp_path: Path) -> None:
     importlib.reload(auth)
     module = importlib.import_module("apps.operator_console.app.main")
     module = importlib.reload(module)
+    importlib.import_module("apps.operator_console.app.migrations").migrate()
     client = TestClient(module.app)
 
     login = client.post("/api/auth/login", json={"username": "admin", "password": "change_me"})
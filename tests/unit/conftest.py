@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+from unittest.mock import MagicMock
+
+import pytest
+
+
+def mock_conn_cursor() -> tuple[MagicMock, MagicMock]:
+    """psycopg2-like connection whose ``cursor()`` (plain or as a context manager) is one MagicMock."""
+    cursor = MagicMock()
+    cursor.__enter__.return_value = cursor
+    cursor.__exit__.return_value = None
+
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+    conn.__enter__.return_value = conn
+    conn.__exit__.return_value = None
+    return conn, cursor
+
+
+@pytest.fixture
+def pg() -> tuple[MagicMock, MagicMock]:
+    return mock_conn_cursor()
+
+
+def _plain(value: Any) -> Any:
+    # psycopg2.extras.Json keeps the wrapped object in ``adapted``.
+    return getattr(value, "adapted", value)
+
+
+@pytest.fixture
+def capture_execute_values(monkeypatch: pytest.MonkeyPatch) -> Callable[[Any], list[dict[str, Any]]]:
+    """Patch ``module.execute_values`` and return the list its calls are recorded into.
+
+    Each call is recorded as ``{"sql", "rows", "kwargs"}`` with Json payloads unwrapped.
+    """
+
+    def capture(module: Any) -> list[dict[str, Any]]:
+        calls: list[dict[str, Any]] = []
+
+        def fake_execute_values(cur: Any, sql: str, rows: Any, **kwargs: Any) -> None:
+            calls.append(
+                {"sql": sql, "rows": [tuple(_plain(v) for v in row) for row in rows], "kwargs": kwargs}
+            )
+
+        monkeypatch.setattr(module, "execute_values", fake_execute_values)
+        return calls
+
+    return capture
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from f.einstein_kids.shared import dashboard_read
+from f.einstein_kids.shared.dashboard_snapshot import DashboardSnapshotService
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _wait_for_version(service, version):
+    for _ in range(250):
+        if service.get()["version"] == version:
+            break
+        threading.Event().wait(0.02)
+    return service.get()
+
+
+def _persisted(pg, age_seconds):
+    conn, cur = pg
+    generated_at = datetime.now(timezone.utc) - timedelta(seconds=age_seconds)
+    cur.fetchone.return_value = (
+        {"name": "einstein_kids_dashboard", "version": 7, "generated_at": generated_at.isoformat(), "sections": {"s": 1}, "errors": {}},
+    )
+    return conn
+
+
+def test_sections_run_in_parallel_on_pooled_connections() -> None:
+    barrier = threading.Barrier(3, timeout=5)
+
+    def section(conn):
+        barrier.wait()  # deadlocks (BrokenBarrierError) unless all three run concurrently
+        return "ok"
+
+    pool = MagicMock()
+    service = DashboardSnapshotService(pool, sections={"a": section, "b": section, "c": section}, max_workers=3)
+    snapshot = service.refresh()
+
+    assert snapshot["sections"] == {"a": "ok", "b": "ok", "c": "ok"}
+    assert snapshot["errors"] == {}
+    assert pool.getconn.call_count == pool.putconn.call_count == 3
+
+
+def test_failed_section_keeps_previous_value_and_version_increments() -> None:
+    calls = {"n": 0}
+
+    def flaky(conn):
+        calls["n"] += 1
+        if calls["n"] > 1:
+            raise RuntimeError("boom")
+        return {"total": 1}
+
+    service = DashboardSnapshotService(MagicMock(), sections={"resumen": flaky})
+    first = service.refresh()
+    second = service.refresh()
+
+    assert (first["version"], second["version"]) == (1, 2)
+    assert second["sections"]["resumen"] == {"total": 1}
+    assert second["errors"] == {"resumen": "boom"}
+
+
+def test_cold_start_returns_empty_envelope_without_running_sections() -> None:
+    release = threading.Event()
+
+    def section(conn):
+        release.wait(5)
+        return "ok"
+
+    service = DashboardSnapshotService(MagicMock(), sections={"s": section})
+    cold = service.get()
+
+    assert (cold["version"], cold["sections"], cold["stale"], cold["age_seconds"]) == (0, {}, True, None)
+    release.set()
+    assert _wait_for_version(service, 1)["sections"] == {"s": "ok"}
+
+
+def test_stale_snapshot_is_served_while_revalidating() -> None:
+    clock = Clock()
+    release = threading.Event()
+    calls = {"n": 0}
+
+    def section(conn):
+        calls["n"] += 1
+        if calls["n"] > 1:
+            release.wait(5)
+        return calls["n"]
+
+    service = DashboardSnapshotService(MagicMock(), sections={"s": section}, max_age=10, clock=clock)
+    service.refresh()
+
+    clock.now = 11
+    stale = service.get()
+    assert (stale["stale"], stale["age_seconds"], stale["sections"]) == (True, 11.0, {"s": 1})
+    assert service.get()["version"] == 1  # still serving stale, no second refresh started
+
+    release.set()
+    fresh = _wait_for_version(service, 2)
+    assert fresh["stale"] is False
+    assert calls["n"] == 2
+
+
+def test_persisted_snapshot_keeps_its_real_age(pg) -> None:
+    conn = _persisted(pg, age_seconds=30)
+    service = DashboardSnapshotService(None, store=lambda: conn, max_age=300)
+
+    snapshot = service.get()
+
+    assert (snapshot["version"], snapshot["sections"], snapshot["stale"]) == (7, {"s": 1}, False)
+    assert 30 <= snapshot["age_seconds"] < 60
+    conn.close.assert_called_once()
+
+
+def test_read_script_serves_stored_snapshot_without_refreshing(pg, monkeypatch) -> None:
+    conn = _persisted(pg, age_seconds=600)
+    connect = MagicMock(return_value=conn)
+    monkeypatch.setattr(dashboard_read.psycopg2, "connect", connect)
+
+    snapshot = dashboard_read.main(pg_resource={"dsn": "postgresql://replica"}, max_age=300)
+
+    assert (snapshot["version"], snapshot["stale"]) == (7, True)
+    connect.assert_called_once_with(dsn="postgresql://replica")
+    conn.commit.assert_not_called()
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import pytest
+
+from f.einstein_kids.shared import event_log
+from f.einstein_kids.shared.event_log import EventEmitter, compact_payload
+
+
+@pytest.fixture
+def batches(capture_execute_values):
+    return capture_execute_values(event_log)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_flushes_once_on_clean_exit(pg, batches) -> None:
+    conn, _ = pg
+    with EventEmitter(conn) as events:
+        events.emit("lead-1", "payment_claim_created", {"sale_id": "s1"})
+        events.emit("lead-2", "payment_claim_created", {"sale_id": "s2"})
+        assert batches == []
+
+    assert len(batches) == 1
+    assert [row[:3] for row in batches[0]["rows"]] == [
+        ("lead-1", "payment_claim_created", {"sale_id": "s1"}),
+        ("lead-2", "payment_claim_created", {"sale_id": "s2"}),
+    ]
+
+
+def test_discards_buffer_when_block_raises(pg, batches) -> None:
+    conn, _ = pg
+    with pytest.raises(RuntimeError):
+        with EventEmitter(conn) as events:
+            events.emit("lead-1", "custom_event", {})
+            raise RuntimeError("business write failed")
+    assert batches == []
+
+
+def test_size_and_time_thresholds_trigger_flush(pg, batches) -> None:
+    conn, _ = pg
+    clock = Clock()
+    events = EventEmitter(conn, max_batch=3, max_delay=5.0, clock=clock)
+
+    for i in range(3):
+        events.emit(f"lead-{i}", "custom_event", {})
+    assert len(batches) == 1 and len(events) == 0
+
+    events.emit("lead-3", "custom_event", {})
+    clock.now = 6.0
+    events.emit("lead-4", "custom_event", {})
+    assert [len(batch["rows"]) for batch in batches] == [3, 2]
+    assert batches[0]["kwargs"]["page_size"] == 3
+    assert events.written == 5
+
+
+def test_phone_events_resolved_with_one_lookup(pg, batches) -> None:
+    conn, cur = pg
+    cur.fetchall.return_value = [("+5215511111111", "lead-a")]
+    with EventEmitter(conn) as events:
+        events.emit(None, "ai_interaction", {"intent": "price"}, phone="+5215511111111")
+        events.emit(None, "ai_interaction", {"intent": "greeting"}, phone="+5215511111111")
+        events.emit(None, "ai_interaction", {"intent": "other"}, phone="+5215599999999")
+
+    cur.execute.assert_called_once()
+    assert cur.execute.call_args.args[1] == (["+5215511111111", "+5215599999999"],)
+    assert [row[0] for row in batches[0]["rows"]] == ["lead-a", "lead-a", None]
+
+
+def test_known_event_types_require_their_keys(pg) -> None:
+    conn, _ = pg
+    events = EventEmitter(conn)
+    with pytest.raises(ValueError, match="sale_id"):
+        events.emit("lead-1", "payment_claim_decided", {"decision": "CONFIRM", "status": "confirmed"})
+
+
+def test_compact_payload_drops_empty_values(pg, batches) -> None:
+    raw = {"status": "read", "error": None, "raw": {"id": "m1", "meta": {}, "tags": []}}
+    assert compact_payload(raw) == {"status": "read", "raw": {"id": "m1"}}
+
+    conn, _ = pg
+    with EventEmitter(conn, compact=True) as events:
+        events.emit("lead-1", "ycloud_message_status", {"message_id": "m1", "status": "read", "raw": raw})
+    assert batches[0]["rows"][0][2] == {"message_id": "m1", "status": "read", "raw": {"status": "read", "raw": {"id": "m1"}}}
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+from f.einstein_kids.shared.refresh_funnel import read_funnel, refresh_funnel_view
+
+
+def _track_autocommit(conn, cur):
+    # (params, autocommit) per statement, to check where REFRESH ran
+    seen = []
+    cur.execute.side_effect = lambda sql, params=None: seen.append((sql.split()[0], params, conn.autocommit))
+    return seen
+
+
+def test_read_funnel_sums_daily_buckets(pg) -> None:
+    conn, cur = pg
+    cur.fetchall.return_value = [
+        {"avatar": "mother", "stage": "NEW_LEAD", "leads": 6, "converted_leads": 0, "sales": 0, "sales_amount": Decimal("0")},
+        {"avatar": "mother", "stage": "CUSTOMER", "leads": 2, "converted_leads": 2, "sales": 3, "sales_amount": Decimal("2991")},
+        {"avatar": "therapist", "stage": "NEW_LEAD", "leads": 4, "converted_leads": 0, "sales": 0, "sales_amount": Decimal("0")},
+    ]
+
+    funnel = read_funnel(conn, date(2025, 3, 1), date(2025, 4, 1))
+
+    assert cur.execute.call_args.args[1] == (date(2025, 3, 1), date(2025, 4, 1))
+    assert funnel["stages"] == {"NEW_LEAD": 10, "CUSTOMER": 2}
+    assert funnel["avatars"]["mother"] == {"leads": 8, "sales": 3}
+    assert funnel["total"] == {"leads": 12, "sales": 3, "sales_amount": Decimal("2991")}
+
+
+def test_refresh_runs_in_autocommit_and_restores_mode(pg) -> None:
+    conn, cur = pg
+    conn.autocommit = False
+    cur.fetchone.return_value = (True,)
+    seen = _track_autocommit(conn, cur)
+
+    assert refresh_funnel_view(conn) is True
+
+    assert [verb for verb, _, _ in seen] == ["SELECT", "REFRESH", "SELECT"]
+    assert all(autocommit for _, _, autocommit in seen)
+    assert conn.autocommit is False
+
+
+def test_refresh_skips_when_another_refresh_holds_the_lock(pg) -> None:
+    conn, cur = pg
+    conn.autocommit = False
+    cur.fetchone.return_value = (False,)
+    seen = _track_autocommit(conn, cur)
+
+    assert refresh_funnel_view(conn) is False
+    assert [verb for verb, _, _ in seen] == ["SELECT"]
+    assert conn.autocommit is False
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+import pytest
+
+from f.einstein_kids.shared.dashboard_cyn import EinsteinKidsDashboard
+from f.einstein_kids.shared.hot_leads import count_hot_leads, decode_cursor, encode_cursor, list_hot_leads
+
+
+def _leads(n):
+    return [{"lead_id": uuid.UUID(int=n - i), "score": 90 - i // 2} for i in range(n)]
+
+
+def test_cursor_round_trip() -> None:
+    lead_id = uuid.uuid4()
+    assert decode_cursor(encode_cursor(85, lead_id)) == (85, str(lead_id))
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_page_returns_next_cursor_from_last_row(pg) -> None:
+    conn, cur = pg
+    cur.fetchall.return_value = _leads(4)
+
+    page = list_hot_leads(conn, limit=3)
+
+    assert page["items"] == _leads(4)[:3]
+    assert decode_cursor(page["next_cursor"]) == (page["items"][-1]["score"], str(page["items"][-1]["lead_id"]))
+    params = cur.execute.call_args.args[1]
+    assert params == {"min_score": 70, "limit": 4}
+
+
+def test_next_page_binds_the_cursor_and_last_page_has_no_cursor(pg) -> None:
+    conn, cur = pg
+    cur.fetchall.return_value = _leads(2)
+
+    page = list_hot_leads(conn, limit=3, cursor=encode_cursor(88, uuid.UUID(int=7)))
+
+    params = cur.execute.call_args.args[1]
+    assert (params["after_score"], params["after_id"]) == (88, str(uuid.UUID(int=7)))
+    assert page == {"items": _leads(2), "next_cursor": None}
+
+
+def test_min_score_never_goes_below_partial_index_predicate(pg) -> None:
+    conn, cur = pg
+    cur.fetchall.return_value = []
+    cur.fetchone.return_value = (12,)
+
+    list_hot_leads(conn, min_score=10)
+    assert cur.execute.call_args.args[1]["min_score"] == 70
+    assert count_hot_leads(conn, min_score=10) == 12
+    assert cur.execute.call_args.args[1] == {"min_score": 70}
+
+
+def test_dashboard_section_keeps_list_shape(pg) -> None:
+    conn, cur = pg
+    row = {
+        "lead_id": uuid.UUID(int=1), "name": "Ana", "phone": "+52", "email": "a@x", "score": 90, "stage": "HOT_LEAD",
+        "whatsapp_consent_ts": None, "created_at": datetime(2026, 10, 1), "message_count": 3, "last_interaction_at": None,
+    }
+    cur.fetchall.return_value = [row, {**row, "lead_id": uuid.UUID(int=0)}]
+    dashboard = EinsteinKidsDashboard(conn)
+
+    assert [lead["id"] for lead in dashboard.get_leads_calientes(limit=1)] == [str(uuid.UUID(int=1))]
+    page = dashboard.get_leads_calientes_pagina(limit=1)
+    assert page["next_cursor"] is not None and len(page["leads"]) == 1
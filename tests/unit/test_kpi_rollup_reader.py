@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from datetime import date
+
+from f.einstein_kids.shared.kpi_rollup import read_daily_kpis, sum_kpis
+
+
+def _row(day, avatar, **values):
+    return {"day": day, "avatar": avatar, **{k: values.get(k, 0) for k in sum_kpis({})}}
+
+
+def test_rollup_and_live_tail_are_read_in_one_round_trip(pg) -> None:
+    conn, cur = pg
+    cur.fetchall.return_value = [
+        _row(date(2025, 3, 2), "mother", leads_new=4),
+        _row(date(2025, 3, 3), "therapist", leads_new=2),
+    ]
+
+    result = read_daily_kpis(conn, date(2025, 3, 1), date(2025, 3, 4), tenant_id="t1")
+
+    cur.execute.assert_called_once()
+    params = cur.execute.call_args.args[1]
+    assert (params["start"], params["end"], params["tenant_id"]) == (date(2025, 3, 1), date(2025, 3, 4), "t1")
+    assert result[date(2025, 3, 2)]["mother"]["leads_new"] == 4
+    assert result[date(2025, 3, 3)]["therapist"]["leads_new"] == 2
+
+
+def test_days_without_rows_are_absent(pg) -> None:
+    conn, cur = pg
+    cur.fetchall.return_value = []
+    assert read_daily_kpis(conn, date(2025, 3, 1), date(2025, 3, 2)) == {}
+
+
+def test_sum_kpis_adds_avatars() -> None:
+    total = sum_kpis({"mother": {"sales_count": 1, "sales_amount": 10}, "therapist": {"sales_count": 2}})
+    assert total["sales_count"] == 3
+    assert total["sales_amount"] == 10
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from f.einstein_kids.shared import lead_scoring
+from f.einstein_kids.shared.lead_scoring import (
+    LeadState,
+    _write_states,
+    apply_event,
+    changed_leads,
+    fold_events,
+    load_rules,
+)
+
+RULES = load_rules()
+TS = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+def test_rules_file_keeps_attendance_points_and_has_stable_version() -> None:
+    import yaml
+
+    from f.einstein_kids.shared.lead_scoring import RULES_PATH
+
+    with open(RULES_PATH, encoding="utf-8") as handle:
+        data = yaml.safe_load(handle)
+    assert data["rules"]["video_view_100_percent"] == 60
+    assert load_rules().version == RULES.version
+
+
+def test_fold_matches_previous_ad_hoc_updates() -> None:
+    events = [
+        ("lead-1", "attendance_segment_computed", {"meeting_id": "m", "segment": "HOT_LEAD", "score_add": 60}, TS),
+        ("lead-1", "ycloud_inbound_message", {"action": "PAYMENT_CLAIM"}, TS),
+        ("lead-1", "payment_claim_decided", {"status": "confirmed"}, TS),
+        ("lead-2", "payment_claim_created", {"sale_id": "s"}, TS),
+        ("lead-2", "payment_claim_decided", {"status": "rejected"}, TS),
+        ("lead-3", "payment_claim_decided", {"status": "rejected"}, TS),
+    ]
+    states = fold_events({}, events, RULES)
+
+    assert (states["lead-1"].score, states["lead-1"].stage) == (210, "CUSTOMER")
+    assert (states["lead-2"].score, states["lead-2"].stage) == (10, None)
+    # Never below min_score, as GREATEST(score - 20, 0) did.
+    assert states["lead-3"].score == 0
+    assert states["lead-1"].event_count == 3
+
+
+def test_terminal_stage_and_wildcard_cases() -> None:
+    state = LeadState(score=100, stage="CUSTOMER")
+    state = apply_event(state, "zoom_no_show", {"reason": "did_not_attend"}, TS, RULES)
+    assert state.stage == "CUSTOMER"
+
+    partial = apply_event(LeadState(), "zoom_attendance", {"status": "left_early"}, TS, RULES)
+    assert partial.stage == "EVENT_PARTIAL"
+
+
+def test_incremental_fold_equals_full_fold() -> None:
+    events = [
+        ("lead-1", "calendly_booking", {"score": 20, "stage": "EVENT_BOOKED"}, TS),
+        ("lead-1", "custom_unscored", {}, TS),
+        ("lead-1", "payment_claim_created", {"sale_id": "s"}, TS),
+        ("lead-1", "zoom_attendance", {"status": "attended"}, TS),
+    ]
+    full = fold_events({}, events, RULES)
+    snapshot = fold_events({}, events[:2], RULES)
+    assert fold_events(snapshot, events[2:], RULES) == full
+    assert full["lead-1"] == LeadState(score=50, stage="EVENT_ATTENDED", event_count=3, last_event_ts=TS)
+
+
+def test_changed_leads_only_reports_score_or_stage_changes() -> None:
+    before = {"a": LeadState(10, "HOT_LEAD", 1), "b": LeadState(5, None, 1)}
+    after = {"a": LeadState(10, "HOT_LEAD", 2), "b": LeadState(35, None, 2), "c": LeadState(0, "EVENT_NO_SHOW", 1)}
+    assert changed_leads(before, after) == [("b", 35, None), ("c", 0, "EVENT_NO_SHOW")]
+
+
+def test_score_only_change_leaves_stage_untouched(pg, capture_execute_values) -> None:
+    _, cur = pg
+    writes = capture_execute_values(lead_scoring)
+    before = {"a": LeadState(10, "HOT_LEAD", 1)}
+    after = {"a": LeadState(30, "HOT_LEAD", 2)}
+
+    changed = changed_leads(before, after)
+    _write_states(cur, after, changed, "v1")
+
+    assert changed == [("a", 30, None)]
+    assert writes[0]["rows"] == [("a", 30, None)]
+
+
+def test_incremental_refuses_snapshots_from_other_rules(pg, capture_execute_values) -> None:
+    conn, cur = pg
+    writes = capture_execute_values(lead_scoring)
+    cur.fetchone.side_effect = [(True,), (None, None, RULES.version)]
+    event_type = sorted(RULES.events)[0]
+    cur.fetchall.side_effect = [
+        [("e1", "a", event_type, {}, TS)],
+        [("a", 10, "HOT_LEAD", 1, TS, "old-rules")],
+    ]
+
+    result = lead_scoring.run_incremental(conn, RULES, settle_seconds=0)
+
+    assert result["rebuild_required"] and result["stale_states"]
+    assert writes == []
+    conn.rollback.assert_called_once()
+    conn.commit.assert_not_called()
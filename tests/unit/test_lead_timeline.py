@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from f.einstein_kids.shared.lead_timeline import MAX_ITEMS, get_lead_timeline
+
+
+def _item(day, hour):
+    return {"ts": f"2026-{day}T{hour:02d}:00:00+00:00", "source": "event", "type": "custom", "data": {}}
+
+
+# Months newest first, items oldest first within a month (as stored).
+ROWS = [
+    ("2026-10-01", [_item("10-02", 9), _item("10-02", 10), _item("10-03", 8)]),
+    ("2026-09-01", [_item("09-20", 9), _item("09-21", 9)]),
+]
+
+
+def test_returns_newest_items_across_months(pg) -> None:
+    conn, cur = pg
+    cur.fetchall.return_value = ROWS
+
+    items = get_lead_timeline(conn, "lead-1", limit=4)
+
+    assert [item["ts"][:13] for item in items] == ["2026-10-03T08", "2026-10-02T10", "2026-10-02T09", "2026-09-21T09"]
+    cur.execute.assert_called_once()
+    assert cur.execute.call_args.args[1] == {"lead_id": "lead-1", "limit": 4}
+
+
+def test_before_pages_to_older_items(pg) -> None:
+    conn, cur = pg
+    cur.fetchall.return_value = ROWS
+
+    items = get_lead_timeline(conn, "lead-1", limit=2, before="2026-10-02T10:00:00")
+
+    assert [item["ts"][:13] for item in items] == ["2026-10-02T09", "2026-09-21T09"]
+    params = cur.execute.call_args.args[1]
+    assert params["before"] == datetime(2026, 10, 2, 10, tzinfo=timezone.utc)
+    assert params["limit"] == 2 + MAX_ITEMS
+
+
+def test_limit_is_clamped(pg) -> None:
+    conn, cur = pg
+    cur.fetchall.return_value = []
+
+    assert get_lead_timeline(conn, "lead-1", limit=10_000) == []
+    assert cur.execute.call_args.args[1]["limit"] == MAX_ITEMS
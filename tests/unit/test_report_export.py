@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import csv
+import io
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from f.einstein_kids.shared.report_export import export_to_file, iter_csv, iter_rows, stream_export
+
+
+@pytest.fixture
+def export_conn(pg):
+    """Mock connection whose named cursor iterates ``cur.rows``."""
+    conn, cur = pg
+    cur.rows = []
+    cur.__iter__.side_effect = lambda: iter(cur.rows)
+    return conn, cur
+
+
+def _sales(n):
+    ts = datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc)
+    return [(f"s{i}", f"l{i}", "mother", "confirmed", Decimal("997.00"), "MXN", ts, ts) for i in range(n)]
+
+
+def test_rows_come_from_named_cursor_with_itersize(export_conn) -> None:
+    conn, cur = export_conn
+    cur.rows = _sales(3)
+    rows = list(iter_rows(conn, "sales", date(2025, 3, 1), date(2025, 4, 1), itersize=500))
+
+    assert rows == _sales(3)
+    assert conn.cursor.call_args.kwargs["name"].startswith("ek_export_sales_")
+    assert cur.itersize == 500
+    assert cur.execute.call_args.args[1] == {"start": date(2025, 3, 1), "end": date(2025, 4, 1)}
+
+
+def test_csv_is_chunked_and_round_trips() -> None:
+    chunks = list(iter_csv(_sales(200), ["a", "b", "c", "d", "e", "f", "g", "h"], chunk_bytes=1024))
+
+    assert len(chunks) > 1
+    assert all(len(chunk) < 2048 for chunk in chunks)
+    parsed = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert parsed[0] == ["a", "b", "c", "d", "e", "f", "g", "h"]
+    assert parsed[1][4] == "997.00"
+    assert parsed[1][6] == "2025-03-01T12:00:00+00:00"
+    assert len(parsed) == 201
+
+
+def test_export_to_file_writes_atomically(tmp_path, export_conn) -> None:
+    conn, cur = export_conn
+    cur.rows = _sales(5)
+    target = tmp_path / "sales.csv"
+    result = export_to_file(conn, "sales", date(2025, 3, 1), date(2025, 4, 1), str(target))
+
+    assert result["format"] == "csv"
+    assert result["bytes"] == target.stat().st_size
+    assert target.read_text().splitlines()[0].startswith("sale_id,lead_id")
+    assert not (tmp_path / "sales.csv.partial").exists()
+
+
+def test_unknown_format_and_dataset_are_rejected(export_conn) -> None:
+    conn, _ = export_conn
+    with pytest.raises(ValueError):
+        stream_export(conn, "sales", date(2025, 3, 1), date(2025, 4, 1), fmt="xlsx")
+    with pytest.raises(ValueError):
+        list(iter_rows(conn, "nope", date(2025, 3, 1), date(2025, 4, 1)))
+    conn.cursor.assert_not_called()
+
+
+def test_parquet_row_groups_are_fixed_size(export_conn) -> None:
+    pq = pytest.importorskip("pyarrow.parquet")
+    conn, cur = export_conn
+    cur.rows = _sales(25)
+    data = b"".join(
+        stream_export(conn, "sales", date(2025, 3, 1), date(2025, 4, 1), fmt="parquet", row_group_size=10)
+    )
+    parquet = pq.ParquetFile(io.BytesIO(data))
+    assert parquet.metadata.num_rows == 25
+    assert [parquet.metadata.row_group(i).num_rows for i in range(parquet.num_row_groups)] == [10, 10, 5]
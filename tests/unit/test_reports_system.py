@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from f.einstein_kids.shared import reports_system
+from f.einstein_kids.shared.kpi_rollup import sum_kpis
+
+
+def _reports(conn):
+    reports = reports_system.EinsteinKidsReports.__new__(reports_system.EinsteinKidsReports)
+    reports.conn = conn
+    return reports
+
+
+def test_daily_report_accepts_a_datetime(pg) -> None:
+    conn, cur = pg
+    cur.fetchall.return_value = [
+        {"day": date(2025, 3, 2), "avatar": "mother", **{**sum_kpis({}), "leads_new": 4}},
+    ]
+
+    report = _reports(conn).generate_daily_report(datetime(2025, 3, 2, 18, 45))
+
+    params = cur.execute.call_args.args[1]
+    assert (params["start"], params["end"]) == (date(2025, 3, 2), date(2025, 3, 3))
+    assert report["fecha"] == "2025-03-02"
+    assert report["leads"] == {"nuevos": 4, "moms": 4, "therapists": 0}
+
+
+def test_conversion_funnel_reads_a_half_open_range(pg) -> None:
+    conn, cur = pg
+    cur.fetchall.return_value = []
+
+    funnel = _reports(conn).generate_conversion_funnel(days=7, end_date=date(2025, 3, 8))
+
+    assert cur.execute.call_args.args[1] == (date(2025, 3, 1), date(2025, 3, 8))
+    assert funnel["periodo_dias"] == 7
+
+
+def test_hot_leads_total_counts_every_page(pg) -> None:
+    conn, cur = pg
+    cur.fetchall.side_effect = [[], []]
+    cur.fetchone.return_value = (240,)
+
+    report = _reports(conn).generate_hot_leads_report(limit=10)
+
+    assert report["hot_leads"] == []
+    assert report["total_hot"] == 240
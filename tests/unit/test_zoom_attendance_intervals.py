@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from f.einstein_kids.shared.zoom_attendance_live import (
+    apply_join,
+    apply_leave,
+    live_seconds,
+    merge_intervals,
+)
+
+
+def test_merge_intervals_merges_overlaps_and_touching() -> None:
+    assert merge_intervals([(50, 60), (0, 10), (5, 20), (20, 30)]) == [(0, 30), (50, 60)]
+
+
+def test_reconnect_overlap_is_not_counted_twice() -> None:
+    state = {"intervals": [], "open_joins": [], "attended_seconds": 0}
+    state = apply_join(state, 0)       # laptop
+    state = apply_join(state, 600)     # phone while laptop still connected
+    state = apply_leave(state, 1200, join_ts=0)
+    state = apply_leave(state, 1500, join_ts=600)
+    assert state["intervals"] == [(0, 1500)]
+    assert state["attended_seconds"] == 1500
+    assert state["open_joins"] == []
+
+
+def test_leave_without_known_join_is_ignored_unless_join_time_given() -> None:
+    state = {"intervals": [], "open_joins": [], "attended_seconds": 0}
+    assert apply_leave(state, 100)["attended_seconds"] == 0
+    assert apply_leave(state, 100, join_ts=40)["attended_seconds"] == 60
+
+
+def test_live_seconds_counts_open_connections_until_now() -> None:
+    state = apply_join({"intervals": [(0, 300)], "open_joins": [], "attended_seconds": 300}, 200)
+    assert live_seconds(state, now_ts=900) == 900
+
+
+def test_duplicate_join_does_not_leave_a_connection_open() -> None:
+    state = {"intervals": [], "open_joins": [], "attended_seconds": 0}
+    state = apply_join(state, 0)
+    assert apply_join(state, 0) is state  # retried webhook
+    state = apply_leave(state, 600, join_ts=0)
+    assert apply_join(state, 0) is state  # retried after the leave
+    assert apply_leave(state, 600, join_ts=0) is state
+    assert state["open_joins"] == []
+    assert live_seconds(state, now_ts=10_000) == 600
+
+
+def test_leave_before_its_join_closes_the_late_join() -> None:
+    state = {"intervals": [], "open_joins": [], "attended_seconds": 0}
+    state = apply_leave(state, 900)  # joined webhook still in flight
+    assert state["orphan_leaves"] == [900]
+    state = apply_join(state, 300)
+    assert (state["open_joins"], state["orphan_leaves"], state["attended_seconds"]) == ([], [], 600)
+
+
+def test_leave_with_join_time_before_its_join_is_not_reopened() -> None:
+    state = apply_leave({"intervals": [], "open_joins": [], "attended_seconds": 0}, 500, join_ts=100)
+    state = apply_join(state, 100)
+    assert state["open_joins"] == []
+    assert live_seconds(state, now_ts=10_000) == 400
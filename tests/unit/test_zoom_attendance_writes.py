@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from f.einstein_kids.shared import event_log, zoom_integration
+from f.einstein_kids.shared.zoom_integration import ZoomAttendanceProcessor, event_day_range
+
+CDMX = timezone(timedelta(hours=-6))
+EVENT = datetime(2026, 10, 1, 19, 30, tzinfo=CDMX)
+
+
+@pytest.fixture
+def writes(capture_execute_values):
+    return capture_execute_values(zoom_integration), capture_execute_values(event_log)
+
+
+def test_event_day_range_is_half_open_and_keeps_timezone() -> None:
+    start, end = event_day_range(EVENT)
+    assert start == datetime(2026, 10, 1, tzinfo=CDMX)
+    assert end == datetime(2026, 10, 2, tzinfo=CDMX)
+    assert event_day_range(datetime(2026, 12, 31, 23, 59)) == (datetime(2026, 12, 31), datetime(2027, 1, 1))
+
+
+def test_update_lead_attendance_batches_stage_and_events_without_commit(pg, writes) -> None:
+    conn, _ = pg
+    lead_updates, events = writes
+    processor = ZoomAttendanceProcessor(conn, zoom_client=object())
+
+    processor.update_lead_attendance(
+        [
+            {"lead_id": "lead-1", "meeting_id": "m", "duration_minutes": 50, "status": "attended"},
+            {"lead_id": "lead-2", "meeting_id": "m", "duration_minutes": 10, "status": "partial"},
+        ]
+    )
+
+    assert len(lead_updates) == 1
+    assert lead_updates[0]["rows"] == [("lead-1", "EVENT_ATTENDED"), ("lead-2", "EVENT_PARTIAL")]
+    assert lead_updates[0]["kwargs"]["page_size"] == 1000
+    assert len(events) == 1
+    assert [(row[0], row[1], row[2]["status"]) for row in events[0]["rows"]] == [
+        ("lead-1", "zoom_attendance", "attended"),
+        ("lead-2", "zoom_attendance", "partial"),
+    ]
+    conn.commit.assert_not_called()
+
+
+def test_update_lead_attendance_skips_empty_batches(pg, writes) -> None:
+    conn, cursor = pg
+    ZoomAttendanceProcessor(conn, zoom_client=object()).update_lead_attendance([])
+    assert writes == ([], [])
+    cursor.execute.assert_not_called()
+
+
+def test_mark_no_shows_binds_day_range_and_attended_ids(pg) -> None:
+    conn, cursor = pg
+    cursor.rowcount = 3
+
+    marked = ZoomAttendanceProcessor(conn, zoom_client=object()).mark_no_shows(EVENT, [{"lead_id": "lead-1"}])
+
+    assert marked == 3
+    params = cursor.execute.call_args.args[1]
+    assert params[:3] == (datetime(2026, 10, 1, tzinfo=CDMX), datetime(2026, 10, 2, tzinfo=CDMX), ["lead-1"])
+    assert params[3].adapted["reason"] == "did_not_attend"
+    conn.commit.assert_not_called()
+
+
+def test_process_meeting_attendance_commits_once_after_download(pg, writes) -> None:
+    conn, cursor = pg
+    cursor.fetchall.return_value = [("lead-1", "ana@example.com", None, "Ana Pérez")]
+    cursor.rowcount = 0
+
+    def participants():
+        # La lectura de leads ya cerró su transacción y aún no hay escrituras
+        assert conn.rollback.call_count == 1
+        assert writes == ([], [])
+        yield {"user_email": "ana@example.com", "name": "Ana", "duration": 30, "join_time": "19:00", "leave_time": "19:30"}
+        yield {"user_email": "ana@example.com", "name": "Ana", "duration": 20, "join_time": "19:35", "leave_time": "19:55"}
+
+    records = ZoomAttendanceProcessor(conn, zoom_client=object()).process_meeting_attendance(
+        "m", EVENT, participants=participants()
+    )
+
+    assert [(r["lead_id"], r["duration_minutes"], r["status"]) for r in records] == [("lead-1", 50, "attended")]
+    assert cursor.execute.call_args_list[0].args[1] == event_day_range(EVENT)
+    assert writes[0][0]["rows"] == [("lead-1", "EVENT_ATTENDED")]
+    conn.commit.assert_called_once()
+    assert conn.rollback.call_count == 1
+
+
+def test_process_meeting_attendance_without_report_marks_nobody(pg, writes) -> None:
+    conn, cursor = pg
+    cursor.fetchall.return_value = [("lead-1", "ana@example.com", None, "Ana Pérez")]
+
+    assert ZoomAttendanceProcessor(conn, zoom_client=object()).process_meeting_attendance("m", EVENT, []) == []
+    assert writes == ([], [])
+    conn.commit.assert_not_called()
+
+
+class PagedClient:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def iter_meetings_participant_pages(self, meeting_ids, max_workers=4):
+        return iter(self.stream)
+
+
+def test_process_meetings_attendance_writes_each_meeting_as_it_finishes(pg, writes) -> None:
+    conn, cursor = pg
+    cursor.fetchall.side_effect = [
+        [("lead-a", "a@example.com", None, "Ana")],
+        [("lead-b", "b@example.com", None, "Beto")],
+    ]
+    cursor.rowcount = 0
+    ana = {"user_email": "a@example.com", "name": "Ana", "duration": 25}
+    beto = {"user_email": "b@example.com", "name": "Beto", "duration": 60}
+    client = PagedClient([("m1", [ana]), ("m2", [beto]), ("m1", [ana]), ("m1", None), ("m2", None)])
+
+    results = ZoomAttendanceProcessor(conn, zoom_client=client).process_meetings_attendance({"m1": EVENT, "m2": EVENT})
+
+    assert [(r["lead_id"], r["duration_minutes"], r["status"]) for r in results["m1"]] == [("lead-a", 50, "attended")]
+    assert [(r["lead_id"], r["status"]) for r in results["m2"]] == [("lead-b", "attended")]
+    assert [call["rows"] for call in writes[0]] == [[("lead-a", "EVENT_ATTENDED")], [("lead-b", "EVENT_ATTENDED")]]
+    assert conn.commit.call_count == 2
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from f.einstein_kids.shared.zoom_integration import LeadMatcher, normalize_name
+
+LEADS = [
+    ("lead-1", "Maria@Example.com", "+5215500000001", "María García"),
+    ("lead-2", None, "+5215500000002", "Ana Lucía Pérez"),
+    ("lead-3", "sofia@example.com", "+5215500000003", "Sofía Ramírez"),
+    ("lead-4", None, "+5215500000004", "Ana Pérez"),
+]
+
+
+def test_normalize_name_strips_accents_and_punctuation() -> None:
+    assert normalize_name("  María-José  GARCÍA ") == "maria jose garcia"
+    assert normalize_name(None) == ""
+
+
+def test_email_match_wins_and_is_case_insensitive() -> None:
+    matcher = LeadMatcher(LEADS)
+    lead = matcher.match("maria@example.COM", "Otro Nombre")
+    assert lead is not None and lead["lead_id"] == "lead-1"
+
+
+def test_exact_normalized_name_before_fuzzy() -> None:
+    matcher = LeadMatcher(LEADS)
+    lead = matcher.match("", "ana perez")
+    assert lead is not None and lead["lead_id"] == "lead-4"
+
+
+def test_fuzzy_match_within_token_bucket() -> None:
+    matcher = LeadMatcher(LEADS)
+    lead = matcher.match(None, "Sofia Ramirez (iPhone)")
+    assert lead is not None and lead["lead_id"] == "lead-3"
+    assert matcher.match(None, "Carlos Hernández") is None
+
+
+def test_matched_lead_is_removed_but_reconnects_resolve_to_it() -> None:
+    matcher = LeadMatcher(LEADS)
+    first = matcher.match(None, "Ana Pérez")
+    again = matcher.match(None, "Ana Pérez")
+    assert first is again
+    assert len(matcher) == len(LEADS) - 1
+
+    # Otro participante con nombre parecido ya no puede tomar lead-4
+    other = matcher.match(None, "Ana Lucia Perez")
+    assert other is not None and other["lead_id"] == "lead-2"
+
+
+def test_matching_is_deterministic_on_ties() -> None:
+    leads = [("a", None, None, "Laura Gomez"), ("b", None, None, "Laura Gomez")]
+    assert LeadMatcher(leads).match(None, "Laura Gomez")["lead_id"] == "a"
+    assert LeadMatcher(leads).match(None, "Laura Gómez.")["lead_id"] == "a"
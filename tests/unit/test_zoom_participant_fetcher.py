@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from f.einstein_kids.shared.zoom_integration import ZoomAPIClient, ZoomAPIError
+
+PAGES = {
+    "big": [[{"name": f"p{i}", "duration": 60} for i in range(start, start + 3)] for start in (0, 3, 6)],
+    "small": [[{"name": "solo", "duration": 10}]],
+}
+
+
+class _ZoomFixtureHandler(BaseHTTPRequestHandler):
+    throttled: set[str] = set()
+    requests_seen: list[str] = []
+
+    def log_message(self, *_: object) -> None:
+        pass
+
+    def do_GET(self) -> None:  # noqa: N802
+        parsed = urlparse(self.path)
+        type(self).requests_seen.append(self.path)
+        parts = parsed.path.strip("/").split("/")
+        meeting_id = parts[3] if parts[1:3] == ["report", "meetings"] else ""
+        if meeting_id not in PAGES:
+            self._send(404, {"message": "not found"})
+            return
+
+        if meeting_id not in type(self).throttled:
+            type(self).throttled.add(meeting_id)
+            self._send(429, {"message": "rate limited"}, {"Retry-After": "0"})
+            return
+
+        token = parse_qs(parsed.query).get("next_page_token", ["0"])[0]
+        index = int(token)
+        pages = PAGES[meeting_id]
+        body = {"participants": pages[index], "next_page_token": str(index + 1) if index + 1 < len(pages) else ""}
+        self._send(200, body)
+
+    def _send(self, status: int, body: dict, headers: dict[str, str] | None = None) -> None:
+        raw = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(raw)
+
+
+@pytest.fixture
+def zoom_server() -> Iterator[str]:
+    _ZoomFixtureHandler.throttled = set()
+    _ZoomFixtureHandler.requests_seen = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ZoomFixtureHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/v2"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _client(base_url: str) -> ZoomAPIClient:
+    client = ZoomAPIClient(api_key="key", api_secret="secret", base_url=base_url, timeout=5)
+    client._sleep = lambda _seconds: None
+    return client
+
+
+def test_follows_next_page_token_and_retries_429(zoom_server: str) -> None:
+    client = _client(zoom_server)
+    participants = client.get_meeting_participants("big")
+    assert [p["name"] for p in participants] == [f"p{i}" for i in range(9)]
+    # 1 respuesta 429 + 3 paginas
+    assert len(_ZoomFixtureHandler.requests_seen) == 4
+
+
+def test_pages_are_streamed_lazily(zoom_server: str) -> None:
+    client = _client(zoom_server)
+    pages = client.iter_participant_pages("big")
+    first = next(pages)
+    assert len(first) == 3
+    assert len(_ZoomFixtureHandler.requests_seen) == 2
+
+
+def test_concurrent_fetch_of_several_meetings(zoom_server: str) -> None:
+    client = _client(zoom_server)
+    result = client.fetch_meetings_participants(["big", "small"], max_workers=2)
+    assert len(result["big"]) == 9
+    assert [p["name"] for p in result["small"]] == ["solo"]
+
+
+def test_errors_propagate_from_streaming_fetch(zoom_server: str) -> None:
+    client = _client(zoom_server)
+    with pytest.raises(ZoomAPIError):
+        list(client.iter_meetings_participant_pages(["missing"]))
+    assert client.get_meeting_participants("missing") == []